@@ -0,0 +1,55 @@
+"""
+Benchmark of the grouping of input_focus events into focus tuples.
+
+The synthetic stream switches the focus between a few windows and loses some
+events, so tuples which never complete pile up the way they do over a long
+uptime.
+
+    python -m benchmarks.input_focus_grouping [--events 1000000] [--reference 20000]
+"""
+
+import argparse
+import time
+
+from python_bugreport_parser.plugins.input_focus_plugin import InputFocusPlugin
+from tests.test_input_focus import group_focus_events_reference, synthetic_events
+
+
+def timed(function, events):
+    start = time.perf_counter()
+    result = function(events)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--windows", type=int, default=20)
+    parser.add_argument(
+        "--reference",
+        type=int,
+        default=20_000,
+        help="Also time the previous grouping on this many events, 0 to skip",
+    )
+    args = parser.parse_args()
+
+    events = synthetic_events(args.events, seed=0, windows=args.windows)
+    tuples, seconds = timed(InputFocusPlugin._group_focus_events, events)
+    print(
+        f"{len(events)} events -> {len(tuples)} tuples in {seconds:.3f}s "
+        f"({seconds / len(events) * 1e6:.2f}us per event)"
+    )
+
+    if args.reference:
+        prefix = events[: args.reference]
+        new, new_seconds = timed(InputFocusPlugin._group_focus_events, prefix)
+        old, old_seconds = timed(group_focus_events_reference, prefix)
+        print(
+            f"first {len(prefix)} events: {new_seconds:.3f}s, "
+            f"previous grouping {old_seconds:.3f}s, "
+            f"{'same' if new == old else 'DIFFERENT'} tuples"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,19 @@ import os
 
 from python_bugreport_parser.plugins import BugreportAnalysisContext, PluginRepo
 from python_bugreport_parser.download import download_one_file
+from python_bugreport_parser.extraction_cache import ExtractionCache
+from python_bugreport_parser.plugins.result_cache import PluginResultCache
 
 
 CONFIG_PATH = Path(__file__).parent / "config/config.toml"
 with open(CONFIG_PATH, "rb") as f:
     config = tomllib.load(f)
 extract_path = Path(config["extract_path"])
+extraction_cache = ExtractionCache(
+    Path(config["extraction_cache_path"]),
+    max_bytes=int(config["extraction_cache_budget_gb"] * 1024**3),
+)
+result_cache = PluginResultCache(Path(config["result_cache_path"]))
 
 feedback_ids = [
     "115486261"
@@ -22,12 +29,18 @@ if not home_dir:
 
 for id in feedback_ids:
     user_feedback_path = os.path.join(home_dir, "jira", "OS3-feedback", id)
-    context = BugreportAnalysisContext()
-    context.bugreport = download_one_file(id, user_feedback_path)
-    PluginRepo.run_all(context)
-    with open(
-        "/home/dayong/workspace/others/code/python_bugreport_parser/output.txt",
-        "w",
-        encoding="utf-8",
-    ) as file:
-        file.write(PluginRepo.report_all())
+    log284 = download_one_file(id, user_feedback_path, extraction_cache)
+    if log284 is None:
+        continue
+    # Release the pin on the cached tree once the report is written
+    with log284:
+        context = BugreportAnalysisContext()
+        context.bugreport = log284
+        repo = PluginRepo()
+        repo.run_all(context, result_cache=result_cache)
+        with open(
+            "/home/dayong/workspace/others/code/python_bugreport_parser/output.txt",
+            "w",
+            encoding="utf-8",
+        ) as file:
+            file.write(repo.report_all(context))
@@ -0,0 +1,367 @@
+"""
+Analyze many feedback directories or 284 log zips on a process pool.
+
+Every worker process has its own plugin set, and each report is analyzed with
+fresh plugin instances. Results are streamed into a `BatchSink` as soon as
+they complete; a failing (or crashing) report is recorded as a failure and
+does not stop the rest of the batch.
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO
+
+# How many times a report is retried after its worker process died
+MAX_ATTEMPTS = 2
+
+
+@dataclass
+class BatchResult:
+    source: str
+    ok: bool
+    report: str = ""
+    error: str = ""
+    elapsed: float = 0.0  # seconds spent analyzing the report in the worker
+    # Timings of each plugin, see `BugreportAnalysisContext.stats_summary`
+    plugin_stats: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BatchStats:
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0  # wall time of the whole batch
+    latencies: List[float] = field(default_factory=list)
+
+    def add(self, result: BatchResult) -> None:
+        self.total += 1
+        if result.ok:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self.latencies.append(result.elapsed)
+
+    @property
+    def throughput(self) -> float:
+        """Reports per second."""
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    def latency_percentile(self, percentile: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = round(percentile / 100 * (len(ordered) - 1))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+            "latency_p50": self.latency_percentile(50),
+            "latency_p95": self.latency_percentile(95),
+            "latency_max": max(self.latencies, default=0.0),
+        }
+
+    def __str__(self):
+        summary = self.summary()
+        return (
+            f"BatchStats(total={self.total}, succeeded={self.succeeded}, "
+            f"failed={self.failed}, elapsed={self.elapsed:.1f}s, "
+            f"throughput={summary['throughput']:.2f}/s, "
+            f"p50={summary['latency_p50']:.2f}s, "
+            f"p95={summary['latency_p95']:.2f}s, "
+            f"max={summary['latency_max']:.2f}s)"
+        )
+
+
+class BatchSink(ABC):
+    """Receives the results of a batch one at a time, in completion order."""
+
+    @abstractmethod
+    def write(self, result: BatchResult) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class JsonLinesSink(BatchSink):
+    """Write each result as one JSON object per line."""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    @classmethod
+    def open(cls, path: str) -> "JsonLinesSink":
+        if path == "-":
+            return cls(sys.stdout)
+        return cls(open(path, "a", encoding="utf-8"))
+
+    def write(self, result: BatchResult) -> None:
+        self.stream.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+class DirectorySink(BatchSink):
+    """Write each report into `<output_dir>/<source name>.txt`."""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def write(self, result: BatchResult) -> None:
+        name = Path(result.source).name
+        if not result.ok:
+            name += ".failed"
+        with open(self.output_dir / f"{name}.txt", "w", encoding="utf-8") as f:
+            f.write(result.report if result.ok else result.error)
+
+
+def expand_inputs(patterns: Iterable[str]) -> List[Path]:
+    """
+    Expand glob patterns into feedback directories and zip files.
+    Patterns that match nothing are kept as literal paths if they exist.
+    """
+    sources = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or (
+            [pattern] if os.path.exists(pattern) else []
+        )
+        if not matches:
+            print(f"No input matches {pattern}")
+        for match in matches:
+            path = Path(match)
+            if path in seen or not (path.is_dir() or path.suffix == ".zip"):
+                continue
+            seen.add(path)
+            sources.append(path)
+    return sources
+
+
+_worker_extraction_cache = None
+_worker_result_cache = None
+_worker_plugin_names = None
+_worker_plugin_timeout = None
+_worker_logcat_window = None
+
+
+def _init_worker(
+    extraction_cache_root: Optional[str],
+    result_cache_root: Optional[str],
+    plugin_names: Optional[List[str]],
+    plugin_timeout: Optional[float],
+    logcat_window: Optional[timedelta],
+    quiet: bool,
+) -> None:
+    global _worker_extraction_cache, _worker_result_cache
+    global _worker_plugin_names, _worker_plugin_timeout, _worker_logcat_window
+    _worker_plugin_names = plugin_names
+    _worker_plugin_timeout = plugin_timeout
+    _worker_logcat_window = logcat_window
+    if quiet:
+        sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    if extraction_cache_root:
+        from python_bugreport_parser.extraction_cache import ExtractionCache
+
+        _worker_extraction_cache = ExtractionCache(Path(extraction_cache_root))
+    if result_cache_root:
+        from python_bugreport_parser.plugins.result_cache import PluginResultCache
+
+        _worker_result_cache = PluginResultCache(Path(result_cache_root))
+
+
+def analyze_one(source: Path) -> BatchResult:
+    """
+    Analyze a single feedback directory or 284 log zip with the plugins the
+    worker was set up with, all of them by default.
+    """
+    from python_bugreport_parser.bugreport.bugreport_all import Log284
+    from python_bugreport_parser.plugins import BugreportAnalysisContext, PluginRepo
+    from python_bugreport_parser.plugins.budget import PluginBudgets
+
+    start = time.perf_counter()
+    try:
+        if source.suffix == ".zip":
+            log284 = Log284.from_zip(
+                source, source.with_suffix(""), cache=_worker_extraction_cache
+            )
+        else:
+            log284 = Log284.from_dir(source)
+        if log284 is None:
+            raise ValueError(f"Invalid bugreport directories in {source}")
+
+        # Keep the extracted tree pinned in the cache for the whole analysis
+        with log284:
+            context = BugreportAnalysisContext()
+            context.bugreport = log284
+            repo = PluginRepo()
+            # The batch already keeps every core busy with one report per worker
+            repo.run_all(
+                context,
+                names=_worker_plugin_names,
+                mode="serial",
+                result_cache=_worker_result_cache,
+                budgets=PluginBudgets(default=_worker_plugin_timeout),
+                logcat_window=_worker_logcat_window,
+            )
+            report = repo.report_all(context, _worker_plugin_names)
+        return BatchResult(
+            str(source),
+            True,
+            report=report,
+            elapsed=time.perf_counter() - start,
+            plugin_stats=context.stats_summary(),
+        )
+    except Exception:  # pylint: disable=broad-except
+        return BatchResult(
+            str(source),
+            False,
+            error=traceback.format_exc(),
+            elapsed=time.perf_counter() - start,
+        )
+
+
+class BatchRunner:
+    """
+    Analyze reports on a process pool and stream the results into a sink.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        extraction_cache_root: Optional[str] = None,
+        result_cache_root: Optional[str] = None,
+        plugin_names: Optional[List[str]] = None,
+        plugin_timeout: Optional[float] = None,
+        max_tasks_per_child: Optional[int] = None,
+        logcat_window: Optional[timedelta] = None,
+        quiet: bool = True,
+        analyze: Optional[Callable[[Path], BatchResult]] = None,
+    ):
+        """
+        :param max_workers: Number of worker processes, defaults to the CPU count.
+        :param extraction_cache_root: Resolve zips through an `ExtractionCache`
+            at this path instead of extracting them next to themselves.
+        :param result_cache_root: Reuse the plugin results of previous runs
+            from a `PluginResultCache` at this path.
+        :param plugin_names: Only run these plugins and their dependencies,
+            the other plugins are not even imported.
+        :param plugin_timeout: Seconds each plugin may take on a report. A
+            plugin running out of time is reported as timed out, and the
+            plugins depending on it are skipped.
+        :param max_tasks_per_child: Recycle workers after this many reports,
+            which bounds the memory a long batch can accumulate.
+        :param logcat_window: Only parse the logcat lines this far from the
+            error timestamp of each report.
+        :param quiet: Silence the prints of the parser in the workers.
+        :param analyze: What the workers run on each report, `analyze_one` by
+            default. It must be a module-level function to reach the workers.
+        """
+        self.max_workers = max_workers or os.cpu_count()
+        self.extraction_cache_root = extraction_cache_root
+        self.result_cache_root = result_cache_root
+        self.plugin_names = plugin_names
+        self.plugin_timeout = plugin_timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self.logcat_window = logcat_window
+        self.quiet = quiet
+        self.analyze = analyze or analyze_one
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(
+                self.extraction_cache_root,
+                self.result_cache_root,
+                self.plugin_names,
+                self.plugin_timeout,
+                self.logcat_window,
+                self.quiet,
+            ),
+            max_tasks_per_child=self.max_tasks_per_child,
+        )
+
+    def run(self, sources: Iterable[Path], sink: BatchSink) -> BatchStats:
+        """
+        Analyze every source and write each result into the sink as it completes.
+        Only a bounded number of reports is in flight at a time. If a worker
+        process dies, e.g. by the OOM killer, the pool is recreated and the
+        reports it was running are retried one at a time, so that only the
+        report that killed the worker is recorded as a failure.
+        """
+        stats = BatchStats()
+        start = time.perf_counter()
+        queue = deque((Path(source), 1) for source in sources)
+        in_flight: Dict[Future, tuple] = {}
+        pool = self._new_pool()
+        try:
+            while queue or in_flight:
+                self._submit(pool, queue, in_flight)
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                retries = []
+                broken = False
+                for future in done:
+                    source, attempt = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        if attempt < MAX_ATTEMPTS:
+                            retries.append((source, attempt + 1))
+                            continue
+                        result = BatchResult(str(source), False, error=repr(e))
+                    sink.write(result)
+                    stats.add(result)
+
+                if broken:
+                    # Every pending future of a broken pool fails as well, and
+                    # it takes no more reports even if nothing is retried
+                    for source, attempt in in_flight.values():
+                        retries.append((source, max(attempt, 2)))
+                    in_flight.clear()
+                    queue.extendleft(reversed(retries))
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._new_pool()
+        finally:
+            pool.shutdown(cancel_futures=True)
+            stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _submit(
+        self,
+        pool: ProcessPoolExecutor,
+        queue: deque,
+        in_flight: Dict[Future, tuple],
+    ) -> None:
+        # Retries run alone, so that a crash identifies the report causing it
+        if any(attempt > 1 for _, attempt in in_flight.values()):
+            return
+        while queue and len(in_flight) < self.max_workers * 2:
+            source, attempt = queue[0]
+            if attempt > 1 and in_flight:
+                return
+            queue.popleft()
+            in_flight[pool.submit(self.analyze, source)] = (source, attempt)
+            if attempt > 1:
+                return
@@ -1,13 +1,25 @@
 import glob
+import hashlib
 import os
+import threading
+import zipfile
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from python_bugreport_parser.bugreport.anr_record import AnrRecord
 from python_bugreport_parser.bugreport.bugreport_txt import BugreportTxt
+from python_bugreport_parser.bugreport.decompression import (
+    decompress_nested_archives,
+    extract_archive,
+    extract_dir_for,
+    is_extracted,
+    is_partial_extraction,
+)
 from python_bugreport_parser.bugreport.dumpstate_board import DumpstateBoard
 from python_bugreport_parser.bugreport.interfaces import LogInterface
-from python_bugreport_parser.utils import unzip_and_delete
+from python_bugreport_parser.bugreport.requirements import DataRequirements
+from python_bugreport_parser.extraction_cache import ExtractionCache, FileLock
+from python_bugreport_parser.utils import try_unzip
 
 class BugreportDirs:
     def __init__(self):
@@ -34,56 +46,293 @@ class BugreportDirs:
             self.dumpstate_board_path.exists()
         )
 
+    def input_files(self) -> List[Path]:
+        """Every file the report is parsed from, in a stable order."""
+        files = [self.bugreport_txt_path, self.dumpstate_board_path]
+        files += sorted(self.anr_files)
+        for directory in self.miuilog_reboot_dirs + self.miuilog_scout_dirs:
+            files += sorted(p for p in Path(directory).rglob("*") if p.is_file())
+        files.append(self.mtdoops_md_path)
+        return [f for f in files if f.is_file()]
+
+    def fingerprint(self) -> str:
+        """
+        sha256 over the names and contents of the input files, which identifies
+        the report independently of where it was extracted.
+        """
+        digest = hashlib.sha256()
+        for path in self.input_files():
+            digest.update(path.name.encode("utf-8") + b"\0")
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def stat_fingerprint(self) -> str:
+        """
+        sha256 over the paths, sizes and modification times of the input
+        files. Cheap, but only identifies the report where it was extracted.
+        """
+        digest = hashlib.sha256()
+        for path in self.input_files():
+            stat = path.stat()
+            digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+        return digest.hexdigest()
+
+
+class LazyComponent:
+    """
+    A lazily loaded, memoized attribute of a log.
+    The first access calls the owner's `_load_<name>()` and caches the result;
+    concurrent first accesses from several threads load the component once.
+    Assigning to the attribute replaces the cached value.
+    The owner must initialize `self._component_locks = {}`.
+    """
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+        self.attr = f"_{name}"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.attr]
+        except KeyError:
+            pass
+        lock = instance._component_locks.setdefault(self.name, threading.Lock())
+        with lock:
+            if self.attr not in instance.__dict__:
+                loader = getattr(instance, f"_load_{self.name}")
+                instance.__dict__[self.attr] = loader()
+            return instance.__dict__[self.attr]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.attr] = value
+
+    def is_loaded(self, instance) -> bool:
+        return self.attr in instance.__dict__
+
+    @staticmethod
+    def getstate(instance) -> dict:
+        """The pickle state of an owner, without its (unpicklable) locks."""
+        state = instance.__dict__.copy()
+        state["_component_locks"] = {}
+        return state
+
 
 class Bugreport(LogInterface):
     """
     A class to parse and handle (zipped) bugreport.
     The bugreport is expected to be exported by `adb bugreport`.
-    It extracts necessary files from a bug report zip, loads them into memory.
+    It extracts necessary files from a bug report zip, and loads each of them
+    into memory on first access, so that an analysis only pays for the
+    components it uses. Call `preload()` to load everything up front.
+    `require()` narrows down what the components parse when they are loaded.
     """
 
+    COMPONENTS = [
+        "bugreport_txt",
+        "anr_records",
+        "miuilog_reboots",
+        "miuilog_scouts",
+        "dumpstate_board",
+    ]
+
+    bugreport_txt: BugreportTxt = LazyComponent()
+    anr_records: List[AnrRecord] = LazyComponent()
+    miuilog_reboots: List[Path] = LazyComponent()
+    miuilog_scouts: List[AnrRecord] = LazyComponent()
+    dumpstate_board: Optional[DumpstateBoard] = LazyComponent()
+    # Identifies the report, e.g. for the plugin result cache
+    fingerprint: str = LazyComponent()
+
+    # Components whose content depends on the requirements
+    REQUIREMENT_DEPENDENT_COMPONENTS = [
+        "bugreport_txt",
+        "anr_records",
+        "miuilog_scouts",
+        "dumpstate_board",
+    ]
+
     def __init__(self):
         self.bugreport_dirs: BugreportDirs = None
-        self.bugreport_txt: BugreportTxt = None
-        self.anr_records: List[AnrRecord] = []
-        self.miuilog_reboots: List[str] = []
-        self.miuilog_scouts: List[AnrRecord] = []
-        self.dumpstate_board: DumpstateBoard = None
+        self.requirements: DataRequirements = DataRequirements.everything()
+        self._component_locks = {}
+        # Keeps the tree in the extraction cache from being evicted
+        self._pin: Optional[FileLock] = None
+
+    def __getstate__(self):
+        state = LazyComponent.getstate(self)
+        # Copies do not hold the pin, it is released by `close()`
+        state["_pin"] = None
+        return state
+
+    def __enter__(self) -> "Bugreport":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the extracted tree, if loaded through an extraction cache."""
+        pin = getattr(self, "_pin", None)
+        if pin is not None:
+            pin.release()
+            self._pin = None
+
+    def require(self, requirements: DataRequirements) -> None:
+        """
+        Only parse what `requirements` asks for when components are loaded.
+        If components were already loaded for narrower requirements, they are
+        dropped and loaded again on next access for the union of both.
+        """
+        loaded = [
+            name
+            for name in Bugreport.REQUIREMENT_DEPENDENT_COMPONENTS
+            if getattr(Bugreport, name).is_loaded(self)
+        ]
+        if not loaded:
+            self.requirements = requirements
+            return
+        if self.requirements.covers(requirements):
+            return
+        self.requirements = self.requirements.union(requirements)
+        for name in loaded:
+            del self.__dict__[getattr(Bugreport, name).attr]
 
     @classmethod
-    def from_zip(cls, zip_path: Path, feedback_dir: str) -> "Bugreport":
-        unzip_and_delete(
-            zip_file=zip_path,
-            unzip_dir=feedback_dir,
-        )
+    def from_zip(
+        cls,
+        zip_path: Path,
+        feedback_dir: str,
+        cache: Optional[ExtractionCache] = None,
+    ) -> "Bugreport":
+        """
+        Load a bugreport zip. The zip is kept.
+        Args:
+            zip_path (Path): Path to the bugreport zip.
+            feedback_dir (str): Where to extract the zip if no cache is given.
+            cache (Optional[ExtractionCache]): Resolve the zip to its extracted
+                tree in this cache instead of extracting it to feedback_dir.
+                The tree is pinned until `close()`.
+        """
+        if cache is not None:
+            tree, pin = cache.pin(zip_path, prepare=Bugreport.prepare)
+            bugreport = Bugreport.from_dir(tree, prepare=False)
+            bugreport._pin = pin
+            return bugreport
+        try_unzip(zip_file=zip_path, unzip_dir=feedback_dir)
         return Bugreport.from_dir(feedback_dir)
 
     @classmethod
-    def from_dir(cls, feedback_dir: Path) -> "Bugreport":
+    def from_dir(cls, feedback_dir: Path, prepare: bool = True) -> "Bugreport":
+        """
+        Load an extracted bugreport directory.
+        Args:
+            feedback_dir (Path): The extracted bugreport.
+            prepare (bool): Decompress the nested archives first. Trees from
+                an ExtractionCache were prepared before being published and
+                may be shared with other readers, so they must not be touched.
+        """
         bugreport = cls()
+        feedback_dir = Path(feedback_dir)
+        if prepare:
+            Bugreport.prepare(feedback_dir)
         bugreport.bugreport_dirs = Bugreport._load_required_file_paths(feedback_dir)
-        bugreport.load()
         return bugreport
 
     def load(self):
-        self.bugreport_txt = BugreportTxt(self.bugreport_dirs.bugreport_txt_path)
-        self.bugreport_txt.load()
-        for file in self.bugreport_dirs.anr_files:
-            anr_record = AnrRecord()
-            anr_record.load(file)
-            self.anr_records.append(anr_record)
-        self.miuilog_reboots = self.bugreport_dirs.miuilog_reboot_dirs
-        for file in self.bugreport_dirs.miuilog_scout_dirs:
-            anr_record = AnrRecord()
-            anr_record.load(file)
-            self.miuilog_scouts.append(anr_record)
-        if self.bugreport_dirs.dumpstate_board_path:
-            self.dumpstate_board = DumpstateBoard()
-            self.dumpstate_board.load(self.bugreport_dirs.dumpstate_board_path)
-        else:
-            print("No dumpstate board file found")
+        """Load all components eagerly, same as `preload()`."""
+        self.preload()
+
+    def preload(self) -> None:
+        """Load every component now instead of on first access, e.g. in batch mode."""
+        for name in Bugreport.COMPONENTS:
+            getattr(self, name)
         print("Loaded bugreport:", self)
-        # print(len(self.anr_records), len(self.miuilog_reboots), len(self.miuilog_scouts))
+
+    def cache_fingerprint(self, by_content: bool) -> str:
+        """
+        Identifies the report for the keys of plugin results.
+        :param by_content: Use `fingerprint`, which hashes every input file
+            and is needed for results that outlive the process. Otherwise the
+            sizes and modification times of the files are enough to notice
+            they changed, unless `fingerprint` is known already.
+        """
+        if by_content or Bugreport.fingerprint.is_loaded(self):
+            return self.fingerprint
+        if self.bugreport_dirs is None:
+            return ""
+        return self.bugreport_dirs.stat_fingerprint()
+
+    def loaded_components(self) -> List[str]:
+        return [
+            name
+            for name in Bugreport.COMPONENTS
+            if getattr(Bugreport, name).is_loaded(self)
+        ]
+
+    def _load_fingerprint(self) -> str:
+        if self.bugreport_dirs is None:
+            return ""
+        return self.bugreport_dirs.fingerprint()
+
+    def _load_bugreport_txt(self) -> Optional[BugreportTxt]:
+        if self.bugreport_dirs is None:
+            return None
+        bugreport_txt = BugreportTxt(self.bugreport_dirs.bugreport_txt_path)
+        bugreport_txt.load(self.requirements)
+        return bugreport_txt
+
+    def _load_anr_records(self) -> List[AnrRecord]:
+        if self.bugreport_dirs is None or not self.requirements.anr_traces:
+            return []
+        return [Bugreport._load_anr_record(f) for f in self.bugreport_dirs.anr_files]
+
+    def _load_miuilog_reboots(self) -> List[Path]:
+        if self.bugreport_dirs is None:
+            return []
+        return self.bugreport_dirs.miuilog_reboot_dirs
+
+    def _load_miuilog_scouts(self) -> List[AnrRecord]:
+        if self.bugreport_dirs is None or not self.requirements.anr_traces:
+            return []
+        return [
+            Bugreport._load_anr_record(f)
+            for f in self.bugreport_dirs.miuilog_scout_dirs
+        ]
+
+    def _load_dumpstate_board(self) -> Optional[DumpstateBoard]:
+        if not self.requirements.dumpstate_board:
+            return None
+        if (
+            self.bugreport_dirs is None
+            or not self.bugreport_dirs.dumpstate_board_path.is_file()
+        ):
+            print("No dumpstate board file found")
+            return None
+        dumpstate_board = DumpstateBoard()
+        dumpstate_board.load(self.bugreport_dirs.dumpstate_board_path)
+        return dumpstate_board
+
+    @staticmethod
+    def _load_anr_record(path: Path) -> AnrRecord:
+        anr_record = AnrRecord()
+        anr_record.load(path)
+        return anr_record
+
+    @staticmethod
+    def prepare(bugreport_dir: Path) -> None:
+        """
+        Decompress the archives nested in the unzipped bugreport, so that
+        `_load_required_file_paths` only needs to walk the directories.
+        Args:
+            bugreport_dir (Path): Path to the unzipped bugreport.
+        """
+        stats = decompress_nested_archives(bugreport_dir)
+        print("Decompressed nested archives:", stats)
 
     @staticmethod
     def _load_required_file_paths(bugreport_dir: Path) -> BugreportDirs:
@@ -129,13 +378,8 @@ class Bugreport(LogInterface):
         )
 
         if os.path.isdir(reboot_mqs_dir):
-            # Unzip all zip files in this folder
-            for zip_file in glob.glob(str(reboot_mqs_dir / "*.zip")):
-                extract_dir = os.path.splitext(zip_file)[0]
-                os.makedirs(extract_dir, exist_ok=True)
-                unzip_and_delete(zip_file, extract_dir)
-                print(f"Unzipped {zip_file} to {extract_dir}")
-                bugreport_dirs.miuilog_reboot_dirs.append(Path(extract_dir))
+            # The archives were extracted by `prepare`
+            bugreport_dirs.miuilog_reboot_dirs.extend(_list_dirs(reboot_mqs_dir))
         else:
             print("No reboot mqs folder found")
 
@@ -144,39 +388,36 @@ class Bugreport(LogInterface):
             bugreport_dir / "FS" / "data" / "miuilog" / "stability" / "scout"
         )
         if os.path.isdir(scout_mqs_dir):
-            # Unzip all zip files in this folder
-            if (scout_app_dir := scout_mqs_dir / "app") and os.path.isdir(
-                scout_app_dir
-            ):
-                for zip_file in os.listdir(scout_app_dir):
-                    print(zip_file)
-                    if os.path.isdir(scout_app_dir / zip_file):
-                        bugreport_dirs.miuilog_scout_dirs.append(
-                            scout_app_dir / zip_file
-                        )
-            if (scout_sys_dir := scout_mqs_dir / "sys") and os.path.isdir(
-                scout_sys_dir
-            ):
-                for zip_file in os.listdir(scout_sys_dir):
-                    print(zip_file)
-                    if os.path.isdir(scout_sys_dir / zip_file):
-                        bugreport_dirs.miuilog_scout_dirs.append(
-                            scout_sys_dir / zip_file
-                        )
+            for scout_dir in (scout_mqs_dir / "app", scout_mqs_dir / "sys"):
+                if os.path.isdir(scout_dir):
+                    bugreport_dirs.miuilog_scout_dirs.extend(_list_dirs(scout_dir))
             if (scout_watchdog_dir := scout_mqs_dir / "watchdog") and os.path.isdir(
                 scout_watchdog_dir
             ):
-                for zip_file in os.listdir(scout_watchdog_dir):
-                    print(zip_file)
-                    bugreport_dirs.miuilog_scout_dirs.append(
-                        scout_watchdog_dir / zip_file
-                    )
+                for entry in sorted(scout_watchdog_dir.iterdir()):
+                    # Skip archives that were extracted next to themselves
+                    if entry.suffix == ".zip" and is_extracted(
+                        entry, extract_dir_for(entry)
+                    ):
+                        continue
+                    if entry.is_dir() and is_partial_extraction(entry):
+                        continue
+                    bugreport_dirs.miuilog_scout_dirs.append(entry)
         else:
             print("No scout mqs folder found")
 
         print("Ready to return ", bugreport_dirs)
         return bugreport_dirs
 
+
+def _list_dirs(path: Path) -> List[Path]:
+    return sorted(
+        entry
+        for entry in path.iterdir()
+        if entry.is_dir() and not is_partial_extraction(entry)
+    )
+
+
 # TODO: WE ALSO NEED TO UNZIP mishght.zip
 # TODO: WE ALSO NEED TO ANALYSE OFFLINELOG
 class Log284(LogInterface):
@@ -185,27 +426,111 @@ class Log284(LogInterface):
     This is a zipped log file whose content is defined by an internal structure.
     It mainly contains the standard bugreport and mtdoops.md, which are essential for debugging.
     The log284 file is expected to be exported by secret code 284.
+    Like `Bugreport`, its components are loaded on first access.
     """
 
+    mtdoops_md: str = LazyComponent()
+
     def __init__(self):
         self.bugreport_dirs: BugreportDirs = None
         self.bugreport: Bugreport = None
-        self.mtdoops_md: str = ""
+        self._component_locks = {}
+        # Keeps the tree in the extraction cache from being evicted
+        self._pin: Optional[FileLock] = None
+
+    def __getstate__(self):
+        state = LazyComponent.getstate(self)
+        # Copies do not hold the pin, it is released by `close()`
+        state["_pin"] = None
+        return state
+
+    def __enter__(self) -> "Log284":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the extracted tree, if loaded through an extraction cache."""
+        pin = getattr(self, "_pin", None)
+        if pin is not None:
+            pin.release()
+            self._pin = None
+
+    @property
+    def bugreport_txt(self) -> Optional[BugreportTxt]:
+        return self.bugreport.bugreport_txt
+
+    @property
+    def anr_records(self) -> List[AnrRecord]:
+        return self.bugreport.anr_records
+
+    @property
+    def miuilog_scouts(self) -> List[AnrRecord]:
+        return self.bugreport.miuilog_scouts
+
+    @property
+    def dumpstate_board(self) -> Optional[DumpstateBoard]:
+        return self.bugreport.dumpstate_board
+
+    @property
+    def fingerprint(self) -> str:
+        return self.bugreport.fingerprint
+
+    @property
+    def requirements(self) -> DataRequirements:
+        return self.bugreport.requirements
+
+    def cache_fingerprint(self, by_content: bool) -> str:
+        """See `Bugreport.cache_fingerprint`."""
+        return self.bugreport.cache_fingerprint(by_content)
+
+    def require(self, requirements: DataRequirements) -> None:
+        """See `Bugreport.require`."""
+        self.bugreport.require(requirements)
 
     @classmethod
-    def from_zip(cls, zip_path: Path, feedback_dir: str) -> "Log284":
-        unzip_and_delete(
-            unzip_dir=feedback_dir,
-            zip_file=zip_path,
-        )
+    def from_zip(
+        cls,
+        zip_path: Path,
+        feedback_dir: str,
+        cache: Optional[ExtractionCache] = None,
+    ) -> "Log284":
+        """
+        Load a 284 log zip. The zip is kept.
+        Args:
+            zip_path (Path): Path to the 284 log zip.
+            feedback_dir (str): Where to extract the zip if no cache is given.
+            cache (Optional[ExtractionCache]): Resolve the zip to its extracted
+                tree in this cache instead of extracting it to feedback_dir.
+                The tree is pinned until `close()`.
+        """
+        if cache is not None:
+            tree, pin = cache.pin(zip_path, prepare=Log284.prepare)
+            log284 = Log284.from_dir(tree, prepare=False)
+            if log284 is None:
+                pin.release()
+                return None
+            log284._pin = pin
+            return log284
+        try_unzip(zip_file=zip_path, unzip_dir=feedback_dir)
         return Log284.from_dir(feedback_dir)
 
     @classmethod
-    def from_dir(cls, feedback_dir: Path) -> "Log284":
+    def from_dir(cls, feedback_dir: Path, prepare: bool = True) -> "Log284":
+        """
+        Load an extracted 284 log directory.
+        Args:
+            feedback_dir (Path): The extracted 284 log.
+            prepare (bool): Extract the inner bugreport first, see
+                `Bugreport.from_dir`.
+        """
         log284 = cls()
 
         if isinstance(feedback_dir, str):
             feedback_dir = Path(feedback_dir)
+        if prepare:
+            Log284.prepare(feedback_dir)
         bugreport_dirs = Log284._load_required_file_paths(feedback_dir)
         if not bugreport_dirs:
             print("Invalid bugreport directories, some files are missing")
@@ -214,43 +539,62 @@ class Log284(LogInterface):
 
         log284.bugreport = Bugreport()
         log284.bugreport.bugreport_dirs = bugreport_dirs
-        log284.load()
         return log284
 
     def load(self) -> None:
+        """Load all components eagerly, same as `preload()`."""
+        self.preload()
+
+    def preload(self) -> None:
         """
-        Load the bugreport and mtdoops.md files.
-        Args:
-            bugreport_dirs (BugreportDirs): The directories containing the bugreport and mtdoops.md files.
+        Load the bugreport and mtdoops.md files now instead of on first access.
         """
-        self.bugreport.load()
+        self.bugreport.preload()
+        getattr(self, "mtdoops_md")
+
+    def _load_mtdoops_md(self) -> str:
+        if self.bugreport_dirs is None:
+            return ""
         mtdoops_md_path = self.bugreport_dirs.bugreport_txt_path.parent / "mtdoops.md"
-        if mtdoops_md_path.exists():
-            with open(mtdoops_md_path, "r", encoding="utf-8", errors="ignore") as f:
-                self.mtdoops_md = f.read()
+        if not mtdoops_md_path.exists():
+            return ""
+        with open(mtdoops_md_path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
 
     @staticmethod
-    def _load_required_file_paths(feedback_dir: Path) -> BugreportDirs:
+    def prepare(feedback_dir: Path) -> None:
         """
-        Load the unzipped 284 log and gather some paths related to stability.
+        Extract the bugreport zip inside the 284 log if it is not extracted yet,
+        then decompress the archives nested in the bugreport.
         Args:
             feedback_dir (Path): Path to the unzipped 284 log.
-        Returns:
-            BugreportDirs: An object containing paths to the extracted directories.
         """
         bugreport_dir = feedback_dir / "bugreport"
-        print(bugreport_dir)
-
-        # Unzip the bugreport if not extracted
         bugreport_zip_path = next(
             iter(glob.glob(str(feedback_dir / "bugreport*.zip"))), None
         )
         if not bugreport_zip_path:
             print("No bugreport*.zip file found")
-        else:
+        elif not is_extracted(Path(bugreport_zip_path), bugreport_dir):
             print(bugreport_dir, bugreport_zip_path)
-            unzip_and_delete(zip_file=bugreport_zip_path, unzip_dir=bugreport_dir)
-            # TODO: The bugreport may be corrupted
+            try:
+                extract_archive(Path(bugreport_zip_path), bugreport_dir)
+            except (zipfile.BadZipFile, OSError) as e:
+                # TODO: The bugreport may be corrupted
+                print(f"Error processing {bugreport_zip_path}: {e}")
+        Bugreport.prepare(bugreport_dir)
+
+    @staticmethod
+    def _load_required_file_paths(feedback_dir: Path) -> BugreportDirs:
+        """
+        Load the unzipped 284 log and gather some paths related to stability.
+        Args:
+            feedback_dir (Path): Path to the unzipped 284 log.
+        Returns:
+            BugreportDirs: An object containing paths to the extracted directories.
+        """
+        bugreport_dir = feedback_dir / "bugreport"
+        print(bugreport_dir)
 
         paths = Bugreport._load_required_file_paths(bugreport_dir)
         if not paths:
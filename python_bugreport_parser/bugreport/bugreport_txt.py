@@ -1,14 +1,19 @@
 import mmap
 from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from python_bugreport_parser.bugreport.interfaces import LogInterface
 from python_bugreport_parser.bugreport.metadata import Metadata
+from python_bugreport_parser.bugreport.requirements import (
+    LOGCAT_SECTIONS,
+    DataRequirements,
+)
 from python_bugreport_parser.bugreport.section import (
-    SECTION_BEGIN,
-    SECTION_BEGIN_NO_CMD,
-    SECTION_END,
+    DUMPSYS_BYTES_REGEX,
+    SECTION_BEGIN_BYTES,
+    SECTION_BEGIN_NO_CMD_BYTES,
+    SECTION_END_BYTES,
     AnrRecordSection,
     DumpsysSection,
     LogcatSection,
@@ -17,6 +22,23 @@ from python_bugreport_parser.bugreport.section import (
     SystemPropertySection,
 )
 
+# Version of what the parsers make out of a report. Bump it when a change to
+# them changes the data plugins read, e.g. which dumpsys entries are found, so
+# that the cached results of every plugin are computed again.
+PARSER_VERSION = 2
+
+# Every section marker line holds this
+SECTION_MARKER = b"------ "
+# Newlines are counted this many bytes of the file at a time
+COUNT_CHUNK = 1 << 20
+
+
+def _seconds(text: bytes) -> Optional[float]:
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
 
 class BugreportTxt(LogInterface):
     """
@@ -24,11 +46,25 @@ class BugreportTxt(LogInterface):
     """
 
     def __init__(self, path: Path):
+        self.path = Path(path)
         self.raw_file = self._mmap_file(path)
         self.metadata = Metadata()
         self.sections: List[Section] = []
         self.error_timestamp: datetime = None
         self.loaded: bool = False
+        # What `load()` parsed, everything by default
+        self.requirements: DataRequirements = DataRequirements.everything()
+
+    def __getstate__(self):
+        # The mmap cannot be pickled, it is reopened from the path instead
+        state = self.__dict__.copy()
+        state["raw_file"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.path.exists():
+            self.raw_file = self._mmap_file(self.path)
 
     def set_error_timestamp(self, error_timestamp: datetime) -> None:
         """
@@ -50,18 +86,57 @@ class BugreportTxt(LogInterface):
     def from_dir(cls, feedback_dir: Path) -> "BugreportTxt":
         raise NotImplementedError("Method from_zip is not implemented yet")
 
-    def load(self) -> None:
-        lines = self._read_file()
-        self.metadata.parse(lines)
-        self.set_error_timestamp(self.metadata.timestamp) # set a default error timestamp
+    def load(self, requirements: Optional[DataRequirements] = None) -> None:
+        """
+        Parse the file.
+        :param requirements: Only parse the sections and dumpsys services it
+            asks for. The other sections are still listed with their line
+            numbers, but with an unparsed `OtherSection` content.
+        """
+        if requirements is not None:
+            self.requirements = requirements
+        raw = self.raw_file
+        self.metadata.parse(self._decoded_lines())
+        if self.error_timestamp is None:
+            # Default to the time of the report, an error timestamp set before
+            # loading also centers the logcat window
+            self.set_error_timestamp(self.metadata.timestamp)
 
-        current_section_lines = []
+        # The file is only searched for the section markers. The lines of a
+        # section are kept as spans of the file, and only the sections that
+        # get parsed are split into lines.
+        line_num = self.metadata.lines_passed
+        position = self._line_offset(line_num)
+        current_section_lines: List[Tuple[int, int]] = []
+        # Seconds spent on the dumpsys services of the current section
+        service_durations: Dict[str, float] = {}
         section_start = ("", -1)
-        for line_num, line in enumerate(
-            lines[self.metadata.lines_passed :], start=self.metadata.lines_passed
-        ):
-            if match := SECTION_END.search(line):
-                group = match.group(2)
+        for line_start, line_end in self._marker_candidates(position):
+            line = raw[line_start:line_end]
+            end_match = SECTION_END_BYTES.search(line)
+            begin_match = None
+            if not end_match:
+                begin_match = SECTION_BEGIN_NO_CMD_BYTES.search(
+                    line
+                ) or SECTION_BEGIN_BYTES.search(line)
+                if not begin_match:
+                    # Not a marker, the line stays in the span of the section
+                    service = DUMPSYS_BYTES_REGEX.match(line)
+                    if service and (seconds := _seconds(service.group(1))) is not None:
+                        name = service.group(2).decode("utf-8", errors="replace")
+                        name = name.strip()
+                        service_durations[name] = (
+                            service_durations.get(name, 0.0) + seconds
+                        )
+                    continue
+
+            line_num += self._count_lines(position, line_start)
+            if position < line_start:
+                current_section_lines.append((position, line_start - 1))
+            position = line_end + 1
+
+            if end_match:
+                group = end_match.group(2).decode("utf-8", errors="replace")
                 self._create_and_add_section(
                     name=group,
                     start_line=(
@@ -69,41 +144,54 @@ class BugreportTxt(LogInterface):
                     ),
                     end_line=line_num - 1,
                     lines=current_section_lines,
+                    duration=_seconds(end_match.group(1)),
+                    service_durations=service_durations,
                 )
                 section_start = ("", -1)
                 current_section_lines = []
-            elif (match := SECTION_BEGIN_NO_CMD.search(line)) or (
-                match := SECTION_BEGIN.search(line)
-            ):
-                group = match.group(1)
+                service_durations = {}
+            else:
+                group = begin_match.group(1).decode("utf-8", errors="replace")
                 # skip BLOCK STAT, since this is not a beginning of a section
-                if group == "BLOCK STAT":
-                    continue
-                # For these sections without an ending line
-                if group != section_start[0]:
-                    if section_start[1] != -1:
-                        self._create_and_add_section(
-                            name=section_start[0],
-                            start_line=section_start[1],
-                            end_line=line_num - 1,
-                            lines=current_section_lines,
-                        )
-                    current_section_lines = []
+                if group != "BLOCK STAT":
+                    # For these sections without an ending line
+                    if group != section_start[0]:
+                        if section_start[1] != -1:
+                            self._create_and_add_section(
+                                name=section_start[0],
+                                start_line=section_start[1],
+                                end_line=line_num - 1,
+                                lines=current_section_lines,
+                                service_durations=service_durations,
+                            )
+                        current_section_lines = []
+                        service_durations = {}
 
-                section_start = group, line_num
-            else:
-                current_section_lines.append(line)
+                    section_start = group, line_num
+            line_num += 1
 
         self.sections.sort(key=lambda x: x.start_line)
         self.loaded = True
 
     def _create_and_add_section(
-        self, name: str, start_line: int, end_line: int, lines: List[str]
+        self,
+        name: str,
+        start_line: int,
+        end_line: int,
+        lines: List[Tuple[int, int]],
+        duration: Optional[float] = None,
+        service_durations: Optional[Dict[str, float]] = None,
     ) -> Section:
-        if name == "SYSTEM LOG" or name == "EVENT LOG":
-            section_content = LogcatSection()
+        """
+        :param lines: Spans of the lines of the section in the file, without
+            their last newline. The durations are described at `Section`.
+        """
+        if not self.requirements.wants_section(name):
+            section_content = OtherSection()
+        elif name in LOGCAT_SECTIONS:
+            section_content = LogcatSection(self._logcat_window())
         elif name == "DUMPSYS":
-            section_content = DumpsysSection()
+            section_content = DumpsysSection(self.requirements.wants_dumpsys_service)
         elif name == "SYSTEM PROPERTIES":
             section_content = SystemPropertySection()
         elif "VM TRACES" in name:
@@ -116,34 +204,76 @@ class BugreportTxt(LogInterface):
             start_line=start_line,
             end_line=end_line,
             content=section_content,
+            duration=duration,
+            service_durations=service_durations,
         )
 
-        this_year = datetime.now().year
-        current_section.parse(
-            lines,
-            self.metadata.timestamp.year if self.metadata.timestamp else this_year,
-        )
+        if not isinstance(section_content, OtherSection):
+            this_year = datetime.now().year
+            current_section.parse_spans(
+                self.raw_file,
+                lines,
+                self.metadata.timestamp.year if self.metadata.timestamp else this_year,
+            )
         self.sections.append(current_section)
         # print(name, start_line + 1, end_line - 1)
 
+    def _logcat_window(self) -> Optional[Tuple[datetime, datetime]]:
+        """The lines of the logcat sections to parse, None for all of them."""
+        window = self.requirements.logcat_window
+        if window is None or self.error_timestamp is None:
+            return None
+        return self.error_timestamp - window, self.error_timestamp + window
+
     def _mmap_file(self, path: Path) -> mmap.mmap:
         with open(path, "rb") as f:
             return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-    def _read_file(self) -> List[str]:
+    def _decoded_lines(self) -> Iterator[str]:
+        """
+        The lines of the file, decoded one at a time. Lines are split at "\n"
+        only, since `splitlines()` also splits at other characters.
         """
-        Reads the content of the raw file, decodes it using UTF-8, and handles any encoding errors by replacing invalid characters.
+        raw = self.raw_file
+        start = 0
+        while start <= len(raw):
+            end = raw.find(b"\n", start)
+            if end < 0:
+                end = len(raw)
+            yield raw[start:end].decode("utf-8", errors="replace")
+            start = end + 1
 
-        Returns:
-            List[str]: A list of strings where each string represents a line from the file.
+    def _line_offset(self, line_num: int) -> int:
+        """Offset of the start of a line, past the end of the file if there is none"""
+        raw = self.raw_file
+        position = 0
+        for _ in range(line_num):
+            end = raw.find(b"\n", position)
+            if end < 0:
+                return len(raw) + 1
+            position = end + 1
+        return position
 
-        Notes:
-            - The file pointer is reset to the beginning after reading.
-            - Lines are split using the newline character ("\n") instead of `splitlines()` to avoid issues with non-standard linebreak characters.
-        """
-        content = self.raw_file.read().decode("utf-8", errors="replace")
-        self.raw_file.seek(0)  # Reset the file pointer to the beginning
+    def _count_lines(self, start: int, end: int) -> int:
+        """Number of newlines in [start, end) of the file"""
+        return sum(
+            self.raw_file[chunk : min(chunk + COUNT_CHUNK, end)].count(b"\n")
+            for chunk in range(start, end, COUNT_CHUNK)
+        )
 
-        # splitlines() is not used since there are other characters that may cause wrong linebreaks
-        lines = content.split("\n")
-        return lines
+    def _marker_candidates(self, position: int) -> Iterator[Tuple[int, int]]:
+        """
+        Spans of the lines from `position` on which may be section markers,
+        the others cannot be.
+        """
+        raw = self.raw_file
+        found = raw.find(SECTION_MARKER, position)
+        while found >= 0:
+            line_start = raw.rfind(b"\n", position, found)
+            line_start = line_start + 1 if line_start >= 0 else position
+            line_end = raw.find(b"\n", found)
+            if line_end < 0:
+                line_end = len(raw)
+            yield line_start, line_end
+            position = line_end + 1
+            found = raw.find(SECTION_MARKER, position)
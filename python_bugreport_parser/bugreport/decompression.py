@@ -0,0 +1,165 @@
+"""
+Batch decompression of the archives nested inside an unzipped bugreport.
+
+MQS reboot records and scout traces are shipped as zip files inside the
+bugreport zip, and crash-looping devices may carry hundreds of them. They are
+extracted here in one pass on a worker pool, next to the original archives,
+so that path discovery in `bugreport_all` only has to walk directories.
+"""
+
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from python_bugreport_parser.utils import unzip
+
+# Directories (relative to the bugreport root) that contain nested archives
+NESTED_ARCHIVE_DIRS = [
+    Path("FS") / "data" / "miuilog" / "stability" / "reboot",
+    Path("FS") / "data" / "miuilog" / "stability" / "scout" / "app",
+    Path("FS") / "data" / "miuilog" / "stability" / "scout" / "sys",
+    Path("FS") / "data" / "miuilog" / "stability" / "scout" / "watchdog",
+]
+# Written into an extracted directory once extraction has completed
+EXTRACTED_MARKER = ".extracted"
+
+
+@dataclass
+class DecompressionStats:
+    archives: int = 0
+    extracted: int = 0
+    skipped: int = 0
+    failed: int = 0
+    compressed_bytes: int = 0  # size of the archives that were extracted
+    uncompressed_bytes: int = 0  # size of their extracted contents
+    elapsed: float = 0.0  # seconds
+
+    @property
+    def throughput(self) -> float:
+        """Uncompressed megabytes written per second."""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.uncompressed_bytes / self.elapsed / (1024 * 1024)
+
+    def __str__(self):
+        return (
+            f"DecompressionStats(archives={self.archives}, "
+            f"extracted={self.extracted}, skipped={self.skipped}, "
+            f"failed={self.failed}, "
+            f"uncompressed={self.uncompressed_bytes / (1024 * 1024):.1f}MB, "
+            f"elapsed={self.elapsed:.2f}s, "
+            f"throughput={self.throughput:.1f}MB/s)"
+        )
+
+
+def extract_dir_for(zip_file: Path) -> Path:
+    """The directory a nested archive is extracted to, e.g. `foo.zip` -> `foo/`."""
+    return zip_file.with_suffix("")
+
+
+def _archive_signature(zip_file: Path) -> str:
+    stat = zip_file.stat()
+    return f"{stat.st_size} {stat.st_mtime_ns}"
+
+
+def is_extracted(zip_file: Path, extract_dir: Path) -> bool:
+    """
+    Check whether `extract_dir` holds a complete extraction of the current
+    version of `zip_file`.
+    """
+    marker = extract_dir / EXTRACTED_MARKER
+    try:
+        return marker.read_text(encoding="utf-8") == _archive_signature(zip_file)
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
+def extract_archive(zip_file: Path, extract_dir: Path) -> int:
+    """
+    Extract `zip_file` into `extract_dir` without deleting the archive, and
+    mark the directory as current. What `extract_dir` held before, e.g. a
+    partial extraction or that of an older version of the archive, is removed.
+
+    Returns:
+        int: The uncompressed size of the archive in bytes.
+    """
+    if os.path.isdir(extract_dir):
+        shutil.rmtree(extract_dir)
+    size = unzip(zip_file, extract_dir)
+    (extract_dir / EXTRACTED_MARKER).write_text(
+        _archive_signature(zip_file), encoding="utf-8"
+    )
+    return size
+
+
+def is_partial_extraction(path: Path) -> bool:
+    """
+    Check whether `path` is the extraction directory of a sibling archive
+    that is not complete, or not current.
+    """
+    zip_file = path.parent / f"{path.name}.zip"
+    return zip_file.is_file() and not is_extracted(zip_file, path)
+
+
+def find_nested_archives(bugreport_dir: Path) -> List[Path]:
+    """Find all reboot and scout archives inside an unzipped bugreport."""
+    archives = []
+    for archive_dir in NESTED_ARCHIVE_DIRS:
+        archive_dir = bugreport_dir / archive_dir
+        if os.path.isdir(archive_dir):
+            archives.extend(sorted(archive_dir.glob("*.zip")))
+    return archives
+
+
+def _extract_one(zip_file: Path) -> Tuple[Path, Optional[int], Optional[Exception]]:
+    extract_dir = extract_dir_for(zip_file)
+    if is_extracted(zip_file, extract_dir):
+        return zip_file, None, None
+    try:
+        return zip_file, extract_archive(zip_file, extract_dir), None
+    except (zipfile.BadZipFile, OSError) as e:
+        return zip_file, None, e
+
+
+def decompress_nested_archives(
+    bugreport_dir: Path, max_workers: Optional[int] = None
+) -> DecompressionStats:
+    """
+    Extract every nested reboot/scout archive of a bugreport on a thread pool.
+
+    zlib releases the GIL while inflating, so threads are enough to keep all
+    cores busy. The archives are kept, and archives whose extracted directory
+    is already current are skipped, so this is cheap to call repeatedly.
+
+    Args:
+        bugreport_dir (Path): Path to the unzipped bugreport.
+        max_workers (Optional[int]): Size of the worker pool, defaults to the
+            number of CPUs.
+    Returns:
+        DecompressionStats: Counters and throughput of this run.
+    """
+    stats = DecompressionStats()
+    start = time.perf_counter()
+    archives = find_nested_archives(Path(bugreport_dir))
+    stats.archives = len(archives)
+
+    if archives:
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            for zip_file, size, error in pool.map(_extract_one, archives):
+                if error is not None:
+                    print(f"Error processing {zip_file}: {error}")
+                    stats.failed += 1
+                elif size is None:
+                    stats.skipped += 1
+                else:
+                    stats.extracted += 1
+                    stats.compressed_bytes += zip_file.stat().st_size
+                    stats.uncompressed_bytes += size
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
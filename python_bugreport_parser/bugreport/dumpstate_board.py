@@ -4,10 +4,6 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
-import matplotlib.dates as mdates
-import matplotlib.pyplot as plt
-import pandas as pd
-
 THERMAL_LOG_PATTERN = re.compile(
     r"(?P<timestamp>\d{2}-\d{2} \d{2}:\d{2}:\d{2})\[(?P<tag>[^\]]+)\]\[VIRTUAL-SENSOR-FORMULA (?P<temperature>\d+)\] \{\s*(?P<kv_pairs>(\[[^\[\]]+\]\s*)+)\}"
 )
@@ -183,6 +179,10 @@ class DumpstateBoard:
                 self.temperature_log.append(parsed_record)
 
     def draw_temp_graph(self) -> None:
+        # matplotlib takes most of a second to import, only pay for it here
+        import matplotlib.dates as mdates
+        import matplotlib.pyplot as plt
+
         x_data = [
             record.timestamp
             for record in self.temperature_log
@@ -0,0 +1,133 @@
+"""
+Where dumpstate spent its time, from the durations it prints at the end of
+the sections of bugreport.txt and of each dumpsys service.
+
+The durations are read into the section catalog while the sections are
+found, so a profile needs no section to be parsed, see `DataRequirements()`.
+Profiles of many reports add up into a `DumpstateProfileSummary` per device,
+to find the devices whose dumpstate is slow.
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Tuple
+
+if TYPE_CHECKING:
+    from python_bugreport_parser.bugreport.bugreport_txt import BugreportTxt
+
+# (category, words of the section names in it), the first match wins
+SECTION_CATEGORIES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("dumpsys", ("DUMPSYS",)),
+    ("apps", ("APP ACTIVITIES", "APP SERVICES", "APP PROVIDERS")),
+    ("traces", ("TRACES", "TOMBSTONE", "ANR FILES")),
+    ("logs", ("LOG", "KMSG")),
+    ("processes", ("for_each_pid", "PROCESSES", "PROCRANK", "LIBRANK", "SMAPS")),
+    ("board", ("dumpstate_board",)),
+]
+OTHER_CATEGORY = "other"
+
+
+def section_category(name: str) -> str:
+    for category, words in SECTION_CATEGORIES:
+        if any(word in name for word in words):
+            return category
+    return OTHER_CATEGORY
+
+
+def _add(totals: Dict[str, float], name: str, seconds: float) -> None:
+    totals[name] = totals.get(name, 0.0) + seconds
+
+
+def _slowest(totals: Dict[str, float], n: int) -> List[Tuple[str, float]]:
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+@dataclass
+class DumpstateProfile:
+    product: str = ""
+    version: str = ""
+    # Seconds per section name, summed over the sections of the same name
+    sections: Dict[str, float] = field(default_factory=dict)
+    # Seconds per dumpsys service, summed over the DUMPSYS sections
+    services: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def of(cls, bugreport_txt: "BugreportTxt") -> "DumpstateProfile":
+        """
+        The profile of a loaded bugreport.txt. Sections without an ending
+        line have no duration and are left out.
+        """
+        profile = cls(bugreport_txt.metadata.product, bugreport_txt.metadata.version)
+        for section in bugreport_txt.sections:
+            if section.duration is not None:
+                _add(profile.sections, section.name, section.duration)
+            for service, seconds in section.service_durations.items():
+                _add(profile.services, service, seconds)
+        return profile
+
+    @property
+    def total(self) -> float:
+        return sum(self.sections.values())
+
+    def categories(self) -> Dict[str, float]:
+        """Seconds per category of sections, see `SECTION_CATEGORIES`."""
+        totals: Dict[str, float] = {}
+        for name, seconds in self.sections.items():
+            _add(totals, section_category(name), seconds)
+        return totals
+
+    def slowest_sections(self, n: int = 10) -> List[Tuple[str, float]]:
+        return _slowest(self.sections, n)
+
+    def slowest_services(self, n: int = 10) -> List[Tuple[str, float]]:
+        return _slowest(self.services, n)
+
+
+@dataclass
+class DumpstateProfileSummary:
+    """The profiles of several reports, e.g. of the same device."""
+
+    reports: int = 0
+    # Seconds summed over the reports
+    total: float = 0.0
+    categories: Dict[str, float] = field(default_factory=dict)
+    services: Dict[str, float] = field(default_factory=dict)
+    # Total of the slowest report
+    slowest_total: float = 0.0
+
+    def add(self, profile: DumpstateProfile) -> None:
+        self.reports += 1
+        total = profile.total
+        self.total += total
+        self.slowest_total = max(self.slowest_total, total)
+        for category, seconds in profile.categories().items():
+            _add(self.categories, category, seconds)
+        for service, seconds in profile.services.items():
+            _add(self.services, service, seconds)
+
+    @property
+    def mean_total(self) -> float:
+        return self.total / self.reports if self.reports else 0.0
+
+    def mean_categories(self) -> Dict[str, float]:
+        return {name: s / self.reports for name, s in self.categories.items()}
+
+    def slowest_services(self, n: int = 10) -> List[Tuple[str, float]]:
+        """The services with the most seconds per report."""
+        means = {name: s / self.reports for name, s in self.services.items()}
+        return _slowest(means, n)
+
+
+def summarize_profiles(
+    profiles: Iterable[DumpstateProfile],
+    key: Callable[[DumpstateProfile], str] = lambda profile: profile.product,
+) -> Dict[str, DumpstateProfileSummary]:
+    """
+    Add up profiles by `key`, the product by default.
+    :return: The summaries, the slowest first by their mean total.
+    """
+    summaries: Dict[str, DumpstateProfileSummary] = {}
+    for profile in profiles:
+        summaries.setdefault(key(profile), DumpstateProfileSummary()).add(profile)
+    return dict(
+        sorted(summaries.items(), key=lambda item: item[1].mean_total, reverse=True)
+    )
@@ -19,6 +19,8 @@ class DumpsysEntry:
 
     name: str
     data: str
+    # Seconds dumpsys spent on the service, None if it was not printed
+    duration: Optional[float] = None
 
 
 @dataclass
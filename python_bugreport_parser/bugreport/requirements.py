@@ -0,0 +1,147 @@
+"""
+What parts of a bugreport an analysis needs, so that the loader can skip the rest.
+"""
+
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from typing import FrozenSet, Iterable, Optional
+
+# Sections holding ANR traces are named "VM TRACES JUST NOW", "VM TRACES AT
+# LAST ANR", ...
+ANR_TRACES_SECTION = "VM TRACES"
+LOGCAT_SECTIONS = ("SYSTEM LOG", "EVENT LOG")
+
+
+def _union(
+    a: Optional[FrozenSet[str]], b: Optional[FrozenSet[str]]
+) -> Optional[FrozenSet[str]]:
+    if a is None or b is None:
+        return None
+    return a | b
+
+
+def _wider_window(
+    a: Optional[timedelta], b: Optional[timedelta]
+) -> Optional[timedelta]:
+    if a is None or b is None:
+        return None
+    return max(a, b)
+
+
+def _covers(a: Optional[FrozenSet[str]], b: Optional[FrozenSet[str]]) -> bool:
+    if a is None:
+        return True
+    if b is None:
+        return False
+    return b <= a
+
+
+@dataclass(frozen=True)
+class DataRequirements:
+    """
+    The inputs of an analysis. The metadata at the top of bugreport.txt is
+    always parsed.
+
+    `None` stands for "all of them": `sections=None` parses every section,
+    and `dumpsys_services=None` every dumpsys service.
+    """
+
+    # Names of the sections of bugreport.txt, e.g. "EVENT LOG"
+    sections: Optional[FrozenSet[str]] = frozenset()
+    # Names of dumpsys services, e.g. "miui.mqsas.MQSService" or "wifi".
+    # Requiring a service requires the DUMPSYS section, but only that service
+    # is parsed out of it.
+    dumpsys_services: Optional[FrozenSet[str]] = frozenset()
+    dumpstate_board: bool = False
+    # VM TRACES sections, the ANR trace files, and the scout traces
+    anr_traces: bool = False
+    # Only parse the SYSTEM LOG and EVENT LOG lines at most this far from the
+    # error timestamp, None for all of them
+    logcat_window: Optional[timedelta] = None
+
+    @classmethod
+    def of(
+        cls,
+        sections: Iterable[str] = (),
+        dumpsys_services: Iterable[str] = (),
+        dumpstate_board: bool = False,
+        anr_traces: bool = False,
+        logcat_window: Optional[timedelta] = None,
+    ) -> "DataRequirements":
+        return cls(
+            frozenset(sections),
+            frozenset(dumpsys_services),
+            dumpstate_board,
+            anr_traces,
+            logcat_window,
+        )
+
+    @classmethod
+    def everything(cls) -> "DataRequirements":
+        return cls(None, None, True, True)
+
+    def union(self, other: "DataRequirements") -> "DataRequirements":
+        # The window of requirements without a logcat section does not matter
+        if not other.wants_logcat():
+            logcat_window = self.logcat_window
+        elif not self.wants_logcat():
+            logcat_window = other.logcat_window
+        else:
+            logcat_window = _wider_window(self.logcat_window, other.logcat_window)
+        return DataRequirements(
+            _union(self.sections, other.sections),
+            _union(self.dumpsys_services, other.dumpsys_services),
+            self.dumpstate_board or other.dumpstate_board,
+            self.anr_traces or other.anr_traces,
+            logcat_window,
+        )
+
+    def covers(self, other: "DataRequirements") -> bool:
+        """Whether data loaded for these requirements also satisfies `other`."""
+        return (
+            _covers(self.sections, other.sections)
+            and _covers(self.dumpsys_services, other.dumpsys_services)
+            and (self.dumpstate_board or not other.dumpstate_board)
+            and (self.anr_traces or not other.anr_traces)
+            and (
+                not other.wants_logcat()
+                or self.logcat_window is None
+                or (
+                    other.logcat_window is not None
+                    and other.logcat_window <= self.logcat_window
+                )
+            )
+        )
+
+    def with_logcat_window(self, window: Optional[timedelta]) -> "DataRequirements":
+        """
+        The same requirements with the logcat lines limited to `window` around
+        the error timestamp, unless a narrower window is asked for already.
+        """
+        if window is None:
+            return self
+        if self.logcat_window is not None:
+            window = min(window, self.logcat_window)
+        return replace(self, logcat_window=window)
+
+    def wants_logcat(self) -> bool:
+        return self.sections is None or any(
+            name in self.sections for name in LOGCAT_SECTIONS
+        )
+
+    def _all_dumpsys_services(self) -> bool:
+        return (
+            self.sections is None
+            or self.dumpsys_services is None
+            or "DUMPSYS" in self.sections
+        )
+
+    def wants_section(self, name: str) -> bool:
+        if self.sections is None or name in self.sections:
+            return True
+        if name == "DUMPSYS":
+            return self._all_dumpsys_services() or bool(self.dumpsys_services)
+        return self.anr_traces and ANR_TRACES_SECTION in name
+
+    def wants_dumpsys_service(self, name: str) -> bool:
+        return self._all_dumpsys_services() or name in self.dumpsys_services
@@ -2,7 +2,16 @@ import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import (
+    AnyStr,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
 from python_bugreport_parser.bugreport.anr_record import AnrRecord
 from python_bugreport_parser.bugreport.dumpsys_entry import (
@@ -19,12 +28,24 @@ SECTION_BEGIN_NO_CMD = re.compile(r"^------ ([^(]+) ------$")
 LOGCAT_LINE_REGEX = re.compile(
     r"(\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}) +(\w+) +(\d+) +(\d+) ([A-Z]) ([^:]+) *:(.*)"
 )
+LOGCAT_TIMESTAMP_REGEX = re.compile(r"\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}")
+# The same patterns for the undecoded lines of bugreport.txt
+SECTION_END_BYTES = re.compile(SECTION_END.pattern.encode())
+SECTION_BEGIN_BYTES = re.compile(SECTION_BEGIN.pattern.encode())
+SECTION_BEGIN_NO_CMD_BYTES = re.compile(SECTION_BEGIN_NO_CMD.pattern.encode())
+LOGCAT_LINE_BYTES_REGEX = re.compile(LOGCAT_LINE_REGEX.pattern.encode())
+LOGCAT_TIMESTAMP_BYTES_REGEX = re.compile(LOGCAT_TIMESTAMP_REGEX.pattern.encode())
+# Logcat merges several buffers, so a line may be a little older than the
+# lines above it
+LOGCAT_DISORDER = timedelta(seconds=10)
 DUMPSYS_REGEX = re.compile(
-    r"--------- \d\.\d+s was the duration of dumpsys (.*), ending at"
+    r"--------- (\d+\.\d+)s was the duration of dumpsys (.*), ending at"
 )
+DUMPSYS_BYTES_REGEX = re.compile(DUMPSYS_REGEX.pattern.encode())
 DUMPSYS_SECTION_DELIMITER = (
     "-------------------------------------------------------------------------------"
 )
+DUMP_OF_SERVICE = "DUMP OF SERVICE "
 SYSTEM_PROPERTY_REGEX = re.compile(r"\[([^\]]*)\]: \[([^\]]*)\]", re.DOTALL)
 
 
@@ -60,6 +81,32 @@ class LogcatLine:
             message=match.group(7).strip(),
         )
 
+    @classmethod
+    def parse_bytes(cls, line: bytes, year: int) -> Optional["LogcatLine"]:
+        """
+        Same as `parse_line` for an undecoded line. Only the tag and the
+        message are decoded, the other fields are ASCII.
+        """
+        match = LOGCAT_LINE_BYTES_REGEX.match(line)
+        if not match:
+            return None
+
+        time_str = f"{year}-{match.group(1).decode('ascii')}"
+        try:
+            timestamp = datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S.%f")
+        except ValueError:
+            return None
+
+        return cls(
+            timestamp=timestamp,
+            user=match.group(2).decode("ascii"),
+            pid=int(match.group(3)),
+            tid=int(match.group(4)),
+            level=match.group(5).decode("ascii"),
+            tag=match.group(6).decode("utf-8", errors="replace").strip(),
+            message=match.group(7).decode("utf-8", errors="replace").strip(),
+        )
+
     def __str__(self):
         return (
             f"{self.timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')} "
@@ -79,17 +126,177 @@ class SectionContent(ABC):
         """
         pass
 
+    def parse_bytes(self, lines: List[bytes], year: int) -> None:
+        """
+        Parse sections from the undecoded lines of bugreport.txt. Contents
+        that can skip or only partly decode lines override this.
+        """
+        self.parse([l.decode("utf-8", errors="replace") for l in lines], year)
+
+    def parse_spans(self, raw: bytes, spans: List[Tuple[int, int]], year: int) -> None:
+        """
+        Parse sections from spans of the lines of bugreport.txt, see
+        `split_spans`. Contents that only need part of the lines override this.
+        """
+        self.parse_bytes(split_spans(raw, spans), year)
+
+
+def split_spans(raw: bytes, spans: List[Tuple[int, int]]) -> List[bytes]:
+    """
+    :param raw: The file, or its mmap.
+    :param spans: [start, end) offsets of runs of lines in `raw`, without
+        their last newline.
+    """
+    lines = []
+    for start, end in spans:
+        lines.extend(raw[start:end].split(b"\n"))
+    return lines
+
+
+def _timestamp_prefix(timestamp: datetime) -> str:
+    """The timestamp as logcat prints it, which sorts like the timestamps"""
+    return timestamp.strftime("%m-%d %H:%M:%S.%f")[:-3]
+
+
+def _first_line_at_or_after(lines: List[AnyStr], prefix: str, low: int = 0) -> int:
+    """
+    Binary search for the first line whose timestamp, or the timestamp of
+    the next logcat line below it, is at or after `prefix`. The timestamps
+    are compared as text, without parsing the lines.
+    """
+    timestamp_regex = LOGCAT_TIMESTAMP_REGEX
+    if lines and isinstance(lines[0], bytes):
+        timestamp_regex = LOGCAT_TIMESTAMP_BYTES_REGEX
+        prefix = prefix.encode()
+    high = len(lines)
+    while low < high:
+        middle = (low + high) // 2
+        probe = middle
+        while probe < high and not timestamp_regex.match(lines[probe]):
+            probe += 1
+        if probe < high and lines[probe][:18] < prefix:
+            low = probe + 1
+        else:
+            high = middle
+    return low
+
+
+def _first_offset_at_or_after(raw: bytes, prefix: bytes, low: int, high: int) -> int:
+    """
+    `_first_line_at_or_after` on the lines of the span [low, high) of `raw`,
+    which starts at a line. Returns the offset of the line, `high` if none.
+    """
+    while low < high:
+        middle = raw.rfind(b"\n", low, (low + high) // 2) + 1 or low
+        probe = middle
+        while probe < high and not LOGCAT_TIMESTAMP_BYTES_REGEX.match(
+            raw, probe, high
+        ):
+            probe = raw.find(b"\n", probe, high) + 1 or high
+        if probe < high and raw[probe : probe + 18] < prefix:
+            low = raw.find(b"\n", probe, high) + 1 or high
+        else:
+            high = middle
+    return low
+
 
 class LogcatSection(SectionContent):
-    def __init__(self):
+    def __init__(self, window: Optional[Tuple[datetime, datetime]] = None):
+        """
+        :param window: Only parse the lines of [start, end], both included,
+            None for all of them.
+        """
         self.entries: List[LogcatLine] = []
+        self.window = window
 
     def __len__(self) -> int:
         return len(self.entries)
 
     def parse(self, lines: List[str], year: int) -> None:
-        parsed = [LogcatLine.parse_line(l, year) for l in lines]
-        self.entries.extend([p for p in parsed if p is not None])
+        self.entries.extend(self._parse(lines, year, LogcatLine.parse_line))
+
+    def parse_bytes(self, lines: List[bytes], year: int) -> None:
+        self.entries.extend(self._parse(lines, year, LogcatLine.parse_bytes))
+
+    def parse_spans(self, raw: bytes, spans: List[Tuple[int, int]], year: int) -> None:
+        """With a window, only the bytes of the lines in it are split and parsed"""
+        if self.window is None:
+            super().parse_spans(raw, spans, year)
+            return
+        start, end = self.window
+        low_prefix = _timestamp_prefix(start - LOGCAT_DISORDER).encode()
+        high_prefix = _timestamp_prefix(end + LOGCAT_DISORDER).encode()
+        window_spans = []
+        for span_start, span_end in spans:
+            low = _first_offset_at_or_after(raw, low_prefix, span_start, span_end)
+            high = _first_offset_at_or_after(raw, high_prefix, low, span_end)
+            if low < high:
+                # Without the newline ending the last line of the window
+                window_spans.append((low, high - 1 if high < span_end else high))
+        self.entries.extend(
+            self._filter_window(
+                split_spans(raw, window_spans),
+                lambda: split_spans(raw, spans),
+                year,
+                LogcatLine.parse_bytes,
+            )
+        )
+
+    def _parse(
+        self,
+        lines: List[AnyStr],
+        year: int,
+        parse_line: Callable[[AnyStr, int], Optional[LogcatLine]],
+    ) -> List[LogcatLine]:
+        if self.window is not None:
+            return self._parse_window(lines, year, parse_line)
+        parsed = [parse_line(l, year) for l in lines]
+        return [p for p in parsed if p is not None]
+
+    def _parse_window(
+        self,
+        lines: List[AnyStr],
+        year: int,
+        parse_line: Callable[[AnyStr, int], Optional[LogcatLine]],
+    ) -> List[LogcatLine]:
+        """
+        Find the lines of the window by binary search, widened by
+        `LOGCAT_DISORDER`, and only parse these. Lines further out of order
+        within the window make it parse all the lines instead.
+        """
+        start, end = self.window
+        low = _first_line_at_or_after(
+            lines, _timestamp_prefix(start - LOGCAT_DISORDER)
+        )
+        high = _first_line_at_or_after(
+            lines, _timestamp_prefix(end + LOGCAT_DISORDER), low
+        )
+        return self._filter_window(lines[low:high], lambda: lines, year, parse_line)
+
+    def _filter_window(
+        self,
+        window_lines: List[AnyStr],
+        all_lines: Callable[[], List[AnyStr]],
+        year: int,
+        parse_line: Callable[[AnyStr, int], Optional[LogcatLine]],
+    ) -> List[LogcatLine]:
+        """
+        Parse the lines found for the window, falling back to `all_lines()`
+        if they are too far out of order, and keep the ones in the window.
+        """
+        start, end = self.window
+        parsed = [parse_line(l, year) for l in window_lines]
+        parsed = [p for p in parsed if p is not None]
+        latest = None
+        for line in parsed:
+            if latest is not None and line.timestamp < latest - LOGCAT_DISORDER:
+                print("Logcat lines out of order, parsing all of them")
+                parsed = [parse_line(l, year) for l in all_lines()]
+                parsed = [p for p in parsed if p is not None]
+                break
+            if latest is None or line.timestamp > latest:
+                latest = line.timestamp
+        return [p for p in parsed if start <= p.timestamp <= end]
 
     def get_line(self, index: int) -> Optional[LogcatLine]:
         try:
@@ -117,13 +324,48 @@ class LogcatSection(SectionContent):
 class DumpsysSection(SectionContent):
     """Container for parsing and storing dumpsys entries from bugreports"""
 
-    def __init__(self):
+    def __init__(self, wants_service: Optional[Callable[[str], bool]] = None):
+        """
+        :param wants_service: Only the services it returns True for are parsed,
+            all of them by default.
+        """
         self.entries: List[DumpsysEntry] = []
+        self.wants_service = wants_service
 
-    def parse(self, lines: List[str], year: int) -> None:
+    def parse_bytes(self, lines: List[bytes], year: int) -> None:
+        self.parse(self._wanted_lines(lines), year)
+
+    def _wanted_lines(self, lines: Iterable[bytes]) -> Iterator[str]:
+        """
+        Decode the lines, except the data of the services that are not
+        wanted, which `parse` skips anyway. Their "DUMP OF SERVICE" lines and
+        delimiters are kept for `parse` to skip.
+        """
+        dump_of_service = DUMP_OF_SERVICE.encode()
+        delimiter = DUMPSYS_SECTION_DELIMITER.encode()
+        skipping = False
+        for line in lines:
+            if skipping:
+                if line != delimiter:
+                    continue
+                skipping = False
+            elif self.wants_service is not None and line.startswith(dump_of_service):
+                service = line[len(dump_of_service) :].decode(
+                    "utf-8", errors="replace"
+                )
+                skipping = not self.wants_service(service.rstrip(":"))
+            yield line.decode("utf-8", errors="replace")
+
+    def parse(self, lines: Iterable[str], year: int) -> None:
         temp = ""
         name = ""
+        duration = None
+        skipping = False
         for line in lines:
+            if skipping:
+                # Skip the data of an unwanted service up to its delimiter
+                skipping = line != DUMPSYS_SECTION_DELIMITER
+                continue
             if line == DUMPSYS_SECTION_DELIMITER:
                 # When we find a delimiter line, save accumulated data
                 if name == "":
@@ -132,16 +374,24 @@ class DumpsysSection(SectionContent):
                 if name == "miui.mqsas.MQSService":
                     entry = MqsServiceDumpsysEntry.parse_line(name, temp.strip())
                 else:
-                    entry = DumpsysEntry(name=match.group(1).strip(), data=temp.strip())
+                    entry = DumpsysEntry(name=name, data=temp.strip())
+                entry.duration = duration
                 self.entries.append(entry)
                 temp = ""
                 name = ""
+                duration = None
             elif match := DUMPSYS_REGEX.match(line):
-                name = match.group(1).strip()
-            elif line.startswith("DUMP OF SERVICE "):
-                # We don't need this line, and we get the service name in the previous branch
-                # So just skip it
-                pass
+                duration = float(match.group(1))
+                name = match.group(2).strip()
+            elif line.startswith(DUMP_OF_SERVICE):
+                # We get the service name in the previous branch, this line is
+                # only used to skip the services that are not wanted
+                service = line[len(DUMP_OF_SERVICE) :].rstrip(":")
+                if self.wants_service is not None and not self.wants_service(service):
+                    skipping = True
+                    temp = ""
+                    name = ""
+                    duration = None
             else:
                 # Accumulate lines between headers
                 temp += line + "\n"
@@ -169,19 +419,42 @@ class OtherSection(SectionContent):
     def parse(self, lines, year):
         pass
 
+    def parse_bytes(self, lines, year):
+        pass
+
 
 class Section:
     def __init__(
-        self, name: str, start_line: int, end_line: int, content: SectionContent
+        self,
+        name: str,
+        start_line: int,
+        end_line: int,
+        content: SectionContent,
+        duration: Optional[float] = None,
+        service_durations: Optional[Dict[str, float]] = None,
     ):
+        """
+        :param duration: Seconds dumpstate spent on the section, None for
+            sections without an ending line.
+        :param service_durations: Seconds spent on each dumpsys service of
+            the section, read even if the section is not parsed.
+        """
         self.name = name
         self.start_line = start_line
         self.end_line = end_line
         self.content = content
+        self.duration = duration
+        self.service_durations: Dict[str, float] = service_durations or {}
 
     def parse(self, lines: List[str], year: int) -> None:
         self.content.parse(lines, year)
 
+    def parse_bytes(self, lines: List[bytes], year: int) -> None:
+        self.content.parse_bytes(lines, year)
+
+    def parse_spans(self, raw: bytes, spans: List[Tuple[int, int]], year: int) -> None:
+        self.content.parse_spans(raw, spans, year)
+
     def get_line_numbers(self) -> int:
         return self.end_line - self.start_line + 1
 
@@ -0,0 +1,218 @@
+"""
+One stream of the timestamped things of a report: the SYSTEM LOG and EVENT
+LOG lines, the MQS boot records, the ANR trace dumps and the thermal samples.
+
+Each source is in time order, give or take `LOGCAT_DISORDER`, so the timeline
+is a lazy k-way merge of the sources, see `heapq.merge`. Nothing is copied
+into a combined list, and a window around a time starts each source with a
+binary search.
+"""
+
+import heapq
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from python_bugreport_parser.bugreport.section import LOGCAT_DISORDER
+
+if TYPE_CHECKING:
+    from python_bugreport_parser.bugreport.bugreport_all import Bugreport
+
+SYSTEM_LOG = "SYSTEM LOG"
+EVENT_LOG = "EVENT LOG"
+REBOOT_RECORDS = "reboot records"
+ANR_DUMPS = "anr dumps"
+THERMAL = "thermal"
+
+
+@dataclass(frozen=True)
+class TimelineEvent:
+    timestamp: datetime
+    # Name of the source, e.g. `SYSTEM_LOG`
+    source: str
+    # The record of the source, e.g. a `LogcatLine`
+    record: Any
+
+
+def _timestamp(record) -> datetime:
+    return record.timestamp
+
+
+def _first_at_or_after(
+    records: Sequence, key: Callable[[Any], datetime], timestamp: datetime
+) -> int:
+    low, high = 0, len(records)
+    while low < high:
+        middle = (low + high) // 2
+        if key(records[middle]) < timestamp:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _pop_event(pending: List[Tuple[datetime, int, Any]], name: str) -> TimelineEvent:
+    timestamp, _, record = heapq.heappop(pending)
+    return TimelineEvent(timestamp, name, record)
+
+
+class Timeline:
+    """
+    Time-ordered sources, merged on iteration. Events with the same timestamp
+    come in the order their sources were added in.
+    """
+
+    def __init__(self):
+        # Name -> (records or a function loading them, key)
+        self._sources: Dict[
+            str,
+            Tuple[Union[Sequence, Callable[[], Sequence]], Callable[[Any], datetime]],
+        ] = {}
+
+    @property
+    def sources(self) -> List[str]:
+        return list(self._sources)
+
+    def add_source(
+        self,
+        name: str,
+        records: Union[Sequence, Callable[[], Sequence]],
+        key: Callable[[Any], datetime] = _timestamp,
+    ) -> None:
+        """
+        :param records: The records in time order, give or take
+            `LOGCAT_DISORDER`, or a function returning them, which is only
+            called once the source is iterated. This keeps the components of a
+            report that are not looked at unloaded.
+        :param key: Timestamp of a record, its `timestamp` attribute by default.
+        """
+        self._sources[name] = (records, key)
+
+    def _records(self, name: str) -> Sequence:
+        records, key = self._sources[name]
+        if callable(records):
+            records = records()
+            self._sources[name] = (records, key)
+        return records
+
+    def _iter_source(
+        self, name: str, start: Optional[datetime], end: Optional[datetime]
+    ) -> Iterator[TimelineEvent]:
+        """
+        The records of [start, end] in time order. Logcat lines may be up to
+        `LOGCAT_DISORDER` older than the lines before them, so the search is
+        widened by that much and the records are reordered on the way.
+        """
+        records = self._records(name)
+        key = self._sources[name][1]
+        index = 0
+        if start is not None:
+            index = _first_at_or_after(records, key, start - LOGCAT_DISORDER)
+        # (timestamp, index, record) of the records that may still be
+        # preceded by a later one
+        pending: List[Tuple[datetime, int, Any]] = []
+        for i in range(index, len(records)):
+            record = records[i]
+            timestamp = key(record)
+            if end is not None and timestamp > end + LOGCAT_DISORDER:
+                break
+            if (start is None or timestamp >= start) and (
+                end is None or timestamp <= end
+            ):
+                heapq.heappush(pending, (timestamp, i, record))
+            # No later record can be older than these anymore
+            while pending and pending[0][0] < timestamp - LOGCAT_DISORDER:
+                yield _pop_event(pending, name)
+        while pending:
+            yield _pop_event(pending, name)
+
+    def events(
+        self,
+        sources: Optional[Iterable[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Iterator[TimelineEvent]:
+        """
+        The events of [start, end], both included, in time order.
+        :param sources: Names of the sources to merge, all of them by default.
+        """
+        names = self.sources if sources is None else [
+            name for name in self._sources if name in set(sources)
+        ]
+        return heapq.merge(
+            *(self._iter_source(name, start, end) for name in names),
+            key=_timestamp,
+        )
+
+    def around(
+        self,
+        timestamp: datetime,
+        before: timedelta,
+        after: Optional[timedelta] = None,
+        sources: Optional[Iterable[str]] = None,
+    ) -> Iterator[TimelineEvent]:
+        """
+        The events from `before` before `timestamp`, e.g. the error timestamp
+        of the report, to `after` after it, the same as `before` by default.
+        """
+        after = before if after is None else after
+        return self.events(sources, timestamp - before, timestamp + after)
+
+    @classmethod
+    def of_bugreport(cls, bugreport: "Bugreport") -> "Timeline":
+        """
+        The timeline of the logs and records of a report. A source only
+        loads its component of the report once it is iterated.
+        """
+        timeline = cls()
+        bugreport_txt = bugreport.bugreport_txt
+        sections = bugreport_txt.sections if bugreport_txt is not None else []
+        for name in (SYSTEM_LOG, EVENT_LOG):
+            section = next((s for s in sections if s.name == name), None)
+            entries = getattr(section.content, "entries", None) if section else None
+            if entries is not None:
+                timeline.add_source(name, entries)
+
+        def reboot_records() -> List:
+            dumpsys = next((s for s in sections if s.name == "DUMPSYS"), None)
+            entries = getattr(dumpsys.content, "entries", []) if dumpsys else []
+            mqs = next((e for e in entries if e.name == "miui.mqsas.MQSService"), None)
+            records = getattr(mqs, "boot_records", [])
+            return sorted(records, key=_timestamp)
+
+        def anr_dumps() -> List:
+            dumps = [p for r in bugreport.anr_records or [] for p in r.traces]
+            return sorted(dumps, key=_naive_timestamp)
+
+        # Thermal samples are logged without the year
+        report_time = bugreport_txt.metadata.timestamp if bugreport_txt else None
+        year = (report_time or datetime.now()).year
+
+        def thermal_samples() -> List:
+            board = bugreport.dumpstate_board
+            samples = board.temperature_log if board is not None else []
+            return sorted(samples, key=lambda s: s.timestamp.replace(year=year))
+
+        timeline.add_source(REBOOT_RECORDS, reboot_records)
+        timeline.add_source(ANR_DUMPS, anr_dumps, _naive_timestamp)
+        timeline.add_source(
+            THERMAL, thermal_samples, lambda s: s.timestamp.replace(year=year)
+        )
+        return timeline
+
+
+def _naive_timestamp(record) -> datetime:
+    """ANR dumps are timestamped with the timezone, the logs are not"""
+    return record.timestamp.replace(tzinfo=None)
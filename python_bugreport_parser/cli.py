@@ -1,19 +1,55 @@
 import argparse
-from dataclasses import dataclass
+import sys
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import List, Optional
 
 
 @dataclass
 class CliArgs:
     """Data class for storing CLI arguments"""
 
-    file_name: str  # 必填的位置参数
-    mode: str
+    command: str
+    file_name: str = ""  # 必填的位置参数
+    mode: str = "a"
+    output_format: str = "text"
+    logcat_window: Optional[float] = None
+    # Arguments of the batch subcommand
+    inputs: List[str] = field(default_factory=list)
+    workers: Optional[int] = None
+    output: str = "-"
+    output_dir: Optional[str] = None
+    extraction_cache: Optional[str] = None
+    result_cache: Optional[str] = None
+    plugins: Optional[List[str]] = None
+    plugin_timeout: Optional[float] = None
+    max_tasks_per_child: Optional[int] = None
+    verbose: bool = False
 
 
-def parse_cli() -> CliArgs:
-    parser = argparse.ArgumentParser(description="处理文件的CLI工具")
-    parser.add_argument("file_name", type=str, help="File name")
+def add_logcat_window_argument(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
+        "--logcat-window",
+        type=float,
+        default=None,
+        help="Only parse the logcat lines this many seconds around the error time",
+    )
+
+
+def logcat_window(cli_args: CliArgs) -> Optional[timedelta]:
+    if cli_args.logcat_window is None:
+        return None
+    return timedelta(seconds=cli_args.logcat_window)
+
+
+def parse_cli(argv: Optional[List[str]] = None) -> CliArgs:
+    parser = argparse.ArgumentParser(description="处理文件的CLI工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    analyze = subparsers.add_parser("analyze", help="Analyze a single file")
+    analyze.add_argument("file_name", type=str, help="File name")
+    analyze.add_argument(
         "-m",
         "--mode",
         type=str,
@@ -21,9 +57,160 @@ def parse_cli() -> CliArgs:
         default="a",
         help="处理模式，可选值：a 或 b，默认为 a",
     )
-    args = parser.parse_args()
+    analyze.add_argument(
+        "-f",
+        "--format",
+        dest="output_format",
+        choices=["text", "jsonl", "binary"],
+        default="text",
+        help="Format the results are streamed out in as each plugin finishes",
+    )
+    analyze.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default="-",
+        help="File the results are written to, '-' for stdout",
+    )
+    analyze.add_argument(
+        "-p",
+        "--plugin",
+        dest="plugins",
+        action="append",
+        default=None,
+        help="Only run this plugin and its dependencies, can be repeated",
+    )
+    add_logcat_window_argument(analyze)
+
+    batch = subparsers.add_parser(
+        "batch", help="Analyze many feedback directories or 284 log zips in parallel"
+    )
+    batch.add_argument(
+        "inputs", nargs="+", help="Feedback directories, zips, or glob patterns"
+    )
+    batch.add_argument(
+        "-j", "--workers", type=int, default=None, help="Number of worker processes"
+    )
+    batch.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default="-",
+        help="JSON Lines file the results are appended to, '-' for stdout",
+    )
+    batch.add_argument(
+        "--output-dir",
+        type=str,
+        default=None,
+        help="Write one text report per input into this directory instead",
+    )
+    batch.add_argument(
+        "--extraction-cache",
+        type=str,
+        default=None,
+        help="Resolve zips through the extraction cache at this path",
+    )
+    batch.add_argument(
+        "--result-cache",
+        type=str,
+        default=None,
+        help="Reuse plugin results cached at this path from previous runs",
+    )
+    batch.add_argument(
+        "-p",
+        "--plugin",
+        dest="plugins",
+        action="append",
+        default=None,
+        help="Only run this plugin and its dependencies, can be repeated",
+    )
+    batch.add_argument(
+        "--plugin-timeout",
+        type=float,
+        default=None,
+        help="Seconds each plugin may take on a report, its dependents are skipped",
+    )
+    batch.add_argument(
+        "--max-tasks-per-child",
+        type=int,
+        default=None,
+        help="Recycle worker processes after this many reports",
+    )
+    add_logcat_window_argument(batch)
+    batch.add_argument(
+        "-v", "--verbose", action="store_true", help="Keep the output of the workers"
+    )
+
+    args = parser.parse_args(argv)
     return CliArgs(**vars(args))  # 将命名空间转换为数据类对象
 
 
+def run_analyze(cli_args: CliArgs) -> None:
+    from pathlib import Path
+
+    from python_bugreport_parser.bugreport.bugreport_all import Log284
+    from python_bugreport_parser.plugins import BugreportAnalysisContext, PluginRepo
+    from python_bugreport_parser.plugins.output import open_writer
+
+    source = Path(cli_args.file_name)
+    writer = open_writer(cli_args.output_format, cli_args.output)
+    try:
+        # The parser prints its progress, keep stdout for the results
+        with redirect_stdout(sys.stderr):
+            if source.suffix == ".zip":
+                log284 = Log284.from_zip(source, source.with_suffix(""))
+            else:
+                log284 = Log284.from_dir(source)
+            if log284 is None:
+                sys.exit(f"Invalid bugreport directories in {source}")
+
+            context = BugreportAnalysisContext()
+            context.bugreport = log284
+            schedule = PluginRepo().run_all(
+                context,
+                names=cli_args.plugins,
+                mode="thread",
+                writer=writer,
+                logcat_window=logcat_window(cli_args),
+            )
+            print(schedule)
+    finally:
+        writer.close()
+
+
+def run_batch(cli_args: CliArgs) -> None:
+    from python_bugreport_parser.batch import (
+        BatchRunner,
+        DirectorySink,
+        JsonLinesSink,
+        expand_inputs,
+    )
+
+    sources = expand_inputs(cli_args.inputs)
+    if cli_args.output_dir:
+        sink = DirectorySink(cli_args.output_dir)
+    else:
+        sink = JsonLinesSink.open(cli_args.output)
+    runner = BatchRunner(
+        max_workers=cli_args.workers,
+        extraction_cache_root=cli_args.extraction_cache,
+        result_cache_root=cli_args.result_cache,
+        plugin_names=cli_args.plugins,
+        plugin_timeout=cli_args.plugin_timeout,
+        max_tasks_per_child=cli_args.max_tasks_per_child,
+        logcat_window=logcat_window(cli_args),
+        quiet=not cli_args.verbose,
+    )
+    try:
+        stats = runner.run(sources, sink)
+    finally:
+        sink.close()
+    print(stats, file=sys.stderr)
+
+
 if __name__ == "__main__":
     cli_args = parse_cli()
+    if cli_args.command == "batch":
+        run_batch(cli_args)
+    elif cli_args.command == "analyze":
+        run_analyze(cli_args)
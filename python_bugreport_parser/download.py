@@ -3,6 +3,7 @@ from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 import os
 
 from python_bugreport_parser.bugreport.bugreport_all import Log284
+from python_bugreport_parser.extraction_cache import ExtractionCache
 
 
 def download_log(url):
@@ -45,8 +46,8 @@ def download_log(url):
         return file_name
 
 
-def download_one_file(feedback_id, user_feedback_path):
+def download_one_file(feedback_id, user_feedback_path, cache: ExtractionCache = None):
     zip_file = download_log(
         f"https://feedback.pt.xiaomi.com/feedback/logDownloadBox?feedbackId={feedback_id}"
     )
-    return Log284.from_zip(zip_file, user_feedback_path)
+    return Log284.from_zip(zip_file, user_feedback_path, cache=cache)
@@ -0,0 +1,281 @@
+"""
+A content-addressed store of extracted log archives.
+
+Every archive is extracted once into `<root>/objects/<sha256 of the archive>`,
+so re-analysing a feedback never needs the archive to be downloaded again and
+two analyses of the same archive share one read-only tree.
+
+Layout of the cache root:
+    objects/<hash>/       the extracted tree
+    objects/<hash>.meta   JSON with the tree size; its mtime is the LRU clock
+    locks/<hash>.lock     per-entry file lock
+    tmp/                  staging area for extractions and deletions
+    evict.lock            serializes eviction across processes
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from python_bugreport_parser.utils import unzip
+
+DEFAULT_MAX_BYTES = 50 * 1024**3
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class FileLock:
+    """
+    An advisory lock on a file, shared between processes via flock(2).
+    On platforms without fcntl the lock is a no-op.
+    """
+
+    def __init__(self, path: Path, shared: bool = False):
+        self.path = path
+        self.shared = shared
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        self._file = open(self.path, "a+b")
+        if fcntl is None:
+            return True
+        flags = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self._file.fileno(), flags)
+            return True
+        except BlockingIOError:
+            self._file.close()
+            self._file = None
+            return False
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.release()
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    path: Path
+    size: int
+    last_used: float
+
+
+def hash_archive(zip_path: Path) -> str:
+    """The sha256 of an archive, which is the key of its extracted tree."""
+    digest = hashlib.sha256()
+    with open(zip_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _tree_size(path: Path) -> int:
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            size += os.lstat(os.path.join(dirpath, filename)).st_size
+    return size
+
+
+class ExtractionCache:
+    """
+    Extract archives into a content-addressed, LRU-evicted directory store.
+
+    Extraction happens in a staging directory that is renamed into place, so
+    readers never see a partial tree. A per-entry file lock makes concurrent
+    extraction of the same archive (from threads or processes) happen once.
+    Trees that are being read through `open` or `pin` hold a shared lock and
+    are never evicted; trees returned by `extract` may be evicted once they
+    become the least recently used and the store is over its disk budget.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param root: Directory of the cache, created if missing.
+        :param max_bytes: Disk budget for the extracted trees.
+        """
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.objects_dir = self.root / "objects"
+        self.locks_dir = self.root / "locks"
+        self.tmp_dir = self.root / "tmp"
+        for directory in (self.objects_dir, self.locks_dir, self.tmp_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def _tree_path(self, key: str) -> Path:
+        return self.objects_dir / key
+
+    def _meta_path(self, key: str) -> Path:
+        return self.objects_dir / f"{key}.meta"
+
+    def _lock(self, key: str, shared: bool = False) -> FileLock:
+        return FileLock(self.locks_dir / f"{key}.lock", shared=shared)
+
+    def lookup(self, zip_path: Path) -> Optional[Path]:
+        """Return the extracted tree of an archive if it is cached."""
+        key = hash_archive(zip_path)
+        if self._meta_path(key).exists():
+            self._touch(key)
+            return self._tree_path(key)
+        return None
+
+    def extract(
+        self, zip_path: Path, prepare: Optional[Callable[[Path], None]] = None
+    ) -> Path:
+        """
+        Return the extracted tree of an archive, extracting it on a miss.
+
+        :param zip_path: The archive to extract.
+        :param prepare: Called on the staged tree before it is published, e.g.
+            to decompress nested archives, so the published tree is complete.
+        :return: Path to the extracted tree.
+        """
+        key = hash_archive(zip_path)
+        with self._lock(key):
+            if self._meta_path(key).exists():
+                self._touch(key)
+                return self._tree_path(key)
+
+            staging = Path(tempfile.mkdtemp(prefix=f"{key}.", dir=self.tmp_dir))
+            try:
+                unzip(zip_path, staging)
+                if prepare is not None:
+                    prepare(staging)
+                size = _tree_size(staging)
+                if self._tree_path(key).exists():
+                    # Left without its meta by a crash, never published
+                    self._discard_tree(key)
+                os.rename(staging, self._tree_path(key))
+            except (zipfile.BadZipFile, OSError):
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+            self._write_meta(key, {"archive": Path(zip_path).name, "size": size})
+            print(f"Extracted {zip_path} to {self._tree_path(key)} ({size} bytes)")
+
+        self.evict(keep=key)
+        return self._tree_path(key)
+
+    def pin(
+        self, zip_path: Path, prepare: Optional[Callable[[Path], None]] = None
+    ) -> Tuple[Path, FileLock]:
+        """
+        Like `extract`, but pin the tree against eviction until the returned
+        lock is released.
+        """
+        while True:
+            path = self.extract(zip_path, prepare)
+            lock = self._lock(path.name, shared=True)
+            lock.acquire()
+            # Eviction may have removed the tree between `extract` releasing
+            # its lock and this one, then extract it again
+            if self._meta_path(path.name).exists():
+                return path, lock
+            lock.release()
+
+    @contextmanager
+    def open(
+        self, zip_path: Path, prepare: Optional[Callable[[Path], None]] = None
+    ) -> Iterator[Path]:
+        """Like `extract`, but pin the tree against eviction while in use."""
+        path, lock = self.pin(zip_path, prepare)
+        try:
+            yield path
+        finally:
+            lock.release()
+
+    def entries(self) -> List[CacheEntry]:
+        """All cached trees, least recently used first."""
+        result = []
+        for meta_path in self.objects_dir.glob("*.meta"):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    size = json.load(f)["size"]
+                last_used = meta_path.stat().st_mtime
+            except (OSError, ValueError, KeyError):
+                continue
+            key = meta_path.stem
+            result.append(CacheEntry(key, self._tree_path(key), size, last_used))
+        return sorted(result, key=lambda entry: entry.last_used)
+
+    def total_size(self) -> int:
+        return sum(entry.size for entry in self.entries())
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Remove least recently used trees until the store fits its budget.
+        Trees that are locked by a reader or an extraction are skipped.
+
+        :param keep: Key that must not be evicted, e.g. the one just extracted.
+        :return: Keys of the evicted trees.
+        """
+        evicted = []
+        with FileLock(self.root / "evict.lock"):
+            entries = self.entries()
+            total = sum(entry.size for entry in entries)
+            for entry in entries:
+                if total <= self.max_bytes:
+                    break
+                if entry.key == keep:
+                    continue
+                lock = self._lock(entry.key)
+                if not lock.acquire(blocking=False):
+                    continue
+                try:
+                    self._remove(entry.key)
+                finally:
+                    lock.release()
+                total -= entry.size
+                evicted.append(entry.key)
+        if evicted:
+            print(f"Evicted {len(evicted)} extracted trees from {self.root}")
+        return evicted
+
+    def _write_meta(self, key: str, meta: dict) -> None:
+        """Publish a tree, atomically so that a crash leaves no partial meta"""
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f"{key}.", suffix=".meta", dir=self.tmp_dir
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(key))
+
+    def _remove(self, key: str) -> None:
+        # Unpublish first, then delete the tree out of sight of readers
+        os.remove(self._meta_path(key))
+        self._discard_tree(key)
+
+    def _discard_tree(self, key: str) -> None:
+        graveyard = Path(tempfile.mkdtemp(prefix=f"{key}.", dir=self.tmp_dir))
+        os.rename(self._tree_path(key), graveyard / key)
+        shutil.rmtree(graveyard, ignore_errors=True)
+
+    def _touch(self, key: str) -> None:
+        try:
+            os.utime(self._meta_path(key))
+        except FileNotFoundError:
+            pass
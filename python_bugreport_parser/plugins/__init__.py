@@ -1,16 +1,26 @@
-import importlib
-import inspect
 import logging
 import threading
 from abc import ABC, abstractmethod
-from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-from python_bugreport_parser.bugreport.bugreport_all import Bugreport, Log284
-from python_bugreport_parser.bugreport.bugreport_txt import BugreportTxt
+from concurrent.futures import Executor
+from datetime import timedelta
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+from python_bugreport_parser.plugins.budget import PluginBudgets
+from python_bugreport_parser.plugins.instrumentation import PluginRunStats, summarize
+from python_bugreport_parser.plugins.interval_index import IntervalIndex
+from python_bugreport_parser.plugins.manifest import PLUGIN_MANIFEST, PluginSpec
+from python_bugreport_parser.plugins.output import ResultWriter, render_text
+from python_bugreport_parser.plugins.result_cache import PluginResultCache
+from python_bugreport_parser.plugins.scheduler import DagScheduler, ScheduleReport
+
+# The bugreport package and asyncio are imported where they are used, so that
+# importing the plugins stays cheap
+if TYPE_CHECKING:
+    from python_bugreport_parser.bugreport.bugreport_all import Log284
+    from python_bugreport_parser.bugreport.requirements import DataRequirements
 
 logger = logging.getLogger(__name__)
-plugin_dir = Path(__file__).parent
 
 
 class PluginResult:
@@ -33,22 +43,79 @@ class PluginResult:
 
 class BugreportAnalysisContext:
     def __init__(self):
-        self.bugreport: Log284 = None
+        self.bugreport: "Log284" = None
 
         # The analysis, not only the reports strings
         self.results: Dict[PluginResult] = {}
 
+        # How long each plugin took, see `PluginRepo.run_all`
+        self.plugin_stats: Dict[str, PluginRunStats] = {}
+
+        # Result cache key of each plugin, when running with a result cache
+        self.result_keys: Dict[str, str] = {}
+
+        # Fingerprint each result was computed with, to only recompute the
+        # results that are out of date when running again
+        self.result_fingerprints: Dict[str, str] = {}
+
+        # Plugins that ran out of their time budget, with the budget, and the
+        # plugins skipped because of them, with the plugin that timed out
+        self.timed_out: Dict[str, float] = {}
+        self.skipped: Dict[str, str] = {}
+
+        # Time indexes shared by the plugins, see `time_index`
+        self.indexes: Dict[str, IntervalIndex] = {}
+
     def set_result(self, plugin_name: str, result: PluginResult):
         self.results[plugin_name] = result
+        self.indexes.pop(plugin_name, None)
+
+    def remove_result(self, plugin_name: str) -> None:
+        self.results.pop(plugin_name, None)
+        self.indexes.pop(plugin_name, None)
+        self.result_fingerprints.pop(plugin_name, None)
+        self.plugin_stats.pop(plugin_name, None)
 
     def get_result(self, plugin_name: str) -> PluginResult:
         return self.results.get(plugin_name)
 
+    def time_index(
+        self, name: str, build: Callable[[], IntervalIndex]
+    ) -> IntervalIndex:
+        """
+        The index registered under `name`, built on first use, so that the
+        plugins analyzing a report build it only once. An index named after a
+        plugin is dropped when the result of that plugin changes.
+        :param build: Builds the index, e.g. from the parsed report or from
+            the result of a plugin.
+        """
+        index = self.indexes.get(name)
+        if index is None:
+            # Two plugins may build it at the same time, only one is kept
+            index = self.indexes.setdefault(name, build())
+        return index
+
+    def stats_summary(self) -> Dict[str, Any]:
+        """Machine-readable statistics of the plugin runs, for JSON output."""
+        return summarize(self.plugin_stats.values())
+
     def __repr__(self):
         return f"PluginContext(results={self.results})"
 
 
 class BasePlugin(ABC):
+    """
+    An analysis of a bugreport.
+
+    Plugins are stateless: `analyze` returns everything it finds in a
+    `PluginResult`, which is stored in the analysis context, and `report`
+    renders that result. One plugin instance can therefore analyze several
+    reports at the same time.
+
+    Plugins implement either `analyze`, or `analyze_async` if they mostly
+    wait on I/O, which lets `PluginRepo.run_all_async` overlap them.
+    """
+
     def __init__(self, name: str, dependencies: List[str] = None):
         """
         Base class for plugins.
@@ -58,97 +125,312 @@ class BasePlugin(ABC):
         self.name = name
         self.dependencies = dependencies if dependencies is not None else []
 
-    @abstractmethod
     def analyze(self, analysis_context: BugreportAnalysisContext) -> PluginResult:
-        pass
+        """
+        Analyze the bugreport. Async plugins get this for free: it runs
+        `analyze_async` in an event loop of its own.
+        """
+        if not self.is_async():
+            raise NotImplementedError(
+                f"{self.name} implements neither analyze nor analyze_async"
+            )
+        import asyncio
+
+        return asyncio.run(self.analyze_async(analysis_context))
+
+    async def analyze_async(
+        self, analysis_context: BugreportAnalysisContext
+    ) -> PluginResult:
+        """
+        Analyze the bugreport from an event loop. Only plugins doing I/O
+        override this, the default runs `analyze` on a thread.
+        """
+        import asyncio
+
+        return await asyncio.to_thread(self.analyze, analysis_context)
+
+    def is_async(self) -> bool:
+        """Whether the plugin implements `analyze_async`"""
+        return type(self).analyze_async is not BasePlugin.analyze_async
 
     @abstractmethod
-    def report(self) -> str:
+    def report(self, result: PluginResult) -> str:
+        """Render the result of `analyze` as text."""
         pass
 
+    def iter_report(self, result: PluginResult) -> Iterator[str]:
+        """
+        The lines of `report`, for writers streaming large reports out. Plugins
+        with large results override it to avoid building the whole string.
+        """
+        yield self.report(result)
+
+    def version(self) -> str:
+        """
+        Version of the analysis, to be bumped whenever a change of the plugin
+        changes its results.
+        """
+        return "1.0.0"
+
+    def requirements(self) -> "DataRequirements":
+        """
+        The parts of the bugreport this plugin reads. Only the union of the
+        requirements of the plugins of a run is parsed, so a plugin must
+        declare everything it accesses. Defaults to everything.
+        """
+        from python_bugreport_parser.bugreport.requirements import DataRequirements
+
+        return DataRequirements.everything()
+
     def run(self, analysis_context: BugreportAnalysisContext) -> None:
         result = self.analyze(analysis_context)
         analysis_context.set_result(self.name, result)
 
 
 class PluginRepo:
-    _plugins: List[BasePlugin] = []
+    """
+    A set of plugins in execution order.
+
+    Plugins are registered once per process as `PluginSpec`s (see
+    `load_plugins`), without importing them. Each repo imports and
+    instantiates a plugin the first time a run selects it, so a run of one
+    plugin only pays for the imports of that plugin and its dependencies.
+    Since plugins keep no state, one repo can also run several analysis
+    contexts concurrently.
+    """
+
+    _plugin_specs: Dict[str, PluginSpec] = {}
     _lock = threading.Lock()
 
+    def __init__(self, plugins: Optional[List[BasePlugin]] = None):
+        """
+        :param plugins: The plugins to run, every registered plugin by default.
+        """
+        if plugins is None:
+            self.specs = PluginRepo.resolve_execution_order(
+                PluginRepo.registered_specs()
+            )
+            self._instances: Dict[str, BasePlugin] = {}
+        else:
+            plugins = PluginRepo.resolve_execution_order(plugins)
+            self.specs = [PluginSpec.of(plugin) for plugin in plugins]
+            self._instances = {plugin.name: plugin for plugin in plugins}
+        self._instances_lock = threading.Lock()
+
     @classmethod
-    def register(cls, plugin: BasePlugin) -> None:
-        """Register a new plugin"""
+    def register(cls, spec: PluginSpec) -> None:
+        """Register a new plugin, replacing any other of the same name"""
         with cls._lock:
-            cls._plugins.append(plugin)
+            cls._plugin_specs[spec.name] = spec
 
     @classmethod
-    def get_all(cls) -> List[BasePlugin]:
-        """Get all registered plugins"""
+    def registered_specs(cls) -> List[PluginSpec]:
         with cls._lock:
-            return cls._plugins.copy()
+            return list(cls._plugin_specs.values())
 
-    @classmethod
-    def find_by_name(cls, name: str) -> Optional[BasePlugin]:
+    def _instance(self, spec: PluginSpec) -> BasePlugin:
+        with self._instances_lock:
+            plugin = self._instances.get(spec.name)
+            if plugin is None:
+                plugin = spec.instantiate()
+                self._instances[spec.name] = plugin
+            return plugin
+
+    def names(self) -> List[str]:
+        """Names of the plugins of this repo in execution order, without importing them"""
+        return [spec.name for spec in self.specs]
+
+    def get_all(self) -> List[BasePlugin]:
+        """Get all plugins of this repo"""
+        return [self._instance(spec) for spec in self.specs]
+
+    def find_by_name(self, name: str) -> Optional[BasePlugin]:
         """Find a plugin by name"""
-        with cls._lock:
-            for plugin in cls._plugins:
-                if plugin.name() == name:
-                    return plugin
-            return None
+        for spec in self.specs:
+            if spec.name == name:
+                return self._instance(spec)
+        return None
 
-    @classmethod
-    def run_all(cls, analysis_context: BugreportAnalysisContext) -> None:
-        """Run analysis using all plugins"""
-        with cls._lock:
-            for plugin in cls._plugins:
-                plugin.run(analysis_context)
+    def select(self, names: Optional[List[str]] = None) -> List[BasePlugin]:
+        """
+        The plugins with these names and everything they depend on, in
+        execution order. All plugins if no names are given. Only the
+        selected plugins are imported.
+        """
+        if names is None:
+            return self.get_all()
+        by_name = {spec.name: spec for spec in self.specs}
+        selected = set()
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name in selected:
+                continue
+            if name not in by_name:
+                raise Exception(f"Unknown plugin: {name}")
+            selected.add(name)
+            pending.extend(by_name[name].dependencies)
+        return [self._instance(spec) for spec in self.specs if spec.name in selected]
 
-    @classmethod
-    def report_all(cls) -> str:
-        """Generate reports from all plugins"""
-        with cls._lock:
-            reports = [plugin.report() for plugin in cls._plugins]
-            return "\n".join(reports)
+    @staticmethod
+    def requirements_for(plugins: List[BasePlugin]) -> "DataRequirements":
+        """The union of the data requirements of some plugins."""
+        from python_bugreport_parser.bugreport.requirements import DataRequirements
 
-    # Registerations for plugins at the import of this module
-    @classmethod
-    def load_plugins(cls):
-        # Scan the plugin directory
-        plugin_files = Path(plugin_dir).glob("*.py")
+        requirements = DataRequirements()
+        for plugin in plugins:
+            requirements = requirements.union(plugin.requirements())
+        return requirements
+
+    def run_all(
+        self,
+        analysis_context: BugreportAnalysisContext,
+        names: Optional[List[str]] = None,
+        mode: str = "serial",
+        max_workers: Optional[int] = None,
+        trace_memory: bool = False,
+        result_cache: Optional[PluginResultCache] = None,
+        budgets: Optional[PluginBudgets] = None,
+        writer: Optional[ResultWriter] = None,
+        logcat_window: Optional[timedelta] = None,
+    ) -> ScheduleReport:
+        """
+        Run analysis using all plugins. Each plugin starts as soon as its
+        dependencies have finished. Only the data the plugins require is
+        parsed from the bugreport.
+        :param names: Only run these plugins and their dependencies.
+        :param mode: "serial" to run the plugins one at a time, or "thread"
+            or "process" to run independent plugins concurrently on a pool.
+        :param max_workers: Size of the pool, defaults to the CPU count.
+        :param trace_memory: Also record the peak memory of each plugin, which
+            is slow. Wall and CPU times are always recorded into
+            `analysis_context.plugin_stats`.
+        :param result_cache: Reuse the results of plugins that already ran on
+            the same report with the same version, and store the new ones.
+        :param budgets: Wall-clock limits of the plugins. A plugin running out
+            of its budget gets no result and its dependents are skipped, see
+            `analysis_context.timed_out` and `analysis_context.skipped`.
+        :param writer: Write out the result of each plugin as soon as it is
+            done, in completion order. The writer is not closed.
+        :param logcat_window: Only parse the SYSTEM LOG and EVENT LOG lines
+            this far from the error timestamp, for every plugin.
+
+        Results already in the context are kept if they are up to date, so
+        running again only recomputes the plugins whose version changed, and
+        those invalidated by `invalidate`, along with their dependents.
+        """
+        plugins = self.select(names)
+        if analysis_context.bugreport is not None:
+            analysis_context.bugreport.require(
+                PluginRepo.requirements_for(plugins).with_logcat_window(logcat_window)
+            )
+        on_finish = None
+        if writer is not None:
+            on_finish = partial(writer.write_plugin, analysis_context=analysis_context)
+        scheduler = DagScheduler(
+            mode, max_workers, trace_memory, result_cache, budgets, on_finish
+        )
+        schedule = scheduler.run(plugins, analysis_context)
+        logger.debug("%s", schedule)
+        return schedule
+
+    async def run_all_async(
+        self,
+        analysis_context: BugreportAnalysisContext,
+        names: Optional[List[str]] = None,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        result_cache: Optional[PluginResultCache] = None,
+        budgets: Optional[PluginBudgets] = None,
+        writer: Optional[ResultWriter] = None,
+        logcat_window: Optional[timedelta] = None,
+    ) -> ScheduleReport:
+        """
+        Same as `run_all`, from an event loop: async plugins run on the loop
+        and the others on `executor`, see `AsyncDagScheduler`. Pass the same
+        executor to the runs of several reports to share its workers.
 
-        with cls._lock:
-            for file_path in plugin_files:
-                module_name = file_path.stem  # e.g., "foo" from "foo.py"
-                if module_name == "__init__":
-                    continue
-                try:
-                    # Import the module dynamically
-                    module = importlib.import_module(
-                        f"python_bugreport_parser.plugins.{module_name}"
-                    )
+        The bugreport is loaded off the loop before the first plugin runs.
+        """
+        from python_bugreport_parser.plugins.async_runner import AsyncDagScheduler
 
-                    # Find all classes in the module that inherit from BasePlugin
-                    for _, plugin_cls in inspect.getmembers(module, inspect.isclass):
-                        if (
-                            issubclass(plugin_cls, BasePlugin)
-                            and plugin_cls is not BasePlugin
-                        ):
-                            plugin_instance = plugin_cls()
-                            cls._plugins.append(plugin_instance)
-                            break  # Assume one plugin per file for simplicity
-
-                except Exception as e:
-                    print(f"Failed to load {module_name}: {e}")
-            cls._plugins = PluginRepo.resolve_execution_order(cls._plugins)
-            print(
-                f"Successfully loaded the following plugins: {[plugin.name for plugin in cls._plugins]}"
+        plugins = self.select(names)
+        if analysis_context.bugreport is not None:
+            analysis_context.bugreport.require(
+                PluginRepo.requirements_for(plugins).with_logcat_window(logcat_window)
             )
+        on_finish = None
+        if writer is not None:
+            on_finish = partial(writer.write_plugin, analysis_context=analysis_context)
+        scheduler = AsyncDagScheduler(
+            executor, max_workers, result_cache, budgets, on_finish
+        )
+        schedule = await scheduler.run_async(plugins, analysis_context)
+        logger.debug("%s", schedule)
+        return schedule
+
+    def invalidate(
+        self,
+        analysis_context: BugreportAnalysisContext,
+        name: str,
+        result_cache: Optional[PluginResultCache] = None,
+    ) -> List[str]:
+        """
+        Drop the result of a plugin and of everything depending on it, e.g.
+        after editing the plugin without bumping its version. The next
+        `run_all` recomputes them, and lists them in `ScheduleReport.recomputed`.
+        :param result_cache: Also drop the results from this cache.
+        :return: The names of the invalidated plugins, in execution order.
+        """
+        if name not in self.names():
+            raise Exception(f"Unknown plugin: {name}")
+        stale = {name}
+        for spec in self.specs:
+            if any(dep in stale for dep in spec.dependencies):
+                stale.add(spec.name)
+
+        invalidated = [spec.name for spec in self.specs if spec.name in stale]
+        for plugin_name in invalidated:
+            key = analysis_context.result_keys.get(plugin_name)
+            if result_cache is not None and key is not None:
+                result_cache.invalidate(key)
+            analysis_context.remove_result(plugin_name)
+        return invalidated
+
+    def report_all(
+        self,
+        analysis_context: BugreportAnalysisContext,
+        names: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Render the results of a run, of the plugins selected by `names`, in
+        execution order. See `run_all(writer=...)` to stream them out instead.
+        """
+        return render_text(self.select(names), analysis_context)
+
+    def write_all(
+        self,
+        analysis_context: BugreportAnalysisContext,
+        writer: ResultWriter,
+        names: Optional[List[str]] = None,
+    ) -> None:
+        """Write the results of a run, of the plugins selected by `names`"""
+        for plugin in self.select(names):
+            writer.write_plugin(plugin, analysis_context)
+
+    # Registerations for plugins at the import of this module
+    @classmethod
+    def load_plugins(cls):
+        """Register the built-in plugins of the manifest, without importing them"""
+        for spec in PLUGIN_MANIFEST:
+            cls.register(spec)
 
     @staticmethod
     def resolve_execution_order(plugins: List[BasePlugin]) -> List[BasePlugin]:
         """
         Resolve plugin execution order based on dependencies using a topological sort.
         Raises an Exception if a circular dependency is detected.
+        Also orders `PluginSpec`s, which have a name and dependencies as well.
         """
         order = []
         visited = {}
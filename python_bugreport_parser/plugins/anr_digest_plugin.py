@@ -1,31 +1,236 @@
-from datetime import datetime
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
 
-from python_bugreport_parser.bugreport import BugreportTxt
+from python_bugreport_parser.bugreport import BugreportTxt, LogcatSection
+from python_bugreport_parser.bugreport.anr_record import AnrProcess, AnrRecord
+from python_bugreport_parser.bugreport.requirements import DataRequirements
+from python_bugreport_parser.bugreport.section import LogcatLine
 from python_bugreport_parser.plugins import (
     BasePlugin,
     BugreportAnalysisContext,
     PluginResult,
 )
+from python_bugreport_parser.plugins.budget import checkpoint
+from python_bugreport_parser.plugins.timeline_join import TimelineIndex, join_nearest
+
+# am_anr: [user,pid,process,flags,reason]
+AM_ANR_PATTERN = re.compile(r"^\[(\d+),(\d+),([^,]+),(\d+),(.*)\]$")
+# ANR in com.foo (com.foo/.Main)
+ANR_IN_PATTERN = re.compile(r"^ANR in (\S+)(?: \((.*)\))?")
+ANR_IN_DETAIL_PATTERN = re.compile(r"^(\w+): (.*)$")
+
+# Largest time between the am_anr event, the "ANR in" block and the trace
+# dump of the same ANR
+ANR_MATCH_TOLERANCE = timedelta(minutes=1)
+
+
+@dataclass
+class AmAnrEvent:
+    timestamp: datetime
+    user: int
+    pid: int
+    process: str
+    flags: int
+    reason: str
+
+    @classmethod
+    def parse(cls, line: LogcatLine) -> Optional["AmAnrEvent"]:
+        match = AM_ANR_PATTERN.match(line.message.strip())
+        if not match:
+            return None
+        user, pid, process, flags, reason = match.groups()
+        return cls(line.timestamp, int(user), int(pid), process, int(flags), reason)
+
+
+@dataclass
+class AnrInBlock:
+    """The "ANR in" lines ActivityManager logs into the SYSTEM LOG."""
+
+    timestamp: datetime
+    process: str
+    component: Optional[str]
+    # "PID", "Reason", "Parent", "Load", ... lines
+    details: Dict[str, str] = field(default_factory=dict)
+    # The other lines, e.g. the CPU usage
+    lines: List[str] = field(default_factory=list)
+
+    @property
+    def pid(self) -> Optional[int]:
+        pid = self.details.get("PID", "")
+        return int(pid) if pid.isdigit() else None
+
+    def add_line(self, message: str) -> None:
+        match = ANR_IN_DETAIL_PATTERN.match(message)
+        if match and not self.lines:
+            self.details[match.group(1)] = match.group(2)
+        else:
+            self.lines.append(message)
+
+
+@dataclass
+class AnrDigest:
+    timestamp: datetime
+    process: str
+    pid: Optional[int]
+    reason: str
+    am_anr: Optional[AmAnrEvent] = None
+    anr_in: Optional[AnrInBlock] = None
+    # The trace dump of the process
+    dump: Optional[AnrProcess] = None
+
+    def __str__(self):
+        dump = self.dump.timestamp if self.dump else None
+        return (
+            f"AnrDigest(timestamp={self.timestamp}, process={self.process}, "
+            f"pid={self.pid}, reason={self.reason}, "
+            f"am_anr={self.am_anr is not None}, "
+            f"anr_in={self.anr_in is not None}, dump={dump})"
+        )
 
 
 class AnrDigestPlugin(BasePlugin):
     def __init__(self):
         super().__init__(name="AnrDigestPlugin", dependencies=None)
-        self.timestamp = datetime.now()
 
     def version(self) -> str:
-        return "1.0.0"
+        return "1.1.0"
+
+    def requirements(self) -> DataRequirements:
+        return DataRequirements.of(
+            sections=["EVENT LOG", "SYSTEM LOG"], anr_traces=True
+        )
 
     def analyze(self, analysis_context: BugreportAnalysisContext) -> PluginResult:
-        """Extract timestamp from bugreport metadata"""
+        """Digest every ANR of the report"""
         bugreport: BugreportTxt = analysis_context.bugreport.bugreport.bugreport_txt
-        # Extract all am_anr lines
-        # Extract 'ANR in' segment and parse it
-        # Match each 'ANR in' segment with the am_anr lines
-        #   There maybe some am_anr lines without any 'ANR in' segment
-        #   match the one with the same process and nearest timestamp
-        return (PluginResult(self.timestamp, metadata={"description": "ANR digest"}),)
-
-    def report(self) -> str:
-        # Bugreport timestamp: 2024-08-16T10:02:11
-        return f"Bugreport timestamp: {self.timestamp.isoformat()}"
+        sections = {
+            s.name: s.content
+            for s in bugreport.sections
+            if s.name in ("EVENT LOG", "SYSTEM LOG")
+        }
+        am_anr_events = []
+        if "EVENT LOG" in sections:
+            event_log: LogcatSection = sections["EVENT LOG"]
+            for line in event_log.search_by_tag("am_anr"):
+                event = AmAnrEvent.parse(line)
+                if event:
+                    am_anr_events.append(event)
+        anr_in_blocks = []
+        if "SYSTEM LOG" in sections:
+            system_log: LogcatSection = sections["SYSTEM LOG"]
+            anr_in_blocks = AnrDigestPlugin._parse_anr_in_blocks(system_log)
+
+        digests = AnrDigestPlugin._match(
+            am_anr_events,
+            anr_in_blocks,
+            analysis_context.bugreport.bugreport.anr_records or [],
+        )
+        return PluginResult(digests, metadata={"description": "ANR digest"})
+
+    def report(self, result: PluginResult) -> str:
+        return "\n".join(self.iter_report(result))
+
+    def iter_report(self, result: PluginResult) -> Iterator[str]:
+        for digest in result.data:
+            yield str(digest)
+
+    @staticmethod
+    def _parse_anr_in_blocks(system_log: LogcatSection) -> List[AnrInBlock]:
+        """
+        ActivityManager logs a block as lines sharing the timestamp, pid and
+        tid, which other lines may interleave with.
+        """
+        blocks = []
+        open_blocks: Dict[tuple, AnrInBlock] = {}
+        for line in system_log.search_by_tag("ActivityManager"):
+            checkpoint()
+            key = (line.pid, line.tid)
+            match = ANR_IN_PATTERN.match(line.message)
+            if match:
+                block = AnrInBlock(line.timestamp, match.group(1), match.group(2))
+                blocks.append(block)
+                open_blocks[key] = block
+            elif key in open_blocks:
+                block = open_blocks[key]
+                if block.timestamp == line.timestamp:
+                    block.add_line(line.message)
+                else:
+                    del open_blocks[key]
+        return blocks
+
+    @staticmethod
+    def _match(
+        am_anr_events: List[AmAnrEvent],
+        anr_in_blocks: List[AnrInBlock],
+        anr_records: List[AnrRecord],
+        tolerance: timedelta = ANR_MATCH_TOLERANCE,
+    ) -> List[AnrDigest]:
+        """
+        Pair each "ANR in" block with the am_anr event of the same process
+        nearest to it. Events without a block get a digest of their own. Each
+        digest is then linked to the nearest trace dump of its pid.
+        """
+        events_by_process: Dict[str, List[AmAnrEvent]] = defaultdict(list)
+        for event in am_anr_events:
+            events_by_process[event.process].append(event)
+        blocks_by_process: Dict[str, List[AnrInBlock]] = defaultdict(list)
+        for block in anr_in_blocks:
+            blocks_by_process[block.process].append(block)
+
+        digests = []
+        for process in events_by_process.keys() | blocks_by_process.keys():
+            checkpoint()
+            events = events_by_process.get(process, [])
+            blocks = sorted(
+                blocks_by_process.get(process, []), key=lambda b: b.timestamp
+            )
+            pairs = join_nearest(blocks, events, tolerance)
+            paired = set()
+            for block, event in pairs:
+                if event is not None:
+                    paired.add(id(event))
+                    digests.append(AnrDigestPlugin._digest(process, event, block))
+                else:
+                    digests.append(
+                        AnrDigest(
+                            timestamp=block.timestamp,
+                            process=process,
+                            pid=block.pid,
+                            reason=block.details.get("Reason", ""),
+                            anr_in=block,
+                        )
+                    )
+            for event in events:
+                if id(event) not in paired:
+                    digests.append(AnrDigestPlugin._digest(process, event))
+
+        dumps_by_pid: Dict[int, TimelineIndex[AnrProcess]] = defaultdict(
+            lambda: TimelineIndex(key=lambda p: p.timestamp.replace(tzinfo=None))
+        )
+        for record in anr_records:
+            for process in record.traces:
+                dumps_by_pid[process.pid].add(process)
+        for digest in digests:
+            dumps = dumps_by_pid.get(digest.pid)
+            if dumps is not None:
+                nearest = dumps.nearest(digest.timestamp, tolerance)
+                if nearest is not None:
+                    digest.dump = dumps[nearest]
+
+        return sorted(digests, key=lambda d: (d.timestamp, d.process))
+
+    @staticmethod
+    def _digest(
+        process: str, event: AmAnrEvent, block: Optional[AnrInBlock] = None
+    ) -> AnrDigest:
+        return AnrDigest(
+            timestamp=event.timestamp,
+            process=process,
+            pid=event.pid,
+            reason=event.reason,
+            am_anr=event,
+            anr_in=block,
+        )
@@ -0,0 +1,161 @@
+"""
+Run plugins from an asyncio event loop.
+
+Plugins implementing `analyze_async` run as coroutines on the loop, so
+plugins waiting on I/O overlap each other. The other plugins are CPU-bound
+and run on an executor, so they do not block the loop. Every plugin still
+starts as soon as its dependencies have finished, and one loop can drive the
+analyses of many reports at the same time, see `run_many`.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from python_bugreport_parser.plugins.budget import (
+    PluginBudgets,
+    PluginTimeout,
+    deadline,
+)
+from python_bugreport_parser.plugins.instrumentation import PluginRunStats
+from python_bugreport_parser.plugins.result_cache import PluginResultCache
+from python_bugreport_parser.plugins.scheduler import (
+    DagScheduler,
+    PluginOutcome,
+    ScheduleReport,
+    execute_plugin,
+)
+
+if TYPE_CHECKING:
+    from python_bugreport_parser.plugins import (
+        BasePlugin,
+        BugreportAnalysisContext,
+        PluginRepo,
+    )
+
+
+class AsyncDagScheduler(DagScheduler):
+    """
+    The asyncio counterpart of `DagScheduler`, with the same result reuse,
+    result cache and time budgets. Results are stored into the analysis
+    context by the event loop thread.
+
+    An async plugin running out of its budget is cancelled at its next
+    `await`. The CPU time of async plugins is not measured, since they share
+    the thread of the loop.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        result_cache: Optional[PluginResultCache] = None,
+        budgets: Optional[PluginBudgets] = None,
+        on_finish: Optional[Callable[["BasePlugin"], None]] = None,
+    ):
+        """
+        :param executor: Runs the synchronous plugins, a thread pool of
+            `max_workers` threads by default. A process pool works as well.
+        """
+        super().__init__("thread", max_workers, False, result_cache, budgets, on_finish)
+        self.mode = "async"
+        self.executor = executor
+
+    async def run_async(
+        self,
+        plugins: List["BasePlugin"],
+        analysis_context: "BugreportAnalysisContext",
+    ) -> ScheduleReport:
+        """
+        :param plugins: Plugins in topological order, see
+            `PluginRepo.resolve_execution_order`.
+        :param analysis_context: Receives the result of every plugin.
+        """
+        start = time.perf_counter()
+        report = self._prepare(plugins, analysis_context)
+        executor = self.executor or ThreadPoolExecutor(max_workers=self.max_workers)
+        tasks: Dict[str, asyncio.Future] = {}
+        load_lock = asyncio.Lock()
+
+        async def run_one(plugin: "BasePlugin") -> None:
+            await asyncio.gather(
+                *(tasks[dep] for dep in plugin.dependencies if dep in tasks)
+            )
+            if not (
+                self._skip_blocked(plugin, analysis_context, report)
+                or self._load_existing(plugin, analysis_context, report)
+            ):
+                async with load_lock:
+                    if not report.loaded:
+                        # Off the loop, async plugins may be waiting on I/O
+                        await asyncio.to_thread(
+                            self._load_report, analysis_context, report
+                        )
+                outcome = await self._execute(plugin, analysis_context, executor)
+                self._apply(outcome, plugin, analysis_context, report)
+            self._finished(plugin)
+
+        try:
+            # Dependencies come first, so their tasks exist already
+            for plugin in plugins:
+                tasks[plugin.name] = asyncio.ensure_future(run_one(plugin))
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            # Same as a serial run: nothing is scheduled after a failure
+            for task in tasks.values():
+                task.cancel()
+            raise
+        finally:
+            if executor is not self.executor:
+                executor.shutdown(wait=False)
+        self._complete(plugins, report, start)
+        return report
+
+    async def _execute(
+        self,
+        plugin: "BasePlugin",
+        analysis_context: "BugreportAnalysisContext",
+        executor: Executor,
+    ) -> PluginOutcome:
+        budget = self.budgets.for_plugin(plugin.name)
+        if not plugin.is_async():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                executor, execute_plugin, plugin, analysis_context, False, budget
+            )
+
+        wall_start = time.perf_counter()
+        result = None
+        timed_out = False
+        try:
+            # The task running the plugin inherits the deadline `checkpoint`
+            # checks
+            with deadline(plugin.name, budget):
+                result = await asyncio.wait_for(
+                    plugin.analyze_async(analysis_context), budget
+                )
+        except (asyncio.TimeoutError, PluginTimeout):
+            timed_out = True
+        stats = PluginRunStats(
+            plugin.name,
+            plugin.version(),
+            time.perf_counter() - wall_start,
+            0.0,
+            timed_out=timed_out,
+        )
+        return PluginOutcome(result, stats)
+
+
+async def run_many(
+    repo: "PluginRepo",
+    analysis_contexts: List["BugreportAnalysisContext"],
+    **kwargs,
+) -> List[ScheduleReport]:
+    """
+    Analyze several reports concurrently on the running loop.
+    :param kwargs: Passed to `PluginRepo.run_all_async`.
+    """
+    return await asyncio.gather(
+        *(repo.run_all_async(context, **kwargs) for context in analysis_contexts)
+    )
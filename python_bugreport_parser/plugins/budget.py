@@ -0,0 +1,62 @@
+"""
+Wall-clock budgets of plugin runs.
+
+Python cannot stop a thread from the outside, so cancellation is cooperative:
+the runner sets a deadline around each plugin, and the long loops of the
+plugins call `checkpoint()`, which raises `PluginTimeout` once the deadline
+has passed. A plugin that overruns its budget without reaching a checkpoint
+is marked as timed out when it returns.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+
+# (plugin name, budget in seconds, deadline on the perf_counter clock) of the
+# plugin running in the current thread
+_deadline: ContextVar[Optional[Tuple[str, float, float]]] = ContextVar(
+    "plugin_deadline", default=None
+)
+
+
+class PluginTimeout(Exception):
+    def __init__(self, plugin: str, budget: float):
+        super().__init__(f"{plugin} ran out of its time budget of {budget:.3f}s")
+        self.plugin = plugin
+        self.budget = budget
+
+
+@dataclass
+class PluginBudgets:
+    """Time budgets of plugins in seconds, None for no limit."""
+
+    default: Optional[float] = None
+    per_plugin: Dict[str, float] = field(default_factory=dict)
+
+    def for_plugin(self, name: str) -> Optional[float]:
+        return self.per_plugin.get(name, self.default)
+
+
+@contextmanager
+def deadline(plugin: str, budget: Optional[float]) -> Iterator[None]:
+    """Set the deadline `checkpoint` checks while the plugin runs."""
+    if budget is None:
+        yield
+        return
+    token = _deadline.set((plugin, budget, time.perf_counter() + budget))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def checkpoint() -> None:
+    """
+    A cancellation point for long-running plugin loops.
+    Raises `PluginTimeout` if the running plugin is out of its budget.
+    """
+    current = _deadline.get()
+    if current is not None and time.perf_counter() > current[2]:
+        raise PluginTimeout(current[0], current[1])
@@ -0,0 +1,45 @@
+from typing import Iterator
+
+from python_bugreport_parser.bugreport import BugreportTxt
+from python_bugreport_parser.bugreport.dumpstate_profile import DumpstateProfile
+from python_bugreport_parser.bugreport.requirements import DataRequirements
+from python_bugreport_parser.plugins import (
+    BasePlugin,
+    BugreportAnalysisContext,
+    PluginResult,
+)
+
+# Number of the slowest dumpsys services reported
+SLOWEST_SERVICES = 5
+
+
+class DumpstateProfilePlugin(BasePlugin):
+    def __init__(self):
+        super().__init__(name="DumpstateProfilePlugin", dependencies=None)
+
+    def version(self) -> str:
+        return "1.0.0"
+
+    def requirements(self) -> DataRequirements:
+        # The durations are read while the sections are found
+        return DataRequirements()
+
+    def analyze(self, analysis_context: BugreportAnalysisContext) -> PluginResult:
+        """Where dumpstate spent its time"""
+        bugreport_txt: BugreportTxt = analysis_context.bugreport.bugreport.bugreport_txt
+        profile = DumpstateProfile.of(bugreport_txt)
+        return PluginResult(profile, metadata={"description": "Dumpstate profile"})
+
+    def report(self, result: PluginResult) -> str:
+        return "\n".join(self.iter_report(result))
+
+    def iter_report(self, result: PluginResult) -> Iterator[str]:
+        profile: DumpstateProfile = result.data
+        yield f"Dumpstate took {profile.total:.3f}s"
+        categories = sorted(
+            profile.categories().items(), key=lambda item: item[1], reverse=True
+        )
+        for category, seconds in categories:
+            yield f"  {category}: {seconds:.3f}s"
+        for service, seconds in profile.slowest_services(SLOWEST_SERVICES):
+            yield f"  dumpsys {service}: {seconds:.3f}s"
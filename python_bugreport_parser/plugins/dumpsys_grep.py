@@ -0,0 +1,146 @@
+"""
+Find lines in dumpsys entries, like grep, without splitting the entries into
+lists of lines.
+
+The patterns are searched for directly in the buffer, literals with
+`str.find`, and each hit is widened to the line around it. The result is the
+spans of the matching lines in the buffer, so the text is only copied out
+for the lines a plugin actually reads. Lines are separated by "\\n" only,
+like the sections of bugreport.txt.
+
+Buffers may be `str` or `bytes`, as long as the patterns are of the same
+type.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import (
+    AnyStr,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
+
+from python_bugreport_parser.bugreport.dumpsys_entry import DumpsysEntry
+from python_bugreport_parser.plugins.budget import checkpoint
+
+
+@dataclass(frozen=True)
+class LineMatch:
+    """A matching line, as offsets into the searched buffer."""
+
+    # Span of the line, without its newline
+    start: int
+    end: int
+    # Span of the line with its context lines
+    context_start: int
+    context_end: int
+    # The patterns found in the line, the `pattern` of regular expressions
+    patterns: tuple
+
+    def line(self, buffer: AnyStr) -> AnyStr:
+        return buffer[self.start : self.end]
+
+    def context(self, buffer: AnyStr) -> AnyStr:
+        """The line and its context lines, separated by newlines."""
+        return buffer[self.context_start : self.context_end]
+
+
+class DumpsysGrep(Generic[AnyStr]):
+    """
+    Searches buffers for lines matching any of several patterns, e.g.
+    `DumpsysGrep(["setWifiEnabledInternal", re.compile(r"state=\\d+")])`.
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[Union[AnyStr, Pattern[AnyStr]]],
+        before: int = 0,
+        after: int = 0,
+    ):
+        """
+        :param patterns: Literal strings, or compiled regular expressions,
+            which are matched within a line.
+        :param before: Number of context lines before each matching line.
+        :param after: Number of context lines after each matching line.
+        """
+        self.literals: List[AnyStr] = []
+        self.regexes: List[Pattern[AnyStr]] = []
+        for pattern in patterns:
+            if isinstance(pattern, re.Pattern):
+                self.regexes.append(pattern)
+            elif ("\n" if isinstance(pattern, str) else b"\n") in pattern:
+                raise ValueError(f"Pattern spans several lines: {pattern!r}")
+            else:
+                self.literals.append(pattern)
+        self.before = before
+        self.after = after
+
+    def search(
+        self, buffer: AnyStr, start: int = 0, end: Optional[int] = None
+    ) -> List[LineMatch]:
+        """
+        :param start: Offset of the first line to search, e.g. of an entry in
+            a larger buffer.
+        :param end: Offset past the last line to search, the end of the
+            buffer by default.
+        :return: The matching lines in buffer order, each once.
+        """
+        end = len(buffer) if end is None else end
+        newline = "\n" if isinstance(buffer, str) else b"\n"
+        # Line start -> (line end, patterns found in the line)
+        lines: Dict[int, Tuple[int, List[AnyStr]]] = {}
+
+        def add(position: int, name: AnyStr) -> int:
+            line_start = buffer.rfind(newline, start, position)
+            line_start = line_start + 1 if line_start >= 0 else start
+            line_end = buffer.find(newline, position, end)
+            if line_end < 0:
+                line_end = end
+            names = lines.setdefault(line_start, (line_end, []))[1]
+            if name not in names:
+                names.append(name)
+            return line_end
+
+        for literal in self.literals:
+            position = buffer.find(literal, start, end)
+            while position >= 0:
+                checkpoint()
+                # The rest of the line adds nothing
+                position = buffer.find(literal, add(position, literal) + 1, end)
+        for regex in self.regexes:
+            for match in regex.finditer(buffer, start, end):
+                checkpoint()
+                add(match.start(), regex.pattern)
+
+        matches = []
+        for line_start in sorted(lines):
+            line_end, names = lines[line_start]
+            context_start = line_start
+            for _ in range(self.before):
+                if context_start <= start:
+                    break
+                previous = buffer.rfind(newline, start, context_start - 1)
+                context_start = previous + 1 if previous >= 0 else start
+            context_end = line_end
+            for _ in range(self.after):
+                if context_end >= end:
+                    break
+                context_end = buffer.find(newline, context_end + 1, end)
+                if context_end < 0:
+                    context_end = end
+            matches.append(
+                LineMatch(
+                    line_start, line_end, context_start, context_end, tuple(names)
+                )
+            )
+        return matches
+
+    def search_entry(self, entry: DumpsysEntry) -> List[LineMatch]:
+        """Search the data of a dumpsys entry, the offsets are into `entry.data`."""
+        return self.search(entry.data)
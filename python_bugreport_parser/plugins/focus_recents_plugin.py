@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import List
 from python_bugreport_parser.bugreport import BugreportTxt
+from python_bugreport_parser.bugreport.requirements import DataRequirements
 from python_bugreport_parser.plugins import (
     BasePlugin,
     BugreportAnalysisContext,
@@ -12,21 +13,24 @@ from python_bugreport_parser.plugins.input_focus_plugin import InputFocusTuple
 class FocusRecentsPlugin(BasePlugin):
     def __init__(self):
         super().__init__(name="FocusRecentsPlugin", dependencies=["InputFocusPlugin"])
-        self.possibly_stucked: bool = False
-        self.error_focus_record: InputFocusTuple = None
 
     def version(self) -> str:
         return "1.0.0"
 
+    def requirements(self) -> DataRequirements:
+        # Only the error timestamp from the metadata, and InputFocusPlugin
+        return DataRequirements()
+
     def analyze(self, analysis_context: BugreportAnalysisContext) -> PluginResult:
         """Extract timestamp from bugreport metadata"""
         bugreport: BugreportTxt = analysis_context.bugreport.bugreport.bugreport_txt
         error_timestamp = bugreport.error_timestamp
 
         focus_records: List[InputFocusTuple] = None
+        error_focus_record: InputFocusTuple = None
         if not analysis_context.get_result("InputFocusPlugin"):
             print("Result from InputFocusPlugin not found")
-            return
+            return PluginResult(None, metadata={"description": "Stuck recents focus"})
         else:
             focus_records = analysis_context.get_result("InputFocusPlugin").data
 
@@ -48,20 +52,19 @@ class FocusRecentsPlugin(BasePlugin):
             elif record.entering:
                 not_leaving = True
 
-            self.possibly_stucked = stay_too_long or not_leaving
-            if self.possibly_stucked:
-                self.error_focus_record = record
+            possibly_stucked = stay_too_long or not_leaving
+            if possibly_stucked:
+                error_focus_record = record
                 break
 
-        return (
-            PluginResult(
-                self.report(),
-                metadata={"description": "Bugreport timestamp"},
-            ),
+        # The focus record that possibly got stuck, None if there is none
+        return PluginResult(
+            error_focus_record,
+            metadata={"description": "Stuck recents focus"},
         )
 
-    def report(self) -> str:
-        if self.possibly_stucked:
-            return f"FocusRecentsPlugin: staying at recents_animation_input_consumer too long or not leaving\n{self.error_focus_record}"
+    def report(self, result: PluginResult) -> str:
+        if result.data is not None:
+            return f"FocusRecentsPlugin: staying at recents_animation_input_consumer too long or not leaving\n{result.data}"
         else:
             return "FocusRecentsPlugin: no issues found"
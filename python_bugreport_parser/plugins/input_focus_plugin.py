@@ -1,21 +1,32 @@
+import bisect
+import math
 import re
 from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from python_bugreport_parser.bugreport import BugreportTxt, LogcatSection
+from python_bugreport_parser.bugreport.requirements import DataRequirements
 from python_bugreport_parser.plugins import (
     BasePlugin,
     BugreportAnalysisContext,
     PluginResult,
 )
+from python_bugreport_parser.plugins.budget import checkpoint
 
 # Regex patterns for input focus events
 INPUT_FOCUS_REQUEST = re.compile(r"\[Focus request ([\w /\.]+),reason=(\w+)\]")
 INPUT_FOCUS_RECEIVE = re.compile(r"\[Focus receive :([\w /\.]+),.*\]")
 INPUT_FOCUS_ENTERING = re.compile(r"\[Focus entering ([\w /\.]+)( \(server\))?,.*\]")
 INPUT_FOCUS_LEAVING = re.compile(r"\[Focus leaving ([\w /\.]+)( \(server\))?,.*\]")
+FOCUS_EVENT_PATTERN = re.compile(
+    r"^\[Focus (\w+)\s*:?\s*([^ ]+)(?: (.*?))?(?: \((server)\))?,reason=(.*?)\]$"
+)
+
+# The order of the events in a focus tuple
+EVENT_RANKS = {"request": 0, "receive": 1, "entering": 2, "leaving": 3}
+LAST_RANK = EVENT_RANKS["leaving"]
 
 
 @dataclass
@@ -30,10 +41,7 @@ class FocusEvent:
     @staticmethod
     def parse_log_line(line: str, timestamp: datetime) -> Optional["FocusEvent"]:
         """Parse a log line to extract focus event details."""
-        pattern = re.compile(
-            r"^\[Focus (\w+)\s*:?\s*([^ ]+)(?: (.*?))?(?: \((server)\))?,reason=(.*?)\]$"
-        )
-        match = pattern.match(line.strip())
+        match = FOCUS_EVENT_PATTERN.match(line.strip())
         if not match:
             return None
 
@@ -111,12 +119,13 @@ class InputFocusTuple:
 class InputFocusPlugin(BasePlugin):
     def __init__(self):
         super().__init__(name="InputFocusPlugin", dependencies=None)
-        self.records: List[InputFocusTuple] = []
-        self.result: str = ""
 
     def version(self) -> str:
         return "1.0.0"
 
+    def requirements(self) -> DataRequirements:
+        return DataRequirements.of(sections=["EVENT LOG"])
+
     def analyze(self, analysis_context: BugreportAnalysisContext) -> PluginResult:
         """Main analysis entry point"""
         bugreport: BugreportTxt = analysis_context.bugreport.bugreport.bugreport_txt
@@ -129,48 +138,50 @@ class InputFocusPlugin(BasePlugin):
 
         events = []
         for line in [line for line in focus_logs if line.message.startswith("[Focus")]:
+            checkpoint()
             event = FocusEvent.parse_log_line(line.message, line.timestamp)
             if event:
                 events.append(event)
 
         # Group events into focus tuples
-        self.records = InputFocusPlugin._group_focus_events(events)
-        return PluginResult(self.records, metadata={"description": "InputFocusTuples"})
+        records = InputFocusPlugin._group_focus_events(events)
+        return PluginResult(records, metadata={"description": "InputFocusTuples"})
 
-    def report(self) -> str:
-        return "\n".join(str(record) for record in self.records)
+    def report(self, result: PluginResult) -> str:
+        return "\n".join(self.iter_report(result))
+
+    def iter_report(self, result: PluginResult) -> Iterator[str]:
+        for record in result.data:
+            yield str(record)
 
     @staticmethod
     def _group_focus_events(events: List[FocusEvent]) -> List[InputFocusTuple]:
-        # TODO: Maybe it's necessary to group by focus_id and component first and then
-        #       group by event type
-        focus_map: Dict[str, List[InputFocusTuple]] = defaultdict(list)
+        """
+        Assign each event to the tuple of its focus_id that can accept it, and
+        is the most complete, then the most recent one. Events without an
+        accepting tuple start a new one.
+        """
+        open_tuples: Dict[str, _OpenFocusTuples] = defaultdict(_OpenFocusTuples)
         all_tuples: List[InputFocusTuple] = []
 
         for event in events:
-            if event.focus_id.lower() == "<null>":
+            checkpoint()
+            rank = EVENT_RANKS.get(event.event_type)
+            if rank is None or event.focus_id.lower() == "<null>":
                 ft = InputFocusTuple()
                 ft.add_event(event)
                 all_tuples.append(ft)
                 continue
 
-            candidates = []
-            for ft in reversed(focus_map.get(event.focus_id, [])):
-                if ft.can_accept(event):
-                    candidates.append(ft)
-
-            if candidates:
-                # Select best candidate: most complete, then most recent
-                best = max(
-                    candidates, key=lambda x: (x.event_count, x.latest_timestamp)
-                )
-                best.add_event(event)
+            state = open_tuples[event.focus_id]
+            best = state.take_best(rank, event.timestamp)
+            if best is not None:
+                ft, event_count, order = best
             else:
-                # Create new tuple
-                new_ft = InputFocusTuple()
-                new_ft.add_event(event)
-                focus_map[event.focus_id].append(new_ft)
-                all_tuples.append(new_ft)
+                ft, event_count, order = InputFocusTuple(), 0, len(all_tuples)
+                all_tuples.append(ft)
+            ft.add_event(event)
+            state.put(ft, rank, event_count + 1, order)
 
         sorted_completed = sorted(
             all_tuples,
@@ -178,3 +189,60 @@ class InputFocusPlugin(BasePlugin):
         )
 
         return sorted_completed
+
+
+class _OpenFocusTuples:
+    """
+    The tuples of one focus_id which can still accept events.
+
+    A tuple accepts an event ranked after its last event (see `EVENT_RANKS`),
+    which is no older than its latest one. The tuples are bucketed by
+    (rank of the last event, event count), 6 buckets at most, each sorted by
+    (latest timestamp, creation order). So the best tuple for an event is the
+    best of the bucket tops, the last entries when the log is in time order.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[Tuple[int, int], List[tuple]] = {}
+
+    def take_best(
+        self, rank: int, timestamp: datetime
+    ) -> Optional[Tuple[InputFocusTuple, int, int]]:
+        """
+        Remove and return the tuple accepting the event, with its event count
+        and creation order.
+        Ties go to the latest timestamp, then to the newest tuple.
+        """
+        best = None
+        for (last_rank, event_count), bucket in self.buckets.items():
+            if last_rank >= rank:
+                continue
+            index = len(bucket) - 1
+            if bucket[index][0] > timestamp:
+                index = bisect.bisect_right(bucket, (timestamp, math.inf)) - 1
+                if index < 0:
+                    continue
+            latest, order, _ = bucket[index]
+            key = (event_count, latest, order)
+            if best is None or key > best[0]:
+                best = (key, (last_rank, event_count), index)
+        if best is None:
+            return None
+
+        _, bucket_key, index = best
+        bucket = self.buckets[bucket_key]
+        _, order, ft = bucket.pop(index)
+        if not bucket:
+            del self.buckets[bucket_key]
+        return ft, bucket_key[1], order
+
+    def put(self, ft: InputFocusTuple, rank: int, event_count: int, order: int):
+        """
+        :param rank: Rank of the event just added to the tuple.
+        :param order: Creation order of the tuple.
+        """
+        if rank == LAST_RANK:
+            # Nothing comes after leaving
+            return
+        bucket = self.buckets.setdefault((rank, event_count), [])
+        bisect.insort(bucket, (ft.latest_timestamp, order, ft))
@@ -0,0 +1,85 @@
+"""
+Timing and memory statistics of plugin runs.
+
+Wall time and CPU time are always recorded, they cost two clock reads per
+plugin. Peak memory needs tracemalloc, which slows allocations down
+considerably, so it is only recorded on request.
+"""
+
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from python_bugreport_parser.plugins import (
+        BasePlugin,
+        BugreportAnalysisContext,
+        PluginResult,
+    )
+
+
+@dataclass
+class PluginRunStats:
+    plugin: str
+    version: str
+    wall_time: float  # seconds
+    cpu_time: float  # seconds of CPU used by the thread running the plugin
+    peak_memory: Optional[int] = None  # bytes allocated on top of the baseline
+    cached: bool = False  # the result came from the result cache
+    timed_out: bool = False  # ran out of its time budget, see `budget.py`
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def measure_plugin(
+    plugin: "BasePlugin",
+    analysis_context: "BugreportAnalysisContext",
+    trace_memory: bool = False,
+) -> Tuple["PluginResult", PluginRunStats]:
+    """
+    Run a plugin and measure it.
+
+    The peak memory is process-wide, so it is only meaningful when a process
+    runs one plugin at a time.
+    """
+    started_tracing = False
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        result = plugin.analyze(analysis_context)
+        cpu_time = time.thread_time() - cpu_start
+        wall_time = time.perf_counter() - wall_start
+        peak_memory = None
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            peak_memory = max(peak - baseline, 0)
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    stats = PluginRunStats(
+        plugin.name, plugin.version(), wall_time, cpu_time, peak_memory
+    )
+    return result, stats
+
+
+def summarize(stats: Iterable[PluginRunStats]) -> Dict[str, Any]:
+    """A JSON-serializable summary of the plugin runs of one report."""
+    stats = list(stats)
+    return {
+        "plugins": [s.to_dict() for s in stats],
+        "total_wall_time": sum(s.wall_time for s in stats),
+        "total_cpu_time": sum(s.cpu_time for s in stats),
+        "cached": sum(s.cached for s in stats),
+        "timed_out": [s.plugin for s in stats if s.timed_out],
+        "slowest": max(stats, key=lambda s: s.wall_time).plugin if stats else None,
+    }
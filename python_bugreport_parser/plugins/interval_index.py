@@ -0,0 +1,95 @@
+"""
+Time queries over records with a timestamp, or a [start, end] span, such as
+reboot records, focus tuples, ANR dumps or thermal samples.
+
+An index is built once, and then answers which records overlap a time window
+in O((k + 1) log n) for k records found, instead of a pass over all records.
+Plugins share the indexes of a report through
+`BugreportAnalysisContext.time_index`.
+"""
+
+import bisect
+from datetime import datetime, timedelta
+from typing import Callable, Generic, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def _timestamp(record) -> datetime:
+    return record.timestamp
+
+
+class IntervalIndex(Generic[T]):
+    """
+    Records sorted by the start of their span. Spans are closed: a span
+    [start, end] overlaps a window that only touches one of its ends.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[T],
+        start: Callable[[T], datetime] = _timestamp,
+        end: Optional[Callable[[T], datetime]] = None,
+    ):
+        """
+        :param start: Start of the span of a record, its `timestamp` attribute
+            by default.
+        :param end: End of the span of a record, None for records that are
+            points in time. Use `datetime.max` for spans that did not end.
+        """
+        self.records: List[T] = list(records)
+        self._order = sorted(
+            range(len(self.records)), key=lambda i: start(self.records[i])
+        )
+        self._starts = [start(self.records[i]) for i in self._order]
+        self._size = 0
+        self._latest_end: Optional[List[datetime]] = None
+        if end is not None and self.records:
+            # A segment tree holding the latest end of the records below each
+            # node, to skip the subtrees ending before a window
+            ends = [end(self.records[i]) for i in self._order]
+            size = 1
+            while size < len(ends):
+                size *= 2
+            # The padding never gets reported, the search stops before it
+            tree = [ends[0]] * (2 * size)
+            tree[size : size + len(ends)] = ends
+            for node in range(size - 1, 0, -1):
+                tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            self._size = size
+            self._latest_end = tree
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def overlapping(self, window_start: datetime, window_end: datetime) -> List[T]:
+        """
+        Records whose span overlaps [window_start, window_end], in the order
+        they were given in.
+        """
+        stop = bisect.bisect_right(self._starts, window_end)
+        if self._latest_end is None:
+            first = bisect.bisect_left(self._starts, window_start)
+            found = self._order[first:stop]
+        else:
+            found = []
+            # (node, first and past the last position below the node)
+            stack = [(1, 0, self._size)]
+            while stack:
+                node, low, high = stack.pop()
+                if low >= stop or self._latest_end[node] < window_start:
+                    continue
+                if high - low == 1:
+                    found.append(self._order[low])
+                    continue
+                middle = (low + high) // 2
+                stack.append((2 * node + 1, middle, high))
+                stack.append((2 * node, low, middle))
+        return [self.records[i] for i in sorted(found)]
+
+    def near(self, timestamp: datetime, distance: timedelta) -> List[T]:
+        """Records at most `distance` away from `timestamp`."""
+        return self.overlapping(timestamp - distance, timestamp + distance)
+
+    def containing(self, timestamp: datetime) -> List[T]:
+        return self.overlapping(timestamp, timestamp)
@@ -1,12 +1,19 @@
-from datetime import datetime
+from datetime import timedelta
 
 from python_bugreport_parser.bugreport import BugreportTxt
 from python_bugreport_parser.bugreport.dumpsys_entry import MqsServiceDumpsysEntry
+from python_bugreport_parser.bugreport.requirements import DataRequirements
 from python_bugreport_parser.plugins import (
     BasePlugin,
     BugreportAnalysisContext,
     PluginResult,
 )
+from python_bugreport_parser.plugins.interval_index import IntervalIndex
+
+# The boot records of the MQS service, in a time index of the analysis context
+MQS_BOOT_RECORDS_INDEX = "mqs_boot_records"
+# A report is valid if the device rebooted around the error
+REBOOT_WINDOW = timedelta(seconds=600)
 
 
 class InvalidBugreportPlugin(BasePlugin):
@@ -14,14 +21,13 @@ class InvalidBugreportPlugin(BasePlugin):
         super().__init__(
             name="InvalidBugreportPlugin", dependencies=["TimestampPlugin"]
         )
-        self.timestamp = datetime.now()
-        self.error_timestamp = datetime.now()
-        self.reboot_records = []
-        self.is_invalid: bool = False
 
     def version(self) -> str:
         return "1.0.0"
 
+    def requirements(self) -> DataRequirements:
+        return DataRequirements.of(dumpsys_services=["miui.mqsas.MQSService"])
+
     def analyze(self, analysis_context: BugreportAnalysisContext) -> PluginResult:
         """Extract timestamp from bugreport metadata"""
         bugreport: BugreportTxt = analysis_context.bugreport.bugreport.bugreport_txt
@@ -30,35 +36,36 @@ class InvalidBugreportPlugin(BasePlugin):
         if result_from_timestamp_plugin is None:
             print("Result from TimestampPlugin not found")
             # TODO: return
-        # self.timestamp = bugreport.metadata.timestamp
-        self.timestamp = analysis_context.get_result("TimestampPlugin")
-        self.error_timestamp = bugreport.error_timestamp
-        print(self.timestamp, self.error_timestamp)
+        # timestamp = bugreport.metadata.timestamp
+        timestamp = analysis_context.get_result("TimestampPlugin")
+        error_timestamp = bugreport.error_timestamp
+        print(timestamp, error_timestamp)
         dumpsys = next((s for s in bugreport.sections if s.name == "DUMPSYS"), None)
         mqs_dumpsys: MqsServiceDumpsysEntry = next(
             (s for s in dumpsys.content.entries if s.name == "miui.mqsas.MQSService"),
             None,
         )
-        reboot_records = mqs_dumpsys.boot_records
+        reboot_index = analysis_context.time_index(
+            MQS_BOOT_RECORDS_INDEX, lambda: IntervalIndex(mqs_dumpsys.boot_records)
+        )
         # TODO: if the last reboot is valid, then report this
         candidate_records = [
             record
-            for record in reboot_records
-            if abs(self.error_timestamp - record.timestamp).total_seconds() < 600
+            for record in reboot_index.near(error_timestamp, REBOOT_WINDOW)
+            if abs(error_timestamp - record.timestamp) < REBOOT_WINDOW
         ]
-        self.is_invalid = len(candidate_records) == 0
-        self.reboot_records = candidate_records
+        # The bugreport is invalid if no reboot happened around the error
         return PluginResult(
-            self.reboot_records, metadata={"description": "Reboot records"}
+            candidate_records, metadata={"description": "Reboot records"}
         )
 
-    def report(self) -> str:
+    def report(self, result: PluginResult) -> str:
         # Bugreport timestamp: 2024-08-16T10:02:11
-        if self.is_invalid:
+        if not result.data:
             return "Bugreport is invalid\n"
         else:
             report_lines = []
-            for record in self.reboot_records:
+            for record in result.data:
                 report_lines.append(
                     f"Record timestamp: {record.timestamp}, "
                     f"Record reason: {record.boot_reason}, "
@@ -1,15 +1,21 @@
+import bisect
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from python_bugreport_parser.bugreport import BugreportTxt
+from python_bugreport_parser.bugreport.requirements import DataRequirements
 from python_bugreport_parser.bugreport.section import LogcatLine, LogcatSection
 from python_bugreport_parser.plugins import (
     BasePlugin,
     BugreportAnalysisContext,
     PluginResult,
 )
+from python_bugreport_parser.plugins.budget import checkpoint
+
+INTERACTION_PREFIX = "Interaction with: "
+HEX_ID = re.compile(r"[0-9a-fA-F]+")
 
 
 @dataclass
@@ -47,6 +53,8 @@ class InteractionLog:
     interaction_id: str
     component: str
     attributes: Attributes
+    server: bool = False
+    timestamp: Optional[datetime] = None
 
     def __str__(self):
         return (
@@ -56,37 +64,110 @@ class InteractionLog:
         )
 
 
+@dataclass
+class InteractionTable:
+    """
+    The first window of each input_interaction line, one list per column, in
+    the order of the log.
+    """
+
+    timestamps: List[datetime] = field(default_factory=list)
+    window_ids: List[Optional[str]] = field(default_factory=list)
+    components: List[str] = field(default_factory=list)
+    servers: List[bool] = field(default_factory=list)
+    attributes: List[Optional[Dict[str, str]]] = field(default_factory=list)
+    # Row numbers by timestamp, then by log order
+    _by_time: List[int] = field(default_factory=list, repr=False)
+    _sorted_timestamps: List[datetime] = field(default_factory=list, repr=False)
+
+    @classmethod
+    def from_lines(cls, lines: List[LogcatLine]) -> "InteractionTable":
+        table = cls()
+        for line in lines:
+            checkpoint()
+            message = line.message.split(INTERACTION_PREFIX, 1)[1]
+            entity = LastUserActivityPlugin._parse_message(message)
+            table.timestamps.append(line.timestamp)
+            table.window_ids.append(entity["id"])
+            table.components.append(entity["name"])
+            table.servers.append(entity["server"])
+            table.attributes.append(entity["attributes"])
+        table._by_time = sorted(
+            range(len(table.timestamps)), key=table.timestamps.__getitem__
+        )
+        table._sorted_timestamps = [table.timestamps[i] for i in table._by_time]
+        return table
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, row: int) -> InteractionLog:
+        return InteractionLog(
+            interaction_id=self.window_ids[row],
+            component=self.components[row],
+            attributes=self.attributes[row],
+            server=self.servers[row],
+            timestamp=self.timestamps[row],
+        )
+
+    def __iter__(self) -> Iterator[InteractionLog]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def last_before(self, timestamp: datetime) -> Optional[int]:
+        """
+        Row of the last interaction strictly before `timestamp`, the latest
+        in the log among interactions at the same time.
+        :return: None if there is no interaction before.
+        """
+        index = bisect.bisect_left(self._sorted_timestamps, timestamp)
+        return self._by_time[index - 1] if index > 0 else None
+
+
 class LastUserActivityPlugin(BasePlugin):
     def __init__(self):
         super().__init__(name="LastUserActivityPlugin", dependencies=None)
-        self.timestamp = datetime.now()
-        self.input_interactions: List[LogcatSection] = []
 
     def version(self) -> str:
-        return "1.0.0"
+        return "1.1.1"
+
+    def requirements(self) -> DataRequirements:
+        return DataRequirements.of(sections=["EVENT LOG"])
 
     def analyze(self, analysis_context: BugreportAnalysisContext) -> PluginResult:
         """Extract timestamp from bugreport metadata"""
         bugreport: BugreportTxt = analysis_context.bugreport.bugreport.bugreport_txt
         event_log = next((s for s in bugreport.sections if s.name == "EVENT LOG"), None)
-        if not event_log:
-            # call the parent class analyze method
-            return
-
-        content: LogcatSection = event_log.content
-        input_interactions = content.search_by_tag("input_interaction") or []
-        print(
-            f"Found {len(input_interactions)} input interactions, {input_interactions[0]}"
-        )
-        self.input_interactions = LastUserActivityPlugin._parse_log(input_interactions)
+        input_interactions = []
+        if event_log:
+            content: LogcatSection = event_log.content
+            input_interactions = content.search_by_tag("input_interaction") or []
+        if input_interactions:
+            print(
+                f"Found {len(input_interactions)} input interactions, "
+                f"{input_interactions[0]}"
+            )
+        else:
+            print("No input interactions found")
+        # An empty table without the EVENT LOG, so that consumers see one shape
+        table = InteractionTable.from_lines(input_interactions)
+        last_before_error = None
+        if bugreport.error_timestamp is not None:
+            last_before_error = table.last_before(bugreport.error_timestamp)
         return PluginResult(
-            self.input_interactions, metadata={"description": "Interaction Log"}
+            table,
+            metadata={
+                "description": "Interaction Log",
+                "last_before_error": last_before_error,
+            },
         )
 
-    def report(self) -> str:
-        # Bugreport timestamp: 2024-08-16T10:02:11
-        result = "\n".join([str(action) for action in self.input_interactions])
-        return result
+    def report(self, result: PluginResult) -> str:
+        return "\n".join(self.iter_report(result))
+
+    def iter_report(self, result: PluginResult) -> Iterator[str]:
+        for action in result.data:
+            yield str(action)
 
     @staticmethod
     def _split_components(s: str):
@@ -113,7 +194,7 @@ class LastUserActivityPlugin(BasePlugin):
         tokens = comp.split()
         if not tokens:
             return None
-        if re.match(r"^[0-9a-fA-F]+$", tokens[0]):
+        if HEX_ID.fullmatch(tokens[0]):
             entity["id"] = tokens[0]
             rest = tokens[1:]
         else:
@@ -137,30 +218,54 @@ class LastUserActivityPlugin(BasePlugin):
         return attributes
 
     @staticmethod
-    def _parse_log(lines: List[LogcatLine]):
-        parsed_logs = []
-        for line in lines:
-            message = line.message.split("Interaction with: ", 1)[1]
-            components = LastUserActivityPlugin._split_components(message)
-            interactions = []
-            for comp in components:
-                if comp.startswith("{") and comp.endswith("}"):
-                    if interactions:
-                        interactions[-1]["attributes"] = (
-                            LastUserActivityPlugin._parse_attributes(comp)
-                        )
-                else:
-                    entity = LastUserActivityPlugin._parse_entity(comp)
-                    if entity:
-                        interactions.append(entity)
-            interaction = interactions[0]
-            result = InteractionLog(
-                interaction_id=interaction["id"],
-                component=interaction["name"],
-                attributes=interaction["attributes"],
+    def _parse_message(message: str) -> dict:
+        """
+        The first window of an interaction message, with its attributes.
+
+        Messages look like `3f1a2b com.foo/.Main (server), {visible=true}, 9e
+        NavigationBar0, {visible=true}`, and only their head is read. Messages
+        whose head has stray braces or empty components go through
+        `_split_components`, which handles the nesting.
+        """
+        head, sep, tail = message.partition(",")
+        entity = None
+        if "{" not in head and "}" not in head:
+            entity = LastUserActivityPlugin._parse_entity(head.strip())
+        if entity is None:
+            return LastUserActivityPlugin._parse_components(message)
+
+        rest = tail.lstrip()
+        if sep and rest.startswith("{"):
+            end = rest.find("}")
+            if end < 0 or "{" in rest[1:end]:
+                return LastUserActivityPlugin._parse_components(message)
+            after, sep, tail = rest[end + 1 :].partition(",")
+            if after.strip():
+                return LastUserActivityPlugin._parse_components(message)
+            entity["attributes"] = LastUserActivityPlugin._parse_attributes(
+                rest[: end + 1]
             )
-            parsed_logs.append(result)
-        return parsed_logs
+            rest = tail.lstrip()
+        # The next component must be a window, which ends the first one
+        if sep and rest.startswith(("{", "}", ",")):
+            return LastUserActivityPlugin._parse_components(message)
+        return entity
+
+    @staticmethod
+    def _parse_components(message: str) -> dict:
+        components = LastUserActivityPlugin._split_components(message)
+        interactions = []
+        for comp in components:
+            if comp.startswith("{") and comp.endswith("}"):
+                if interactions:
+                    interactions[-1]["attributes"] = (
+                        LastUserActivityPlugin._parse_attributes(comp)
+                    )
+            else:
+                entity = LastUserActivityPlugin._parse_entity(comp)
+                if entity:
+                    interactions.append(entity)
+        return interactions[0]
 
     @staticmethod
     def _parse_touchable_region(region_str: str) -> List[Tuple[int, int]]:
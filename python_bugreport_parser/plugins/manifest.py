@@ -0,0 +1,72 @@
+"""
+The built-in plugins, described without importing them.
+
+Importing a plugin module pulls in the parsers it uses, so the repo registers
+the specs below and only imports the modules of the plugins a run selects.
+A new plugin module must be listed here to be found.
+"""
+
+import importlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Type
+
+if TYPE_CHECKING:
+    from python_bugreport_parser.plugins import BasePlugin
+
+
+@dataclass(frozen=True)
+class PluginSpec:
+    """How to find a plugin: its name, dependencies and where its class lives."""
+
+    name: str
+    module: str
+    class_name: str
+    dependencies: List[str] = field(default_factory=list)
+
+    @classmethod
+    def of(cls, plugin: "BasePlugin") -> "PluginSpec":
+        """The spec of an already instantiated plugin."""
+        plugin_cls = type(plugin)
+        return cls(
+            plugin.name,
+            plugin_cls.__module__,
+            plugin_cls.__name__,
+            list(plugin.dependencies),
+        )
+
+    def load(self) -> Type["BasePlugin"]:
+        """Import the module of the plugin and return its class."""
+        module = importlib.import_module(self.module)
+        return getattr(module, self.class_name)
+
+    def instantiate(self) -> "BasePlugin":
+        plugin = self.load()()
+        if plugin.name != self.name or sorted(plugin.dependencies) != sorted(
+            self.dependencies
+        ):
+            raise Exception(
+                f"Plugin {self.class_name} does not match its manifest entry {self}"
+            )
+        return plugin
+
+
+def _builtin(name: str, module: str, dependencies: List[str] = None) -> PluginSpec:
+    return PluginSpec(
+        name,
+        f"python_bugreport_parser.plugins.{module}",
+        name,
+        dependencies or [],
+    )
+
+
+PLUGIN_MANIFEST: List[PluginSpec] = [
+    _builtin("AnrDigestPlugin", "anr_digest_plugin"),
+    _builtin("DumpstateProfilePlugin", "dumpstate_profile_plugin"),
+    _builtin("FocusRecentsPlugin", "focus_recents_plugin", ["InputFocusPlugin"]),
+    _builtin("InputFocusPlugin", "input_focus_plugin"),
+    _builtin("InvalidBugreportPlugin", "invalid_bugreport_plugin", ["TimestampPlugin"]),
+    _builtin("LastUserActivityPlugin", "last_user_activity_plugin"),
+    _builtin("RebootPlugin", "reboot_plugin"),
+    _builtin("TimestampPlugin", "timestamp_plugin"),
+    _builtin("WifiSwitchPlugin", "wifi_switch_plugin"),
+]
@@ -0,0 +1,254 @@
+"""
+Stream plugin results out as each plugin finishes, instead of building the
+whole report in memory.
+
+Three formats are supported:
+- "text": the rendered reports, as `PluginRepo.report_all` returns them.
+- "jsonl": structured records, one JSON object per line.
+- "binary": the same records, length-prefixed and zlib-compressed, see
+  `BinaryResultWriter`.
+
+The structured formats write, for each plugin, a header record
+`{"plugin", "version", "status", "metadata"}` with status "ok", "timed_out"
+or "skipped". For an "ok" result whose data is a list, the header holds the
+`count` of items and is followed by one `{"plugin", "item"}` record per item;
+other data is written into the header as `data`.
+"""
+
+import io
+import json
+import struct
+import sys
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime, time, timedelta
+from enum import Enum
+from typing import IO, TYPE_CHECKING, Any, BinaryIO, Dict, Iterable, Iterator, TextIO
+
+if TYPE_CHECKING:
+    from python_bugreport_parser.plugins import (
+        BasePlugin,
+        BugreportAnalysisContext,
+        PluginResult,
+    )
+
+WRITER_FORMATS = ("text", "jsonl", "binary")
+
+BINARY_MAGIC = b"BRPR\x01\n"
+_LENGTH = struct.Struct(">I")
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert the data of a plugin result into something `json` can write."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, Enum):
+        return to_jsonable(value.value)
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [to_jsonable(v) for v in value]
+    if is_dataclass(value):
+        return {
+            f.name: to_jsonable(getattr(value, f.name))
+            for f in fields(value)
+            if not f.name.startswith("_")
+        }
+    if hasattr(value, "__dict__"):
+        return {
+            k: to_jsonable(v) for k, v in vars(value).items() if not k.startswith("_")
+        }
+    return str(value)
+
+
+class ResultWriter(ABC):
+    """Receives the outcome of each plugin of a run as soon as it is done."""
+
+    def write_plugin(
+        self, plugin: "BasePlugin", analysis_context: "BugreportAnalysisContext"
+    ) -> None:
+        result = analysis_context.get_result(plugin.name)
+        if result is not None:
+            self.write_result(plugin, result)
+        elif plugin.name in analysis_context.timed_out:
+            budget = analysis_context.timed_out[plugin.name]
+            self.write_status(plugin, "timed_out", f"timed out after {budget}s")
+        elif plugin.name in analysis_context.skipped:
+            cause = analysis_context.skipped[plugin.name]
+            self.write_status(plugin, "skipped", f"skipped, {cause} timed out")
+        self.flush()
+
+    @abstractmethod
+    def write_result(self, plugin: "BasePlugin", result: "PluginResult") -> None:
+        pass
+
+    @abstractmethod
+    def write_status(self, plugin: "BasePlugin", status: str, message: str) -> None:
+        """A plugin without a result, e.g. because it timed out"""
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class TextResultWriter(ResultWriter):
+    """The rendered report of each plugin, followed by a newline."""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write_result(self, plugin: "BasePlugin", result: "PluginResult") -> None:
+        for i, line in enumerate(plugin.iter_report(result)):
+            if i:
+                self.stream.write("\n")
+            self.stream.write(line)
+        self.stream.write("\n")
+
+    def write_status(self, plugin: "BasePlugin", status: str, message: str) -> None:
+        self.stream.write(f"{plugin.name}: {message}\n")
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self.stream not in (sys.stdout, sys.stderr):
+            self.stream.close()
+
+
+class StructuredResultWriter(ResultWriter):
+    """Writes the records described in the module docstring."""
+
+    @abstractmethod
+    def write_record(self, record: Dict[str, Any]) -> None:
+        pass
+
+    def write_result(self, plugin: "BasePlugin", result: "PluginResult") -> None:
+        header = {
+            "plugin": plugin.name,
+            "version": plugin.version(),
+            "status": "ok",
+            "metadata": to_jsonable(result.metadata),
+        }
+        if isinstance(result.data, list):
+            header["count"] = len(result.data)
+            self.write_record(header)
+            for item in result.data:
+                self.write_record({"plugin": plugin.name, "item": to_jsonable(item)})
+        else:
+            header["data"] = to_jsonable(result.data)
+            self.write_record(header)
+
+    def write_status(self, plugin: "BasePlugin", status: str, message: str) -> None:
+        self.write_record(
+            {
+                "plugin": plugin.name,
+                "version": plugin.version(),
+                "status": status,
+                "message": message,
+            }
+        )
+
+
+class JsonLinesResultWriter(StructuredResultWriter):
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write_record(self, record: Dict[str, Any]) -> None:
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self.stream not in (sys.stdout, sys.stderr):
+            self.stream.close()
+
+
+class BinaryResultWriter(StructuredResultWriter):
+    """
+    `BINARY_MAGIC`, then one zlib stream holding the records, each as a 4-byte
+    big-endian length followed by the UTF-8 JSON of the record. The zlib
+    stream is flushed after every plugin, so a reader can decode the results
+    of the finished plugins while the run goes on, see `read_binary_results`.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.compressor = zlib.compressobj()
+        self.stream.write(BINARY_MAGIC)
+
+    def write_record(self, record: Dict[str, Any]) -> None:
+        payload = json.dumps(record, ensure_ascii=False).encode("utf-8")
+        self.stream.write(self.compressor.compress(_LENGTH.pack(len(payload))))
+        self.stream.write(self.compressor.compress(payload))
+
+    def flush(self) -> None:
+        self.stream.write(self.compressor.flush(zlib.Z_SYNC_FLUSH))
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.stream.write(self.compressor.flush())
+        self.stream.flush()
+        if self.stream is not sys.stdout.buffer:
+            self.stream.close()
+
+
+def read_binary_results(
+    stream: BinaryIO, chunk_size: int = 64 * 1024
+) -> Iterator[Dict[str, Any]]:
+    """Decode the records written by a `BinaryResultWriter`, as they arrive."""
+    if stream.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("Not a binary result stream")
+    decompressor = zlib.decompressobj()
+    buffer = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += decompressor.decompress(chunk)
+        offset = 0
+        while len(buffer) - offset >= _LENGTH.size:
+            (length,) = _LENGTH.unpack_from(buffer, offset)
+            end = offset + _LENGTH.size + length
+            if len(buffer) < end:
+                break
+            yield json.loads(buffer[offset + _LENGTH.size : end].decode("utf-8"))
+            offset = end
+        buffer = buffer[offset:]
+    if buffer:
+        raise ValueError("Truncated binary result stream")
+
+
+def open_writer(output_format: str, path: str = "-") -> ResultWriter:
+    """
+    :param output_format: One of `WRITER_FORMATS`.
+    :param path: File to write to, "-" for stdout.
+    """
+    if output_format == "binary":
+        stream: IO = sys.stdout.buffer if path == "-" else open(path, "wb")
+        return BinaryResultWriter(stream)
+    if output_format not in WRITER_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    stream = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+    if output_format == "jsonl":
+        return JsonLinesResultWriter(stream)
+    return TextResultWriter(stream)
+
+
+def render_text(
+    plugins: Iterable["BasePlugin"], analysis_context: "BugreportAnalysisContext"
+) -> str:
+    """The text reports of some plugins as one string, without a final newline."""
+    buffer = io.StringIO()
+    writer = TextResultWriter(buffer)
+    for plugin in plugins:
+        writer.write_plugin(plugin, analysis_context)
+    return buffer.getvalue()[:-1]
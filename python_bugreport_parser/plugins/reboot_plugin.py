@@ -1,24 +1,42 @@
-from datetime import datetime
+import copy
+from datetime import timedelta
+from typing import Iterator, List, Optional, Set
 
 from python_bugreport_parser.bugreport import BugreportTxt
+from python_bugreport_parser.bugreport.dumpstate_board import MiniDumpRecord
 from python_bugreport_parser.bugreport.dumpsys_entry import (
     LocalRebootRecord,
     MqsServiceDumpsysEntry,
 )
+from python_bugreport_parser.bugreport.requirements import DataRequirements
 from python_bugreport_parser.plugins import (
     BasePlugin,
     BugreportAnalysisContext,
     PluginResult,
 )
+from python_bugreport_parser.plugins.budget import checkpoint
+from python_bugreport_parser.plugins.timeline_join import TimelineIndex
 
 
 class RebootPlugin(BasePlugin):
-    def __init__(self):
+    def __init__(self, tolerance: Optional[timedelta] = None):
+        """
+        :param tolerance: Largest time difference between a minidump and the
+            boot record it is merged into, None for no limit.
+        """
         super().__init__(name="RebootPlugin", dependencies=None)
-        self.reboot_records = []
+        self.tolerance = tolerance
 
     def version(self) -> str:
-        return "1.0.0"
+        if self.tolerance is None:
+            return "1.0.0"
+        # Results cached with another tolerance are not reused
+        return f"1.0.0+tolerance={self.tolerance.total_seconds()}"
+
+    def requirements(self) -> DataRequirements:
+        return DataRequirements.of(
+            dumpsys_services=["miui.mqsas.MQSService"], dumpstate_board=True
+        )
 
     def analyze(self, analysis_context: BugreportAnalysisContext) -> PluginResult:
         """Extract timestamp from bugreport metadata"""
@@ -29,47 +47,51 @@ class RebootPlugin(BasePlugin):
             (s for s in dumpsys.content.entries if s.name == "miui.mqsas.MQSService"),
             None,
         )
-        reboot_records = mqs_dumpsys.boot_records
         minidump_records = analysis_context.bugreport.bugreport.dumpstate_board.mini_dump_records
-        augmented = []
+        reboot_records = RebootPlugin._merge_minidumps(
+            mqs_dumpsys.boot_records, minidump_records, self.tolerance
+        )
+        return PluginResult(reboot_records, metadata={"description": "RebootRecords"})
+
+    @staticmethod
+    def _merge_minidumps(
+        boot_records: List[LocalRebootRecord],
+        minidump_records: List[MiniDumpRecord],
+        tolerance: Optional[timedelta] = None,
+    ) -> List[LocalRebootRecord]:
+        """
+        Merge each minidump into the boot record nearest to it in time, if
+        that is a kernel reboot no other minidump was merged into. Other
+        minidumps are kept as records of their own, which later minidumps can
+        be merged into. The parsed boot records are left untouched.
+        :param tolerance: Largest time difference of a merge, None for no limit.
+        :return: All records sorted by timestamp.
+        """
+        timeline = TimelineIndex(copy.copy(record) for record in boot_records)
+        merged: Set[int] = set()
         for minidump_record in minidump_records:
-            min_index, min_time_diff = -1, 10000000000
+            checkpoint()
             new_record = LocalRebootRecord()
             new_record.timestamp = minidump_record.timestamp
             new_record.miui_version = minidump_record.version
             new_record.boot_reason = minidump_record.crash_reason.strip()
             new_record.detail = minidump_record.crash_details.strip()
             new_record.is_kernel_reboot = True
-            for i, reboot_record in enumerate(reboot_records):
-                if (
-                    abs(
-                        minidump_record.timestamp - reboot_record.timestamp
-                    ).total_seconds()
-                    < min_time_diff
-                ):
-                    min_time_diff = abs(
-                        minidump_record.timestamp - reboot_record.timestamp
-                    ).total_seconds()
-                    min_index = i
+            nearest = timeline.nearest(minidump_record.timestamp, tolerance)
             if (
-                min_index != -1
-                and min_index not in augmented
-                and reboot_records[min_index].is_kernel_reboot
+                nearest is not None
+                and nearest not in merged
+                and timeline[nearest].is_kernel_reboot
             ):
-                reboot_records[min_index].merge_records(new_record)
-                augmented.append(min_index)
+                timeline[nearest].merge_records(new_record)
+                merged.add(nearest)
             else:
-                reboot_records.append(new_record)
+                timeline.add(new_record)
+        return list(timeline.in_order())
 
-        self.reboot_records = sorted(
-            reboot_records,
-            key=lambda x: x.timestamp,
-        )
-        return (
-            PluginResult(
-                self.reboot_records, metadata={"description": "RebootRecords"}
-            ),
-        )
+    def report(self, result: PluginResult) -> str:
+        return "\n".join(self.iter_report(result))
 
-    def report(self) -> str:
-        return "\n".join([str(record) for record in self.reboot_records])
+    def iter_report(self, result: PluginResult) -> Iterator[str]:
+        for record in result.data:
+            yield str(record)
@@ -0,0 +1,118 @@
+"""
+A persistent cache of plugin results.
+
+A result is keyed by the fingerprint of the report, the plugin name, its
+`version()`, the keys of the results it depends on, the version of the
+parsers and the logcat window the report was loaded with. Bumping the version
+of one plugin therefore invalidates it and everything downstream of it, while
+every other plugin of a re-run is served from the cache. Bumping
+`PARSER_VERSION` invalidates every result.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from python_bugreport_parser.plugins import BasePlugin, PluginResult
+
+
+def plugin_cache_key(
+    report_fingerprint: str,
+    plugin: "BasePlugin",
+    dependency_keys: List[str],
+    logcat_window: Optional[timedelta] = None,
+) -> str:
+    """
+    :param logcat_window: The window of logcat lines the report was loaded
+        with, see `DataRequirements.logcat_window`. Plugins may see fewer
+        lines than they asked for, e.g. through `run_all(logcat_window=...)`.
+    """
+    # Imported here to keep the bugreport package out of a plain plugins import
+    from python_bugreport_parser.bugreport.bugreport_txt import PARSER_VERSION
+
+    payload = json.dumps(
+        [
+            report_fingerprint,
+            plugin.name,
+            plugin.version(),
+            dependency_keys,
+            PARSER_VERSION,
+            None if logcat_window is None else logcat_window.total_seconds(),
+        ]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def resolve_cache_keys(
+    report_fingerprint: str,
+    plugins: List["BasePlugin"],
+    logcat_window: Optional[timedelta] = None,
+) -> Dict[str, str]:
+    """
+    Cache keys of plugins in topological order. Keys only depend on the keys
+    of the dependencies, not on their results, so they are known before any
+    plugin runs.
+    """
+    keys: Dict[str, str] = {}
+    for plugin in plugins:
+        dependency_keys = [keys[dep] for dep in sorted(plugin.dependencies)]
+        keys[plugin.name] = plugin_cache_key(
+            report_fingerprint, plugin, dependency_keys, logcat_window
+        )
+    return keys
+
+
+class PluginResultCache:
+    """
+    Pickled plugin results in `<root>/<key[:2]>/<key>.pickle`.
+    Writes are atomic, so several processes can share a cache.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pickle"
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def get(self, key: str) -> Optional["PluginResult"]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:  # pylint: disable=broad-except
+            # A result written by an incompatible version of the code
+            print(f"Failed to read cached result {key}: {e}")
+            return None
+
+    def put(self, key: str, result: "PluginResult") -> bool:
+        """
+        Store the result of a plugin run.
+        Returns False if the result cannot be serialized.
+        """
+        try:
+            payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Not caching result {key}: {e}")
+            return False
+
+        path = self._path(key)
+        os.makedirs(path.parent, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return True
+
+    def invalidate(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
@@ -0,0 +1,441 @@
+"""
+Run plugins as a dependency DAG: each plugin starts as soon as all of its
+dependencies have finished, on a thread or process pool.
+"""
+
+import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from python_bugreport_parser.plugins.budget import (
+    PluginBudgets,
+    PluginTimeout,
+    deadline,
+)
+from python_bugreport_parser.plugins.instrumentation import (
+    PluginRunStats,
+    measure_plugin,
+)
+from python_bugreport_parser.plugins.result_cache import (
+    PluginResultCache,
+    resolve_cache_keys,
+)
+
+if TYPE_CHECKING:
+    from python_bugreport_parser.plugins import (
+        BasePlugin,
+        BugreportAnalysisContext,
+        PluginResult,
+    )
+
+SCHEDULER_MODES = ("serial", "thread", "process")
+
+
+@dataclass
+class PluginOutcome:
+    result: Optional["PluginResult"]  # None if the plugin timed out
+    stats: PluginRunStats
+
+
+def execute_plugin(
+    plugin: "BasePlugin",
+    analysis_context: "BugreportAnalysisContext",
+    trace_memory: bool = False,
+    budget: Optional[float] = None,
+) -> PluginOutcome:
+    """
+    Run one plugin. This is what the workers of the pool execute.
+    :param budget: Seconds the plugin may take, its result is dropped if it
+        takes longer.
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        with deadline(plugin.name, budget):
+            result, stats = measure_plugin(plugin, analysis_context, trace_memory)
+    except PluginTimeout:
+        stats = PluginRunStats(
+            plugin.name,
+            plugin.version(),
+            time.perf_counter() - wall_start,
+            time.thread_time() - cpu_start,
+            timed_out=True,
+        )
+        return PluginOutcome(None, stats)
+    if budget is not None and stats.wall_time > budget:
+        # Overran without reaching a checkpoint
+        stats.timed_out = True
+        result = None
+    return PluginOutcome(result, stats)
+
+
+@dataclass
+class ScheduleReport:
+    mode: str
+    wall_time: float = 0.0
+    # Seconds spent loading the report before the first plugin ran
+    load_time: float = 0.0
+    loaded: bool = False
+    durations: Dict[str, float] = field(default_factory=dict)
+    critical_path: List[str] = field(default_factory=list)
+    cached: List[str] = field(default_factory=list)  # served from the result cache
+    reused: List[str] = field(default_factory=list)  # up to date in the context
+    recomputed: List[str] = field(default_factory=list)  # actually executed
+    timed_out: List[str] = field(default_factory=list)
+    # Plugins skipped because a dependency timed out, and that dependency
+    skipped: Dict[str, str] = field(default_factory=dict)
+    # Fingerprint of the result of each plugin, see `resolve_cache_keys`
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def critical_path_time(self) -> float:
+        return sum(self.durations.get(name, 0.0) for name in self.critical_path)
+
+    def __str__(self):
+        return (
+            f"ScheduleReport(mode={self.mode}, wall_time={self.wall_time:.3f}s, "
+            f"load_time={self.load_time:.3f}s, "
+            f"critical_path={' -> '.join(self.critical_path)} "
+            f"({self.critical_path_time:.3f}s), cached={len(self.cached)}, "
+            f"reused={len(self.reused)}, timed_out={self.timed_out})"
+        )
+
+
+def critical_path(
+    plugins: List["BasePlugin"], durations: Dict[str, float]
+) -> List[str]:
+    """
+    The chain of dependent plugins with the longest total duration, which is
+    the lower bound of the wall time of a parallel run.
+
+    :param plugins: Plugins in topological order.
+    """
+    finish: Dict[str, float] = {}
+    previous: Dict[str, Optional[str]] = {}
+    for plugin in plugins:
+        slowest_dep = max(
+            (dep for dep in plugin.dependencies if dep in finish),
+            key=lambda dep: finish[dep],
+            default=None,
+        )
+        previous[plugin.name] = slowest_dep
+        finish[plugin.name] = durations.get(plugin.name, 0.0) + (
+            finish[slowest_dep] if slowest_dep else 0.0
+        )
+
+    path = []
+    name = max(finish, key=finish.get, default=None)
+    while name is not None:
+        path.append(name)
+        name = previous[name]
+    return list(reversed(path))
+
+
+class DagScheduler:
+    """
+    Execute plugins in dependency order.
+
+    In "serial" mode, plugins run one at a time in topological order, which is
+    the easiest to debug. In "thread" and "process" mode, each plugin is
+    submitted to a pool as soon as all of its dependencies have finished.
+    Results are always stored into the analysis context by the calling thread.
+
+    Runs are incremental: a result already in the context is kept if it was
+    computed with the same fingerprint, i.e. from the same report by the same
+    version of the plugin and from up to date dependencies. Only the other
+    plugins are executed again.
+
+    A plugin that runs out of its time budget gets no result, and the plugins
+    depending on it are skipped. Both are recorded in the analysis context.
+    The report is loaded before the first plugin runs, so that loading does
+    not count against the budget of the plugin reading it first.
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: Optional[int] = None,
+        trace_memory: bool = False,
+        result_cache: Optional[PluginResultCache] = None,
+        budgets: Optional[PluginBudgets] = None,
+        on_finish: Optional[Callable[["BasePlugin"], None]] = None,
+    ):
+        """
+        :param trace_memory: Record the peak memory of each plugin. The peak is
+            process-wide, so plugins cannot share a process while it is
+            measured: "thread" mode falls back to "serial".
+        :param result_cache: Skip plugins whose result is cached, and cache the
+            results of the others.
+        :param budgets: Wall-clock limits of the plugins, none by default.
+        :param on_finish: Called by the calling thread as soon as a plugin is
+            done, whether it ran, was reused, timed out or was skipped, e.g.
+            to stream results out, see `output.py`.
+        """
+        if mode not in SCHEDULER_MODES:
+            raise ValueError(f"Unknown scheduler mode: {mode}")
+        if trace_memory and mode == "thread":
+            print("Tracing memory, running plugins serially")
+            mode = "serial"
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count()
+        self.trace_memory = trace_memory
+        self.result_cache = result_cache
+        self.budgets = budgets or PluginBudgets()
+        self.on_finish = on_finish
+
+    def run(
+        self,
+        plugins: List["BasePlugin"],
+        analysis_context: "BugreportAnalysisContext",
+    ) -> ScheduleReport:
+        """
+        :param plugins: Plugins in topological order, see
+            `PluginRepo.resolve_execution_order`.
+        :param analysis_context: Receives the result of every plugin.
+        """
+        start = time.perf_counter()
+        report = self._prepare(plugins, analysis_context)
+        if self.mode == "serial":
+            for plugin in plugins:
+                if not (
+                    self._skip_blocked(plugin, analysis_context, report)
+                    or self._load_existing(plugin, analysis_context, report)
+                ):
+                    self._load_report(analysis_context, report)
+                    outcome = execute_plugin(
+                        plugin,
+                        analysis_context,
+                        self.trace_memory,
+                        self.budgets.for_plugin(plugin.name),
+                    )
+                    self._apply(outcome, plugin, analysis_context, report)
+                self._finished(plugin)
+        else:
+            executor_cls = (
+                ThreadPoolExecutor if self.mode == "thread" else ProcessPoolExecutor
+            )
+            with executor_cls(max_workers=self.max_workers) as executor:
+                self._run_parallel(executor, plugins, analysis_context, report)
+        self._complete(plugins, report, start)
+        return report
+
+    def _prepare(
+        self,
+        plugins: List["BasePlugin"],
+        analysis_context: "BugreportAnalysisContext",
+    ) -> ScheduleReport:
+        report = ScheduleReport(mode=self.mode)
+        bugreport = analysis_context.bugreport
+        if hasattr(bugreport, "cache_fingerprint"):
+            # Only cached results need the report hashed by content
+            fingerprint = bugreport.cache_fingerprint(self.result_cache is not None)
+        else:
+            fingerprint = getattr(bugreport, "fingerprint", "")
+        # The plugins only see the logcat lines the report was loaded with
+        requirements = getattr(bugreport, "requirements", None)
+        logcat_window = None
+        if requirements is not None and requirements.wants_logcat():
+            logcat_window = requirements.logcat_window
+        report.fingerprints = resolve_cache_keys(fingerprint, plugins, logcat_window)
+        if self.result_cache is not None and fingerprint:
+            analysis_context.result_keys.update(report.fingerprints)
+        for plugin in plugins:
+            analysis_context.timed_out.pop(plugin.name, None)
+            analysis_context.skipped.pop(plugin.name, None)
+        return report
+
+    def _load_report(
+        self,
+        analysis_context: "BugreportAnalysisContext",
+        report: ScheduleReport,
+    ) -> None:
+        """
+        Load the components of the report, for the requirements set by
+        `require`, outside of the time budgets. Only done once a plugin has to
+        be executed, so fully cached runs do not load anything.
+        """
+        if report.loaded:
+            return
+        report.loaded = True
+        preload = getattr(analysis_context.bugreport, "preload", None)
+        if preload is None:
+            return
+        start = time.perf_counter()
+        preload()
+        report.load_time = time.perf_counter() - start
+
+    def _complete(
+        self, plugins: List["BasePlugin"], report: ScheduleReport, start: float
+    ) -> None:
+        report.wall_time = time.perf_counter() - start
+        report.critical_path = critical_path(plugins, report.durations)
+
+    def _run_parallel(
+        self,
+        executor: Executor,
+        plugins: List["BasePlugin"],
+        analysis_context: "BugreportAnalysisContext",
+        report: ScheduleReport,
+    ) -> None:
+        names = {plugin.name for plugin in plugins}
+        waiting_on = {
+            plugin.name: {dep for dep in plugin.dependencies if dep in names}
+            for plugin in plugins
+        }
+        dependents: Dict[str, List["BasePlugin"]] = {name: [] for name in names}
+        for plugin in plugins:
+            for dep in waiting_on[plugin.name]:
+                dependents[dep].append(plugin)
+
+        running: Dict[Future, "BasePlugin"] = {}
+
+        def release(plugin: "BasePlugin") -> List["BasePlugin"]:
+            """Mark a plugin as done, and return the dependents it unblocks"""
+            ready = []
+            for dependent in dependents[plugin.name]:
+                waiting_on[dependent.name].discard(plugin.name)
+                if not waiting_on[dependent.name]:
+                    ready.append(dependent)
+            return ready
+
+        def submit(ready: List["BasePlugin"]) -> None:
+            while ready:
+                plugin = ready.pop()
+                if self._skip_blocked(
+                    plugin, analysis_context, report
+                ) or self._load_existing(plugin, analysis_context, report):
+                    self._finished(plugin)
+                    ready.extend(release(plugin))
+                    continue
+                self._load_report(analysis_context, report)
+                future = executor.submit(
+                    execute_plugin,
+                    plugin,
+                    analysis_context,
+                    self.trace_memory,
+                    self.budgets.for_plugin(plugin.name),
+                )
+                running[future] = plugin
+
+        submit([plugin for plugin in plugins if not waiting_on[plugin.name]])
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                plugin = running.pop(future)
+                try:
+                    outcome = future.result()
+                except BaseException:
+                    # Same as a serial run: nothing is scheduled after a failure
+                    for pending in running:
+                        pending.cancel()
+                    raise
+                self._apply(outcome, plugin, analysis_context, report)
+                self._finished(plugin)
+                submit(release(plugin))
+
+    def _finished(self, plugin: "BasePlugin") -> None:
+        if self.on_finish is not None:
+            self.on_finish(plugin)
+
+    def _skip_blocked(
+        self,
+        plugin: "BasePlugin",
+        analysis_context: "BugreportAnalysisContext",
+        report: ScheduleReport,
+    ) -> bool:
+        """Skip a plugin whose dependency timed out or was skipped itself"""
+        for dep in plugin.dependencies:
+            cause = dep if dep in report.timed_out else report.skipped.get(dep)
+            if cause is not None:
+                analysis_context.remove_result(plugin.name)
+                analysis_context.skipped[plugin.name] = cause
+                report.skipped[plugin.name] = cause
+                report.durations[plugin.name] = 0.0
+                return True
+        return False
+
+    def _load_existing(
+        self,
+        plugin: "BasePlugin",
+        analysis_context: "BugreportAnalysisContext",
+        report: ScheduleReport,
+    ) -> bool:
+        """Use an up to date result from the context or the result cache"""
+        return self._reuse(plugin, analysis_context, report) or self._load_cached(
+            plugin, analysis_context, report
+        )
+
+    def _reuse(
+        self,
+        plugin: "BasePlugin",
+        analysis_context: "BugreportAnalysisContext",
+        report: ScheduleReport,
+    ) -> bool:
+        fingerprint = analysis_context.result_fingerprints.get(plugin.name)
+        if (
+            fingerprint != report.fingerprints[plugin.name]
+            or analysis_context.get_result(plugin.name) is None
+        ):
+            return False
+        report.durations[plugin.name] = 0.0
+        report.reused.append(plugin.name)
+        return True
+
+    def _load_cached(
+        self,
+        plugin: "BasePlugin",
+        analysis_context: "BugreportAnalysisContext",
+        report: ScheduleReport,
+    ) -> bool:
+        key = analysis_context.result_keys.get(plugin.name)
+        if key is None:
+            return False
+        cached = self.result_cache.get(key)
+        if cached is None:
+            return False
+        analysis_context.set_result(plugin.name, cached)
+        analysis_context.result_fingerprints[plugin.name] = key
+        analysis_context.plugin_stats[plugin.name] = PluginRunStats(
+            plugin.name, plugin.version(), 0.0, 0.0, cached=True
+        )
+        report.durations[plugin.name] = 0.0
+        report.cached.append(plugin.name)
+        return True
+
+    def _apply(
+        self,
+        outcome: PluginOutcome,
+        plugin: "BasePlugin",
+        analysis_context: "BugreportAnalysisContext",
+        report: ScheduleReport,
+    ) -> None:
+        if outcome.stats.timed_out:
+            print(f"{plugin.name} timed out after {outcome.stats.wall_time:.3f}s")
+            analysis_context.remove_result(plugin.name)
+            analysis_context.plugin_stats[plugin.name] = outcome.stats
+            analysis_context.timed_out[plugin.name] = self.budgets.for_plugin(
+                plugin.name
+            )
+            report.durations[plugin.name] = outcome.stats.wall_time
+            report.timed_out.append(plugin.name)
+            return
+        analysis_context.set_result(plugin.name, outcome.result)
+        analysis_context.result_fingerprints[plugin.name] = report.fingerprints[
+            plugin.name
+        ]
+        analysis_context.plugin_stats[plugin.name] = outcome.stats
+        report.durations[plugin.name] = outcome.stats.wall_time
+        report.recomputed.append(plugin.name)
+        key = analysis_context.result_keys.get(plugin.name)
+        if key is not None:
+            self.result_cache.put(key, outcome.result)
@@ -0,0 +1,142 @@
+"""
+Join records from different sources by timestamp, e.g. the minidumps of
+dumpstate_board with the boot records of the MQS service.
+
+Records are kept sorted by timestamp, so looking up the record nearest to a
+time is a bisection instead of a scan. Equally near records are told apart by
+the order they were added in, the first one wins, as a linear scan keeping
+the first minimum does.
+"""
+
+import bisect
+from datetime import datetime, timedelta
+from typing import (
+    Callable,
+    Container,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+
+def _timestamp(record) -> datetime:
+    return record.timestamp
+
+
+class TimelineIndex(Generic[T]):
+    """
+    Records sorted by timestamp. A record is identified by its position in
+    `records`, which is the order it was added in.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[T] = (),
+        key: Callable[[T], datetime] = _timestamp,
+    ):
+        """
+        :param key: Timestamp of a record, its `timestamp` attribute by default.
+        """
+        self.key = key
+        self.records: List[T] = list(records)
+        order = sorted(range(len(self.records)), key=lambda i: key(self.records[i]))
+        # Timestamps in ascending order, and the positions of their records,
+        # ascending among equal timestamps
+        self._times: List[datetime] = [key(self.records[i]) for i in order]
+        self._positions: List[int] = order
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, position: int) -> T:
+        return self.records[position]
+
+    def add(self, record: T) -> int:
+        """Add a record, and return its position."""
+        position = len(self.records)
+        self.records.append(record)
+        timestamp = self.key(record)
+        # After the records with the same timestamp, which were added before
+        index = bisect.bisect_right(self._times, timestamp)
+        self._times.insert(index, timestamp)
+        self._positions.insert(index, position)
+        return position
+
+    def nearest(
+        self,
+        timestamp: datetime,
+        tolerance: Optional[timedelta] = None,
+        exclude: Container[int] = (),
+    ) -> Optional[int]:
+        """
+        Position of the record nearest to `timestamp`, the first added one
+        among equally near records.
+        :param tolerance: Largest distance of a match, None for no limit.
+        :param exclude: Positions of records that cannot match, e.g. the ones
+            already paired.
+        :return: None if there is no record within the tolerance.
+        """
+        index = bisect.bisect_left(self._times, timestamp)
+        best: Optional[Tuple[timedelta, int]] = None
+        # The first record at or after the timestamp
+        for i in range(index, len(self._times)):
+            distance = self._times[i] - timestamp
+            if tolerance is not None and distance > tolerance:
+                break
+            if self._positions[i] not in exclude:
+                best = (distance, self._positions[i])
+                break
+        # The first record at the latest time before the timestamp, going
+        # down through equal times to the first added one
+        for i in range(index - 1, -1, -1):
+            distance = timestamp - self._times[i]
+            if (tolerance is not None and distance > tolerance) or (
+                best is not None and distance > best[0]
+            ):
+                break
+            if self._positions[i] not in exclude:
+                candidate = (distance, self._positions[i])
+                if best is None or candidate < best:
+                    best = candidate
+        return None if best is None else best[1]
+
+    def in_order(self) -> Iterator[T]:
+        """The records by timestamp, then by the order they were added in."""
+        for position in self._positions:
+            yield self.records[position]
+
+
+def join_nearest(
+    left: Iterable[T],
+    right: Iterable[U],
+    tolerance: Optional[timedelta] = None,
+    left_key: Callable[[T], datetime] = _timestamp,
+    right_key: Callable[[U], datetime] = _timestamp,
+) -> List[Tuple[T, Optional[U]]]:
+    """
+    Pair each left record with the right record nearest to it in time.
+    A right record is paired at most once: a left record whose nearest right
+    record is already taken, by an earlier left record, gets the nearest one
+    that is not, if there is one within the tolerance.
+    :return: (left record, right record or None) for every left record, in
+        the order of `left`.
+    """
+    index = TimelineIndex(right, right_key)
+    taken: Set[int] = set()
+    pairs: List[Tuple[T, Optional[U]]] = []
+    for record in left:
+        position = index.nearest(left_key(record), tolerance, taken)
+        if position is None:
+            pairs.append((record, None))
+        else:
+            taken.add(position)
+            pairs.append((record, index[position]))
+    return pairs
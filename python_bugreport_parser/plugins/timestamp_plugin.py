@@ -1,5 +1,5 @@
-from datetime import datetime
 from python_bugreport_parser.bugreport import BugreportTxt
+from python_bugreport_parser.bugreport.requirements import DataRequirements
 from python_bugreport_parser.plugins import (
     BasePlugin,
     BugreportAnalysisContext,
@@ -10,20 +10,21 @@ from python_bugreport_parser.plugins import (
 class TimestampPlugin(BasePlugin):
     def __init__(self):
         super().__init__(name="TimestampPlugin", dependencies=None)
-        self.timestamp = datetime.now()
 
     def version(self) -> str:
         return "1.0.0"
 
+    def requirements(self) -> DataRequirements:
+        # Only the metadata, which is always parsed
+        return DataRequirements()
+
     def analyze(self, analysis_context: BugreportAnalysisContext) -> PluginResult:
         """Extract timestamp from bugreport metadata"""
         bugreport: BugreportTxt = analysis_context.bugreport.bugreport.bugreport_txt
-        self.timestamp = bugreport.metadata.timestamp
-        print(f"Analyzed timestamps: {self.timestamp}")
-        return PluginResult(
-            self.timestamp, metadata={"description": "Bugreport timestamp"}
-        )
+        timestamp = bugreport.metadata.timestamp
+        print(f"Analyzed timestamps: {timestamp}")
+        return PluginResult(timestamp, metadata={"description": "Bugreport timestamp"})
 
-    def report(self) -> str:
+    def report(self, result: PluginResult) -> str:
         # Bugreport timestamp: 2024-08-16T10:02:11
-        return f"Bugreport timestamp: {self.timestamp.isoformat()}"
+        return f"Bugreport timestamp: {result.data.isoformat()}"
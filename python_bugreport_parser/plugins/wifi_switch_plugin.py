@@ -6,21 +6,27 @@ from python_bugreport_parser.bugreport.dumpsys_entry import (
     LocalRebootRecord,
     MqsServiceDumpsysEntry,
 )
+from python_bugreport_parser.bugreport.requirements import DataRequirements
 from python_bugreport_parser.plugins import (
     BasePlugin,
     BugreportAnalysisContext,
     PluginResult,
 )
+from python_bugreport_parser.plugins.dumpsys_grep import DumpsysGrep
+
+WIFI_SWITCH_GREP = DumpsysGrep(["setWifiEnabledInternal"])
 
 
 class WifiSwitchPlugin(BasePlugin):
     def __init__(self):
         super().__init__(name="WifiSwitchPlugin", dependencies=None)
-        self.switch_records = []
 
     def version(self) -> str:
         return "1.0.0"
 
+    def requirements(self) -> DataRequirements:
+        return DataRequirements.of(dumpsys_services=["wifi"])
+
     def analyze(self, analysis_context: BugreportAnalysisContext) -> PluginResult:
         """Extract timestamp from bugreport metadata"""
         bugreport_txt: BugreportTxt = analysis_context.bugreport.bugreport.bugreport_txt
@@ -35,13 +41,12 @@ class WifiSwitchPlugin(BasePlugin):
                 [], metadata={"description": "WifiSwitch"}
             )
 
-        for line in wifi_dumpsys.data.splitlines():
-            if "setWifiEnabledInternal" in line:
-                self.switch_records.append(line)
+        switch_records = [
+            match.line(wifi_dumpsys.data)
+            for match in WIFI_SWITCH_GREP.search_entry(wifi_dumpsys)
+        ]
 
-        return PluginResult(
-            self.switch_records, metadata={"description": "WifiSwitch"}
-        )
+        return PluginResult(switch_records, metadata={"description": "WifiSwitch"})
 
-    def report(self) -> str:
-        return "\n".join(self.switch_records)
+    def report(self, result: PluginResult) -> str:
+        return "\n".join(result.data)
@@ -0,0 +1,253 @@
+"""
+A memory-bounded cache of loaded reports for long-running processes, such as
+notebooks and services that keep many `Log284` objects around.
+
+Reports are kept under a memory budget with LRU eviction. An evicted report is
+pickled into a snapshot file first, so loading it again skips the text parsing.
+A snapshot is only used if it was written from the same files by the same
+version of the parsers, see `snapshot_header`.
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+import sys
+import threading
+import types
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+from python_bugreport_parser.bugreport.bugreport_all import Bugreport, Log284
+from python_bugreport_parser.bugreport.bugreport_txt import PARSER_VERSION
+
+DEFAULT_MAX_BYTES = 4 * 1024**3
+# Lists longer than this are sized from a sample of SAMPLE_SIZE items
+SAMPLE_THRESHOLD = 4096
+SAMPLE_SIZE = 256
+# Bump when the pickled classes change, e.g. when `Section` gets a new field
+SNAPSHOT_VERSION = 2
+
+Report = Union[Log284, Bugreport]
+
+# Objects that are shared with the rest of the process, or backed by files,
+# and therefore not retained by a report
+_UNSIZED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    mmap.mmap,
+)
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    Approximate the memory retained by an object graph, by summing
+    `sys.getsizeof` over every object reachable through containers and
+    instance attributes. Objects reachable through several paths count once.
+    Long lists, such as the entries of a logcat section, are extrapolated from
+    an evenly spaced sample of their items.
+    """
+    return _estimate_size(obj, set())
+
+
+def _estimate_size(obj: Any, seen: set) -> int:
+    stack = [obj]
+    size = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _UNSIZED_TYPES):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+
+        if isinstance(current, (str, bytes, int, float, bool)) or current is None:
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple)) and len(current) > SAMPLE_THRESHOLD:
+            step = len(current) // SAMPLE_SIZE
+            sample = current[::step]
+            sampled = sum(_estimate_size(item, seen) for item in sample)
+            size += sampled * len(current) // len(sample)
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        if hasattr(current, "__dict__"):
+            stack.append(vars(current))
+        for slot in getattr(type(current), "__slots__", ()):
+            if hasattr(current, slot):
+                stack.append(getattr(current, slot))
+    return size
+
+
+def snapshot_header(fingerprint: str) -> tuple:
+    """Written before the report in a snapshot, which is valid if it matches."""
+    return (SNAPSHOT_VERSION, PARSER_VERSION, fingerprint)
+
+
+def snapshot_fingerprint(report: Report) -> str:
+    """
+    The sizes and modification times of the input files of a report, like the
+    `.extracted` marker of an extraction. Hashing their contents is left to
+    the keys of the result cache.
+    """
+    if report.bugreport_dirs is None:
+        return ""
+    return report.bugreport_dirs.stat_fingerprint()
+
+
+@dataclass
+class ReportCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    snapshot_loads: int = 0  # misses served from a snapshot
+    snapshot_writes: int = 0
+    entries: int = 0
+    retained_bytes: int = 0
+
+
+class ReportCache:
+    """
+    Keep loaded reports in memory under a budget, least recently used first out.
+
+    Reports are preloaded when they enter the cache, so that their measured
+    size is what they retain; the most recently used report is always kept,
+    even if it alone exceeds the budget.
+    """
+
+    def __init__(
+        self,
+        snapshot_dir: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        loader: Callable[[Path], Optional[Report]] = Log284.from_dir,
+    ):
+        """
+        :param snapshot_dir: Where the snapshots of evicted reports are kept.
+        :param max_bytes: Memory budget of the cached reports.
+        :param loader: Loads a report from its key (a feedback directory) on a
+            miss. Its `snapshot_fingerprint` tells whether the snapshot is
+            still valid.
+        """
+        self.snapshot_dir = Path(snapshot_dir)
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self._reports: "OrderedDict[str, Report]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._stats = ReportCacheStats()
+        self._lock = threading.RLock()
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+
+    def __contains__(self, key: Union[str, Path]) -> bool:
+        with self._lock:
+            return str(key) in self._reports
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._reports)
+
+    def _snapshot_path(self, key: str) -> Path:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.snapshot_dir / f"{digest}.pickle"
+
+    def get(self, key: Union[str, Path]) -> Optional[Report]:
+        """
+        Return the report of a feedback directory, loading it on a miss from
+        its snapshot if it is still valid, and from the text otherwise.
+        Loading does not hold the lock, so other reports are served meanwhile.
+        """
+        key = str(key)
+        with self._lock:
+            if key in self._reports:
+                self._stats.hits += 1
+                self._reports.move_to_end(key)
+                return self._reports[key]
+            self._stats.misses += 1
+
+        report = self.loader(Path(key))
+        if report is None:
+            return None
+        snapshot = self._read_snapshot(key, snapshot_fingerprint(report))
+        if snapshot is not None:
+            report = snapshot
+        with self._lock:
+            if snapshot is not None:
+                self._stats.snapshot_loads += 1
+            if key in self._reports:
+                # Loaded by another thread in the meantime
+                self._reports.move_to_end(key)
+                return self._reports[key]
+        self.put(key, report)
+        return report
+
+    def _read_snapshot(self, key: str, fingerprint: str) -> Optional[Report]:
+        snapshot_path = self._snapshot_path(key)
+        try:
+            with open(snapshot_path, "rb") as f:
+                if pickle.load(f) != snapshot_header(fingerprint):
+                    # Stale, or written by another version of the code
+                    return None
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Failed to read snapshot {snapshot_path}: {e}")
+            return None
+
+    def put(self, key: Union[str, Path], report: Report) -> None:
+        """Add a report, measure it, and evict others to stay in budget."""
+        key = str(key)
+        report.preload()
+        with self._lock:
+            self._reports[key] = report
+            self._reports.move_to_end(key)
+            self._sizes[key] = estimate_size(report)
+            self._enforce_budget()
+
+    def resize(self, key: Union[str, Path]) -> None:
+        """Measure a report again, e.g. after attaching analysis results to it."""
+        key = str(key)
+        with self._lock:
+            if key in self._reports:
+                self._sizes[key] = estimate_size(self._reports[key])
+                self._enforce_budget()
+
+    def evict(self, key: Union[str, Path]) -> None:
+        """Snapshot a report to disk and drop it from memory."""
+        key = str(key)
+        with self._lock:
+            report = self._reports.pop(key, None)
+            self._sizes.pop(key, None)
+            if report is None:
+                return
+            snapshot_path = self._snapshot_path(key)
+            tmp_path = snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(snapshot_header(snapshot_fingerprint(report)), f)
+                pickle.dump(report, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, snapshot_path)
+            self._stats.snapshot_writes += 1
+            self._stats.evictions += 1
+
+    def invalidate(self, key: Union[str, Path]) -> None:
+        """Forget a report and its snapshot, e.g. after its files changed."""
+        key = str(key)
+        with self._lock:
+            self._reports.pop(key, None)
+            self._sizes.pop(key, None)
+            self._snapshot_path(key).unlink(missing_ok=True)
+
+    def _enforce_budget(self) -> None:
+        while len(self._reports) > 1 and sum(self._sizes.values()) > self.max_bytes:
+            self.evict(next(iter(self._reports)))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._stats.entries = len(self._reports)
+            self._stats.retained_bytes = sum(self._sizes.values())
+            return asdict(self._stats)
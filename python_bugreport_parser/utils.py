@@ -3,11 +3,32 @@ import zipfile
 from pathlib import Path
 
 
-def unzip_and_delete(zip_file: Path, unzip_dir: Path):
+def unzip(zip_file: Path, unzip_dir: Path) -> int:
+    """
+    Extract a zip file without touching the archive itself.
+
+    Returns:
+        int: The total uncompressed size of the extracted members in bytes.
+    """
     os.makedirs(unzip_dir, exist_ok=True)
+    with zipfile.ZipFile(zip_file, "r") as zip_ref:
+        zip_ref.extractall(unzip_dir)
+        return sum(info.file_size for info in zip_ref.infolist())
+
+
+def try_unzip(zip_file: Path, unzip_dir: Path) -> bool:
+    """Like `unzip`, but report errors instead of raising them."""
+    try:
+        unzip(zip_file, unzip_dir)
+        return True
+    except (zipfile.BadZipFile, PermissionError, FileNotFoundError) as e:
+        print(f"Error processing {zip_file}: {e}")
+        return False
+
+
+def unzip_and_delete(zip_file: Path, unzip_dir: Path):
     try:
-        with zipfile.ZipFile(zip_file, "r") as zip_ref:
-            zip_ref.extractall(unzip_dir)
+        unzip(zip_file, unzip_dir)
         os.remove(zip_file)
     except (zipfile.BadZipFile, PermissionError, FileNotFoundError) as e:
         print(f"Error processing {zip_file}: {e}")
@@ -0,0 +1,128 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from python_bugreport_parser.bugreport.anr_record import AnrProcess, AnrRecord
+from python_bugreport_parser.bugreport.section import LogcatSection
+from python_bugreport_parser.plugins.anr_digest_plugin import (
+    AmAnrEvent,
+    AnrDigestPlugin,
+)
+
+SYSTEM_LOG = """\
+08-16 10:00:03.100  1000  1500  1600 E ActivityManager: ANR in com.foo (com.foo/.Main)
+08-16 10:00:03.100  1000  1500  1600 E ActivityManager: PID: 4321
+08-16 10:00:03.100  1000  1700  1700 I WindowManager: unrelated
+08-16 10:00:03.100  1000  1500  1600 E ActivityManager: Reason: Input dispatching timed out
+08-16 10:00:03.100  1000  1500  1600 E ActivityManager: Load: 1.0 / 2.0 / 3.0
+08-16 10:00:03.100  1000  1500  1600 E ActivityManager: CPU usage from 0ms to 5000ms later:
+08-16 10:00:03.100  1000  1500  1600 E ActivityManager:   50% 4321/com.foo: 40% user
+08-16 10:00:04.000  1000  1500  1600 I ActivityManager: Killing 999:com.other
+08-16 10:30:00.000  1000  1500  1601 E ActivityManager: ANR in com.bar
+08-16 10:30:00.000  1000  1500  1601 E ActivityManager: PID: 5555
+08-16 10:30:00.000  1000  1500  1601 E ActivityManager: Reason: Broadcast timeout
+""".splitlines()
+
+EVENT_LOG = """\
+08-16 10:00:01.000  1000  1500  1600 I am_anr: [0,4321,com.foo,952745541,Input dispatching timed out]
+08-16 10:20:00.000  1000  1500  1600 I am_anr: [0,4444,com.foo,952745541,Input dispatching timed out]
+""".splitlines()
+
+
+def logcat(lines):
+    section = LogcatSection()
+    section.parse(lines, 2024)
+    return section
+
+
+def trace_dump(pid, timestamp):
+    process = AnrProcess()
+    process.pid = pid
+    process.timestamp = timestamp.replace(tzinfo=timezone(timedelta(hours=7)))
+    return process
+
+
+class TestAnrDigestPlugin(unittest.TestCase):
+    def test_anr_in_blocks(self):
+        blocks = AnrDigestPlugin._parse_anr_in_blocks(logcat(SYSTEM_LOG))
+        self.assertEqual([b.process for b in blocks], ["com.foo", "com.bar"])
+        foo, bar = blocks
+        self.assertEqual(foo.component, "com.foo/.Main")
+        self.assertEqual(foo.pid, 4321)
+        self.assertEqual(foo.details["Reason"], "Input dispatching timed out")
+        self.assertEqual(len(foo.lines), 2)
+        self.assertIsNone(bar.component)
+        self.assertEqual(bar.pid, 5555)
+
+    def test_match(self):
+        events = [AmAnrEvent.parse(line) for line in logcat(EVENT_LOG).entries]
+        blocks = AnrDigestPlugin._parse_anr_in_blocks(logcat(SYSTEM_LOG))
+        record = AnrRecord()
+        record.traces = [
+            trace_dump(4321, datetime(2024, 8, 16, 10, 0, 2)),
+            trace_dump(4321, datetime(2024, 8, 16, 11, 0, 0)),
+            trace_dump(5555, datetime(2024, 8, 16, 10, 40, 0)),
+        ]
+        digests = AnrDigestPlugin._match(events, blocks, [record])
+
+        self.assertEqual(
+            [(d.process, d.pid) for d in digests],
+            [("com.foo", 4321), ("com.foo", 4444), ("com.bar", 5555)],
+        )
+        first, unmatched_event, unmatched_block = digests
+        self.assertIs(first.am_anr, events[0])
+        self.assertIs(first.anr_in, blocks[0])
+        self.assertIs(first.dump, record.traces[0])
+        self.assertIsNone(unmatched_event.anr_in)
+        self.assertIsNone(unmatched_event.dump)
+        self.assertIsNone(unmatched_block.am_anr)
+        self.assertEqual(unmatched_block.reason, "Broadcast timeout")
+        # Too far from the ANR
+        self.assertIsNone(unmatched_block.dump)
+
+    def test_anrs_seconds_apart(self):
+        start = datetime(2024, 8, 16, 10, 0, 0)
+        events = [
+            AmAnrEvent(start, 0, 4321, "com.foo", 0, "first"),
+            AmAnrEvent(start + timedelta(seconds=2), 0, 4322, "com.foo", 0, "second"),
+        ]
+        # The block of the first ANR is nearest to the second am_anr event
+        blocks = AnrDigestPlugin._parse_anr_in_blocks(
+            logcat(
+                [
+                    "08-16 10:00:01.500  1000  1500  1600 E ActivityManager: "
+                    "ANR in com.foo",
+                    "08-16 10:00:03.500  1000  1500  1601 E ActivityManager: "
+                    "ANR in com.foo",
+                ]
+            )
+        )
+        digests = AnrDigestPlugin._match(events, blocks, [])
+        self.assertEqual(len(digests), 2)
+        self.assertTrue(all(d.am_anr and d.anr_in for d in digests))
+        self.assertEqual({id(d.am_anr) for d in digests}, {id(e) for e in events})
+
+    def test_many_anrs(self):
+        start = datetime(2024, 8, 16, 10, 0, 0)
+        events = [
+            AmAnrEvent(start + timedelta(minutes=i), 0, 100 + i % 7, f"p{i % 7}", 0, "r")
+            for i in range(500)
+        ]
+        blocks = AnrDigestPlugin._parse_anr_in_blocks(
+            logcat(
+                [
+                    f"{e.timestamp + timedelta(seconds=2):%m-%d %H:%M:%S}.000  1000  1500"
+                    f"  1600 E ActivityManager: ANR in {e.process}"
+                    for e in reversed(events)
+                ]
+            )
+        )
+        digests = AnrDigestPlugin._match(events, blocks, [])
+        self.assertEqual(len(digests), 500)
+        for digest in digests:
+            self.assertEqual(
+                digest.anr_in.timestamp - digest.am_anr.timestamp, timedelta(seconds=2)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import asyncio
+import time
+import unittest
+
+from python_bugreport_parser.plugins import (
+    BasePlugin,
+    BugreportAnalysisContext,
+    PluginRepo,
+    PluginResult,
+)
+from python_bugreport_parser.plugins.async_runner import run_many
+from python_bugreport_parser.plugins.budget import PluginBudgets
+from python_bugreport_parser.plugins.scheduler import DagScheduler
+
+
+class LookupPlugin(BasePlugin):
+    """Waits on I/O, such as a symbol store"""
+
+    def __init__(self, name, dependencies=None, seconds=0.2):
+        super().__init__(name, dependencies)
+        self.seconds = seconds
+
+    async def analyze_async(self, analysis_context):
+        inputs = [analysis_context.get_result(dep).data for dep in self.dependencies]
+        await asyncio.sleep(self.seconds)
+        return PluginResult(f"{self.name}{inputs}")
+
+    def report(self, result):
+        return result.data
+
+
+class BlockingPlugin(BasePlugin):
+    """A synchronous plugin, which must not block the loop"""
+
+    def __init__(self, name, dependencies=None):
+        super().__init__(name, dependencies)
+
+    def analyze(self, analysis_context):
+        time.sleep(0.2)
+        return PluginResult(self.name)
+
+    def report(self, result):
+        return result.data
+
+
+class IncompletePlugin(BasePlugin):
+    def __init__(self):
+        super().__init__("Incomplete")
+
+    def report(self, result):
+        return ""
+
+
+def new_context():
+    return BugreportAnalysisContext()
+
+
+class TestAsyncRunner(unittest.TestCase):
+    def test_io_plugins_overlap(self):
+        repo = PluginRepo(
+            [
+                LookupPlugin("A"),
+                LookupPlugin("B"),
+                BlockingPlugin("C"),
+                LookupPlugin("D", ["A", "C"], seconds=0.0),
+            ]
+        )
+        context = new_context()
+        ticks = []
+
+        async def ticker():
+            # Keeps running while the blocking plugin runs on the executor
+            for _ in range(10):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        async def main():
+            schedule, _ = await asyncio.gather(repo.run_all_async(context), ticker())
+            return schedule
+
+        start = time.perf_counter()
+        schedule = asyncio.run(main())
+        self.assertLess(time.perf_counter() - start, 0.35)
+        self.assertEqual(schedule.mode, "async")
+        self.assertEqual(context.get_result("D").data, "D['A[]', 'C']")
+        self.assertEqual(len(ticks), 10)
+        self.assertLess(ticks[-1] - ticks[0], 0.15)
+
+    def test_budget_cancels_async_plugins(self):
+        repo = PluginRepo([LookupPlugin("A", seconds=10), LookupPlugin("B", ["A"])])
+        context = new_context()
+        start = time.perf_counter()
+        schedule = asyncio.run(
+            repo.run_all_async(context, budgets=PluginBudgets(default=0.1))
+        )
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(schedule.timed_out, ["A"])
+        self.assertEqual(context.skipped, {"B": "A"})
+        self.assertTrue(context.plugin_stats["A"].timed_out)
+
+    def test_run_many(self):
+        repo = PluginRepo([LookupPlugin("A"), LookupPlugin("B", ["A"])])
+        contexts = [new_context() for _ in range(5)]
+        start = time.perf_counter()
+        schedules = asyncio.run(run_many(repo, contexts))
+        self.assertLess(time.perf_counter() - start, 0.8)
+        self.assertEqual(len(schedules), 5)
+        for context in contexts:
+            self.assertEqual(context.get_result("B").data, "B['A[]']")
+
+    def test_async_plugins_run_synchronously(self):
+        plugins = PluginRepo.resolve_execution_order(
+            [LookupPlugin("A", seconds=0.0), BlockingPlugin("B", ["A"])]
+        )
+        context = new_context()
+        DagScheduler("thread").run(plugins, context)
+        self.assertEqual(context.get_result("A").data, "A[]")
+        self.assertTrue(plugins[0].is_async())
+        self.assertFalse(plugins[1].is_async())
+
+    def test_failure_propagates(self):
+        repo = PluginRepo([IncompletePlugin(), LookupPlugin("A")])
+        with self.assertRaises(NotImplementedError):
+            asyncio.run(repo.run_all_async(new_context()))
+
+
+if __name__ == "__main__":
+    unittest.main()
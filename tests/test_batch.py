@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from python_bugreport_parser.batch import (
+    BatchResult,
+    BatchRunner,
+    BatchStats,
+    JsonLinesSink,
+    expand_inputs,
+)
+
+
+def crash_on_b(source: Path) -> BatchResult:
+    """Kills its worker process on the report "b", on every attempt"""
+    if source.name == "b":
+        os._exit(1)
+    return BatchResult(str(source), True)
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp.name)
+        for name in ["a", "b", "c"]:
+            (self.tmp_dir / name).mkdir()
+        (self.tmp_dir / "d.zip").write_bytes(b"not a zip")
+        (self.tmp_dir / "notes.txt").write_text("ignored", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_expand_inputs(self):
+        sources = expand_inputs(
+            [str(self.tmp_dir / "*"), str(self.tmp_dir / "a"), "/does/not/exist"]
+        )
+        self.assertEqual([path.name for path in sources], ["a", "b", "c", "d.zip"])
+
+    def test_failures_do_not_stop_the_batch(self):
+        stream = io.StringIO()
+        sources = expand_inputs([str(self.tmp_dir / "*")])
+        stats = BatchRunner(max_workers=2).run(sources, JsonLinesSink(stream))
+
+        results = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(len(results), 4)
+        self.assertEqual(stats.total, 4)
+        self.assertEqual(stats.failed, 4)
+        self.assertTrue(all(result["error"] for result in results))
+
+    def test_crash_on_the_last_attempt(self):
+        stream = io.StringIO()
+        sources = expand_inputs([str(self.tmp_dir / "*")])
+        runner = BatchRunner(max_workers=2, analyze=crash_on_b)
+        stats = runner.run(sources, JsonLinesSink(stream))
+
+        results = {
+            Path(r["source"]).name: r
+            for r in map(json.loads, stream.getvalue().splitlines())
+        }
+        self.assertEqual(sorted(results), ["a", "b", "c", "d.zip"])
+        self.assertFalse(results["b"]["ok"])
+        self.assertIn("BrokenProcessPool", results["b"]["error"])
+        self.assertTrue(all(results[name]["ok"] for name in ["a", "c", "d.zip"]))
+        self.assertEqual(stats.failed, 1)
+
+    def test_stats(self):
+        stats = BatchStats()
+        for i in range(1, 101):
+            stats.add(BatchResult(str(i), i % 10 != 0, elapsed=float(i)))
+        stats.elapsed = 10.0
+        summary = stats.summary()
+        self.assertEqual(summary["failed"], 10)
+        self.assertEqual(summary["throughput"], 10.0)
+        self.assertEqual(summary["latency_p50"], 51.0)
+        self.assertEqual(summary["latency_max"], 100.0)
@@ -1,7 +1,20 @@
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from python_bugreport_parser.bugreport import Bugreport
+from python_bugreport_parser.bugreport.bugreport_all import Log284
+from python_bugreport_parser.extraction_cache import ExtractionCache
+
+MINIMAL_BUGREPORT = """== dumpstate: 2024-08-16 10:02:11
+Build fingerprint: 'Xiaomi/houji_global/houji:14/UKQ1.230804.001/V816.0.12.0.UNCMIXM:user/release-keys'
+Uptime: up 0 weeks, 0 days, 1 hour, 59 minutes
+------ SYSTEM PROPERTIES (getprop) ------
+[ro.product.name]: [houji]
+------ 0.020s was the duration of 'SYSTEM PROPERTIES' ------
+"""
 
 
 class TestBugreportAll(unittest.TestCase):
@@ -17,3 +30,65 @@ class TestBugreportAll(unittest.TestCase):
 
         bugreport = Bugreport.from_zip(bugreport_zip_path, feedback_id)
         self.assertTrue(bugreport.bugreport_txt.loaded)
+
+
+class TestLazyComponents(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.feedback_dir = Path(self.tmp.name)
+        bugreport_dir = self.feedback_dir / "bugreport"
+        bugreport_dir.mkdir()
+        (bugreport_dir / "bugreport-houji.txt").write_text(
+            MINIMAL_BUGREPORT, encoding="utf-8"
+        )
+        (bugreport_dir / "mtdoops.md").write_text("mtdoops", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_components_load_on_access(self):
+        log284 = Log284.from_dir(self.feedback_dir)
+        self.assertEqual(log284.bugreport.loaded_components(), [])
+
+        self.assertTrue(log284.bugreport_txt.loaded)
+        self.assertEqual(log284.bugreport.loaded_components(), ["bugreport_txt"])
+        # Memoized
+        self.assertIs(log284.bugreport_txt, log284.bugreport.bugreport_txt)
+
+    def test_cache_fingerprint(self):
+        log284 = Log284.from_dir(self.feedback_dir)
+        quick = log284.cache_fingerprint(by_content=False)
+        self.assertEqual(log284.bugreport.loaded_components(), [])
+        self.assertNotEqual(quick, log284.fingerprint)
+        self.assertEqual(log284.cache_fingerprint(by_content=True), log284.fingerprint)
+        # Once known, the fingerprint by content is used either way
+        self.assertEqual(log284.cache_fingerprint(by_content=False), log284.fingerprint)
+
+        other = Log284.from_dir(self.feedback_dir)
+        mtdoops = self.feedback_dir / "bugreport" / "mtdoops.md"
+        mtdoops.write_text("mtdoops, changed", encoding="utf-8")
+        self.assertNotEqual(other.cache_fingerprint(by_content=False), quick)
+
+    def test_cached_tree_is_prepared_once(self):
+        work = tempfile.TemporaryDirectory()
+        self.addCleanup(work.cleanup)
+        work_dir = Path(work.name)
+        zip_path = Path(shutil.make_archive(work_dir / "log", "zip", self.feedback_dir))
+        cache = ExtractionCache(work_dir / "cache")
+        with mock.patch.object(Log284, "prepare", wraps=Log284.prepare) as prepare:
+            with Log284.from_zip(zip_path, "", cache=cache) as log284:
+                self.assertTrue(log284.bugreport_txt.loaded)
+            with Log284.from_zip(zip_path, "", cache=cache):
+                pass
+        # Only in staging, never again on the published tree
+        self.assertEqual(prepare.call_count, 1)
+
+    def test_preload(self):
+        log284 = Log284.from_dir(self.feedback_dir)
+        log284.preload()
+        self.assertEqual(
+            log284.bugreport.loaded_components(), Bugreport.COMPONENTS
+        )
+        self.assertEqual(log284.mtdoops_md, "mtdoops")
+        self.assertIsNone(log284.dumpstate_board)
+        self.assertEqual(log284.anr_records, [])
@@ -1,3 +1,4 @@
+import tempfile
 import time
 import unittest
 import zipfile
@@ -126,3 +127,57 @@ class TestBugreport(unittest.TestCase):
         self.assertEqual(len(anr_records), 2)
         for record in anr_records:
             self.assertIsInstance(record.content, AnrRecordSection)
+
+
+# Bytes that are not UTF-8 in a message, a BLOCK STAT line within a
+# section, a section without an ending line and no newline at the end
+RAW_BUGREPORT = b"\n".join(
+    [
+        b"== dumpstate: 2024-08-16 10:02:11",
+        b"Uptime: up 0 weeks, 0 days, 1 hour, 59 minutes",
+        b"------ SYSTEM LOG (logcat -v threadtime -d *:v) ------",
+        b"--------- beginning of main",
+        b"08-16 10:00:00.000  1000  1500  1600 I Tag: caf\xc3\xa9 \xff\xfe",
+        b"------ BLOCK STAT (for_each_block) ------",
+        b"08-16 10:00:01.000  1000  1500  1600 W T\xc3\xa4g : second",
+        b"------ 0.500s was the duration of 'SYSTEM LOG' ------",
+        b"------ KERNEL LOG ------",
+        b"[    1.000000] kernel \xff",
+        b"------ DUMPSYS (/system/bin/dumpsys -T 30000) ------",
+        b"-" * 79,
+        b"DUMP OF SERVICE wifi:",
+        b"wifi \xc3\xbc",
+        b"--------- 0.050s was the duration of dumpsys wifi, ending at: 2024-08-16",
+        b"-" * 79,
+        b"------ 1.000s was the duration of 'DUMPSYS' ------",
+        b"trailing",
+    ]
+)
+
+
+class TestRawBugreport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "bugreport.txt"
+        self.path.write_bytes(RAW_BUGREPORT)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sections(self):
+        bugreport = BugreportTxt(self.path)
+        bugreport.load()
+        self.assertEqual(
+            [(s.name, s.start_line, s.end_line) for s in bugreport.sections],
+            [("SYSTEM LOG", 3, 6), ("KERNEL LOG", 8, 9), ("DUMPSYS", 11, 15)],
+        )
+        entries = bugreport.sections[0].content.entries
+        self.assertEqual(entries[0].message, "caf\u00e9 \ufffd\ufffd")
+        self.assertEqual(entries[1].tag, "T\u00e4g")
+        wifi = bugreport.sections[2].content.entries[0]
+        self.assertEqual((wifi.name, wifi.data), ("wifi", "wifi \u00fc"))
+        # The same entries as parsing the decoded lines
+        decoded = LogcatSection()
+        decoded.parse(RAW_BUGREPORT.decode("utf-8", errors="replace").split("\n"), 2024)
+        self.assertEqual(entries, decoded.entries)
+
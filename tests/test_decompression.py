@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from python_bugreport_parser.bugreport.bugreport_all import Bugreport
+from python_bugreport_parser.bugreport.decompression import (
+    EXTRACTED_MARKER,
+    NESTED_ARCHIVE_DIRS,
+    decompress_nested_archives,
+)
+
+
+class TestDecompressNestedArchives(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bugreport_dir = Path(self.tmp.name)
+        (self.bugreport_dir / "bugreport-test.txt").write_text("", encoding="utf-8")
+        self.reboot_dir = self.bugreport_dir / NESTED_ARCHIVE_DIRS[0]
+        self.reboot_dir.mkdir(parents=True)
+        for i in range(3):
+            with zipfile.ZipFile(self.reboot_dir / f"reboot_{i}.zip", "w") as zf:
+                zf.writestr("-1_0_javacrash.txt", f"record {i}\n" * 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_extract_is_not_destructive(self):
+        stats = decompress_nested_archives(self.bugreport_dir, max_workers=2)
+        self.assertEqual(stats.archives, 3)
+        self.assertEqual(stats.extracted, 3)
+        self.assertEqual(stats.failed, 0)
+        self.assertGreater(stats.uncompressed_bytes, 0)
+        for i in range(3):
+            self.assertTrue((self.reboot_dir / f"reboot_{i}.zip").exists())
+            self.assertTrue(
+                (self.reboot_dir / f"reboot_{i}" / "-1_0_javacrash.txt").exists()
+            )
+
+    def test_skip_current_archives(self):
+        decompress_nested_archives(self.bugreport_dir)
+        stats = decompress_nested_archives(self.bugreport_dir)
+        self.assertEqual(stats.extracted, 0)
+        self.assertEqual(stats.skipped, 3)
+
+    def test_bad_archive_is_reported(self):
+        (self.reboot_dir / "broken.zip").write_bytes(b"not a zip")
+        stats = decompress_nested_archives(self.bugreport_dir)
+        self.assertEqual(stats.failed, 1)
+        self.assertEqual(stats.extracted, 3)
+
+    def test_path_discovery_lists_extracted_dirs(self):
+        Bugreport.prepare(self.bugreport_dir)
+        paths = Bugreport._load_required_file_paths(self.bugreport_dir)
+        self.assertEqual(
+            [path.name for path in paths.miuilog_reboot_dirs],
+            ["reboot_0", "reboot_1", "reboot_2"],
+        )
+
+    def test_partial_extractions(self):
+        decompress_nested_archives(self.bugreport_dir)
+        # Interrupted before the marker was written, with a leftover file
+        partial = self.reboot_dir / "reboot_1"
+        (partial / EXTRACTED_MARKER).unlink()
+        (partial / "leftover.txt").write_text("", encoding="utf-8")
+        # Directories without an archive are listed as before
+        (self.reboot_dir / "reboot_plain").mkdir()
+        paths = Bugreport._load_required_file_paths(self.bugreport_dir)
+        self.assertEqual(
+            [path.name for path in paths.miuilog_reboot_dirs],
+            ["reboot_0", "reboot_2", "reboot_plain"],
+        )
+
+        stats = decompress_nested_archives(self.bugreport_dir)
+        self.assertEqual(stats.extracted, 1)
+        self.assertFalse((partial / "leftover.txt").exists())
+        self.assertTrue((partial / "-1_0_javacrash.txt").exists())
@@ -0,0 +1,129 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from python_bugreport_parser.bugreport.bugreport_txt import BugreportTxt
+from python_bugreport_parser.bugreport.dumpstate_profile import (
+    DumpstateProfile,
+    section_category,
+    summarize_profiles,
+)
+from python_bugreport_parser.bugreport.requirements import DataRequirements
+from python_bugreport_parser.bugreport.section import DumpsysSection
+
+DELIMITER = "-" * 79
+
+BUGREPORT = "\n".join(
+    [
+        "== dumpstate: 2024-08-16 10:02:11",
+        "Build fingerprint: 'Xiaomi/houji/houji:14/UKQ1.231003.002/V816.0.5.0.UNCCNXM:user/release-keys'",
+        "Uptime: up 0 weeks, 0 days, 1 hour, 59 minutes",
+        "------ SYSTEM LOG (logcat -v threadtime -d *:v) ------",
+        "08-16 10:00:00.000  1000  1500  1600 I Tag: message",
+        "------ 1.250s was the duration of 'SYSTEM LOG' ------",
+        "------ DUMPSYS CRITICAL (/system/bin/dumpsys -T 10000 --priority CRITICAL) ------",
+        DELIMITER,
+        "DUMP OF SERVICE window:",
+        "window stuff",
+        "--------- 0.500s was the duration of dumpsys window, ending at: 2024-08-16 10:02:20",
+        DELIMITER,
+        "------ 0.600s was the duration of 'DUMPSYS CRITICAL' ------",
+        "------ DUMPSYS (/system/bin/dumpsys -T 30000) ------",
+        DELIMITER,
+        "DUMP OF SERVICE wifi:",
+        "wifi stuff",
+        "--------- 12.345s was the duration of dumpsys wifi, ending at: 2024-08-16 10:02:21",
+        DELIMITER,
+        "DUMP OF SERVICE window:",
+        "window stuff",
+        "--------- 0.250s was the duration of dumpsys window, ending at: 2024-08-16 10:02:22",
+        DELIMITER,
+        "------ 13.000s was the duration of 'DUMPSYS' ------",
+        "------ KERNEL LOG ------",
+        "[    1.000000] no ending line",
+        "------ UPTIME (uptime) ------",
+        "up 1 hour",
+        "------ 0.010s was the duration of 'UPTIME' ------",
+        "",
+    ]
+)
+
+
+class TestDumpstateProfile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "bugreport.txt"
+        self.path.write_text(BUGREPORT, encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def load(self, requirements=None) -> BugreportTxt:
+        bugreport_txt = BugreportTxt(self.path)
+        bugreport_txt.load(requirements)
+        return bugreport_txt
+
+    def test_section_catalog(self):
+        # Read without parsing any section
+        bugreport_txt = self.load(DataRequirements())
+        self.assertEqual(
+            [(s.name, s.duration) for s in bugreport_txt.sections],
+            [
+                ("SYSTEM LOG", 1.25),
+                ("DUMPSYS CRITICAL", 0.6),
+                ("DUMPSYS", 13.0),
+                ("KERNEL LOG", None),
+                ("UPTIME", 0.01),
+            ],
+        )
+        self.assertEqual(
+            bugreport_txt.sections[2].service_durations, {"wifi": 12.345, "window": 0.25}
+        )
+        self.assertEqual(bugreport_txt.sections[3].service_durations, {})
+
+    def test_dumpsys_durations(self):
+        section = DumpsysSection()
+        section.parse(BUGREPORT.split("\n")[14:24], 2024)
+        # Services taking 10s or more were not recognized before
+        self.assertEqual(
+            [(e.name, e.data, e.duration) for e in section.entries],
+            [("wifi", "wifi stuff", 12.345), ("window", "window stuff", 0.25)],
+        )
+
+    def test_profile(self):
+        profile = DumpstateProfile.of(self.load(DataRequirements()))
+        self.assertEqual(profile.product, "houji")
+        self.assertAlmostEqual(profile.total, 14.86)
+        self.assertEqual(
+            profile.categories(), {"logs": 1.25, "dumpsys": 13.6, "other": 0.01}
+        )
+        self.assertEqual(profile.slowest_services(1), [("wifi", 12.345)])
+        self.assertEqual(profile.services["window"], 0.75)
+        self.assertEqual(profile.slowest_sections(1), [("DUMPSYS", 13.0)])
+
+    def test_categories(self):
+        self.assertEqual(section_category("VM TRACES AT LAST ANR"), "traces")
+        self.assertEqual(section_category("for_each_pid(show_showtime)"), "processes")
+        self.assertEqual(section_category("KERNEL LOG (dmesg)"), "logs")
+        self.assertEqual(section_category("APP ACTIVITIES"), "apps")
+
+    def test_summaries(self):
+        fast = DumpstateProfile("fast", sections={"DUMPSYS": 10.0})
+        slow = DumpstateProfile(
+            "slow", sections={"DUMPSYS": 60.0}, services={"meminfo": 50.0}
+        )
+        slower = DumpstateProfile(
+            "slow", sections={"DUMPSYS": 90.0}, services={"meminfo": 70.0}
+        )
+        summaries = summarize_profiles([fast, slow, slower])
+        self.assertEqual(list(summaries), ["slow", "fast"])
+        summary = summaries["slow"]
+        self.assertEqual(summary.reports, 2)
+        self.assertEqual(summary.mean_total, 75.0)
+        self.assertEqual(summary.slowest_total, 90.0)
+        self.assertEqual(summary.mean_categories(), {"dumpsys": 75.0})
+        self.assertEqual(summary.slowest_services(), [("meminfo", 60.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import re
+import unittest
+
+from python_bugreport_parser.bugreport.dumpsys_entry import DumpsysEntry
+from python_bugreport_parser.plugins.dumpsys_grep import DumpsysGrep
+
+WIFI = """\
+Wi-Fi is enabled
+08-16 10:00:00.000 setWifiEnabledInternal package=com.android.settings enable=false
+mWifiState 1
+08-16 10:05:00.000 setWifiEnabledInternal package=com.android.settings enable=true
+mWifiState 3 setWifiEnabledInternal
+Scan results:"""
+
+
+class TestDumpsysGrep(unittest.TestCase):
+    def test_same_lines_as_a_line_scan(self):
+        grep = DumpsysGrep(["setWifiEnabledInternal"])
+        matches = grep.search_entry(DumpsysEntry("wifi", WIFI))
+        self.assertEqual(
+            [m.line(WIFI) for m in matches],
+            [line for line in WIFI.split("\n") if "setWifiEnabledInternal" in line],
+        )
+
+    def test_several_patterns(self):
+        grep = DumpsysGrep(["enable=true", re.compile(r"mWifiState \d"), "Wi-Fi"])
+        matches = grep.search(WIFI)
+        self.assertEqual(
+            [(m.line(WIFI)[:12], m.patterns) for m in matches],
+            [
+                ("Wi-Fi is ena", ("Wi-Fi",)),
+                ("mWifiState 1", (r"mWifiState \d",)),
+                ("08-16 10:05:", ("enable=true",)),
+                ("mWifiState 3", (r"mWifiState \d",)),
+            ],
+        )
+
+    def test_context(self):
+        grep = DumpsysGrep(["mWifiState 1", "Scan"], before=1, after=1)
+        first, last = grep.search(WIFI)
+        self.assertTrue(first.context(WIFI).split("\n")[0].endswith("enable=false"))
+        self.assertEqual(first.context(WIFI).count("\n"), 2)
+        # No line after the last one
+        self.assertEqual(last.context(WIFI).split("\n")[-1], "Scan results:")
+        self.assertEqual(last.context(WIFI).count("\n"), 1)
+
+    def test_range(self):
+        buffer = "x\n" + WIFI + "\nsetWifiEnabledInternal outside"
+        start = 2
+        end = start + len(WIFI)
+        matches = DumpsysGrep(["setWifiEnabledInternal", "x"]).search(buffer, start, end)
+        self.assertEqual(len(matches), 3)
+        self.assertTrue(all(start <= m.start and m.end <= end for m in matches))
+        matches = DumpsysGrep(["Wi-Fi"], before=2).search(buffer, start, end)
+        self.assertEqual(matches[0].context_start, start)
+
+    def test_bytes(self):
+        buffer = WIFI.encode()
+        grep = DumpsysGrep([b"enable=false", re.compile(rb"State 3")])
+        lines = [m.line(buffer) for m in grep.search(buffer)]
+        self.assertEqual(lines[1], b"mWifiState 3 setWifiEnabledInternal")
+        self.assertEqual(len(lines), 2)
+
+    def test_multiline_literal(self):
+        with self.assertRaises(ValueError):
+            DumpsysGrep(["a\nb"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from python_bugreport_parser.extraction_cache import ExtractionCache
+
+
+class TestExtractionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp.name)
+        self.cache = ExtractionCache(self.tmp_dir / "cache", max_bytes=10**9)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _make_zip(self, name: str, content: str) -> Path:
+        zip_path = self.tmp_dir / name
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("bugreport-test.txt", content)
+        return zip_path
+
+    def test_extract_keeps_archive_and_reuses_tree(self):
+        zip_path = self._make_zip("a.zip", "hello")
+        self.assertIsNone(self.cache.lookup(zip_path))
+
+        tree = self.cache.extract(zip_path)
+        self.assertTrue(zip_path.exists())
+        self.assertEqual((tree / "bugreport-test.txt").read_text(), "hello")
+        self.assertEqual(self.cache.lookup(zip_path), tree)
+
+        # The same content under another name resolves to the same tree
+        copy_path = self._make_zip("b.zip", "hello")
+        os.utime(copy_path, (0, 0))
+        self.assertEqual(self.cache.extract(copy_path), tree)
+        self.assertEqual(len(self.cache.entries()), 1)
+
+    def test_prepare_runs_before_publishing(self):
+        zip_path = self._make_zip("a.zip", "hello")
+        tree = self.cache.extract(
+            zip_path, prepare=lambda path: (path / "prepared").touch()
+        )
+        self.assertTrue((tree / "prepared").exists())
+        self.assertEqual(list(self.cache.tmp_dir.iterdir()), [])
+
+    def test_tree_without_meta_is_replaced(self):
+        zip_path = self._make_zip("a.zip", "hello")
+        tree = self.cache.extract(zip_path)
+        # A crash between publishing the tree and writing its meta
+        os.remove(tree.parent / f"{tree.name}.meta")
+        (tree / "bugreport-test.txt").write_text("stale")
+
+        self.assertIsNone(self.cache.lookup(zip_path))
+        self.assertEqual(self.cache.extract(zip_path), tree)
+        self.assertEqual((tree / "bugreport-test.txt").read_text(), "hello")
+        self.assertEqual(self.cache.lookup(zip_path), tree)
+        self.assertEqual(list(self.cache.tmp_dir.iterdir()), [])
+
+    def test_concurrent_extraction_happens_once(self):
+        zip_path = self._make_zip("a.zip", "x" * 100000)
+        prepared = []
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            trees = list(
+                pool.map(
+                    lambda _: self.cache.extract(zip_path, prepare=prepared.append),
+                    range(8),
+                )
+            )
+        self.assertEqual(len(set(trees)), 1)
+        self.assertEqual(len(prepared), 1)
+
+    def test_lru_eviction(self):
+        self.cache.max_bytes = 250
+        paths = [self._make_zip(f"{i}.zip", str(i) * 100) for i in range(3)]
+        first = self.cache.extract(paths[0])
+        self.cache.extract(paths[1])
+        # Touch the first one so that the second becomes the LRU entry
+        os.utime(first.parent / f"{first.name}.meta", (2**31, 2**31))
+        self.cache.extract(paths[2])
+
+        self.assertEqual(self.cache.lookup(paths[0]), first)
+        self.assertIsNone(self.cache.lookup(paths[1]))
+        self.assertLessEqual(self.cache.total_size(), 250)
+
+    def test_open_pins_entry(self):
+        self.cache.max_bytes = 0
+        zip_path = self._make_zip("a.zip", "hello")
+        with self.cache.open(zip_path) as tree:
+            self.cache.evict()
+            self.assertTrue(tree.exists())
+        self.cache.evict()
+        self.assertFalse(tree.exists())
+
+    def test_pin_after_eviction(self):
+        self.cache.max_bytes = 0
+        zip_path = self._make_zip("a.zip", "hello")
+        extract = self.cache.extract
+        extracted = []
+
+        def extract_then_evict(path, prepare=None):
+            tree = extract(path, prepare)
+            extracted.append(tree)
+            if len(extracted) == 1:
+                # Another process evicts the tree before it is pinned
+                self.cache.evict()
+            return tree
+
+        self.cache.extract = extract_then_evict
+        tree, lock = self.cache.pin(zip_path)
+        try:
+            self.assertEqual(len(extracted), 2)
+            self.cache.evict()
+            self.assertTrue((tree / "bugreport-test.txt").exists())
+        finally:
+            lock.release()
@@ -0,0 +1,105 @@
+import random
+import unittest
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from python_bugreport_parser.plugins.input_focus_plugin import (
+    FocusEvent,
+    InputFocusPlugin,
+    InputFocusTuple,
+)
+
+EVENT_TYPES = ["request", "receive", "entering", "leaving"]
+
+
+def group_focus_events_reference(events):
+    """The grouping before the state machine, scanning every tuple of a focus_id"""
+    focus_map = defaultdict(list)
+    all_tuples = []
+    for event in events:
+        if event.focus_id.lower() == "<null>":
+            ft = InputFocusTuple()
+            ft.add_event(event)
+            all_tuples.append(ft)
+            continue
+        candidates = [
+            ft for ft in reversed(focus_map.get(event.focus_id, [])) if ft.can_accept(event)
+        ]
+        if candidates:
+            max(candidates, key=lambda x: (x.event_count, x.latest_timestamp)).add_event(
+                event
+            )
+        else:
+            ft = InputFocusTuple()
+            ft.add_event(event)
+            focus_map[event.focus_id].append(ft)
+            all_tuples.append(ft)
+    return sorted(
+        all_tuples, key=lambda x: x.request.timestamp if x.request else datetime.min
+    )
+
+
+def synthetic_events(count, seed, windows=5, disorder=0.0, drop=0.2):
+    """
+    Focus changes between a few windows, with some events lost, and optionally
+    some timestamps out of order.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 8, 16, 10, 0, 0)
+    events = []
+    second = 0
+    while len(events) < count:
+        focus_id = rng.choice([f"{i:x}" for i in range(windows)] + ["<null>"])
+        for event_type in EVENT_TYPES:
+            if rng.random() < drop:
+                continue
+            # Coarse timestamps, so that ties happen
+            second += rng.choice([0, 0, 1])
+            offset = second
+            if rng.random() < disorder:
+                offset -= rng.randint(1, 5)
+            events.append(
+                FocusEvent(
+                    event_type=event_type,
+                    focus_id=focus_id,
+                    component=f"com.app/.Window{focus_id}",
+                    reason="test",
+                    server=False,
+                    timestamp=start + timedelta(seconds=offset),
+                )
+            )
+    return events[:count]
+
+
+class TestGroupFocusEvents(unittest.TestCase):
+    def assert_same_grouping(self, events):
+        expected = group_focus_events_reference(events)
+        actual = InputFocusPlugin._group_focus_events(events)
+        self.assertEqual(len(actual), len(expected))
+        for got, want in zip(actual, expected):
+            self.assertEqual(got, want)
+
+    def test_complete_tuple(self):
+        (ft,) = InputFocusPlugin._group_focus_events(
+            [
+                FocusEvent(t, "1a", "com.app/.Main", "test", False, datetime(2024, 1, 1))
+                for t in EVENT_TYPES
+            ]
+        )
+        self.assertEqual(ft.event_count, 4)
+        self.assertEqual(ft.leaving.event_type, "leaving")
+
+    def test_matches_reference_in_order(self):
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                self.assert_same_grouping(synthetic_events(400, seed))
+
+    def test_matches_reference_out_of_order(self):
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                events = synthetic_events(400, seed, windows=3, disorder=0.3, drop=0.4)
+                self.assert_same_grouping(events)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import random
+import unittest
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from python_bugreport_parser.plugins import BugreportAnalysisContext, PluginResult
+from python_bugreport_parser.plugins.interval_index import IntervalIndex
+
+START = datetime(2024, 8, 16, 10, 0, 0)
+
+
+@dataclass
+class Span:
+    timestamp: datetime
+    end: datetime
+
+
+def at(seconds):
+    return START + timedelta(seconds=seconds)
+
+
+def random_spans(rng, count):
+    spans = []
+    for _ in range(count):
+        start = rng.randint(0, 1000)
+        spans.append(Span(at(start), at(start + rng.choice([0, 1, 5, 50, 500]))))
+    return spans
+
+
+class TestIntervalIndex(unittest.TestCase):
+    def test_points(self):
+        records = [Span(at(s), at(s)) for s in [30, 10, 20, 10]]
+        index = IntervalIndex(records)
+        self.assertEqual(index.overlapping(at(10), at(20)), [records[1], records[2], records[3]])
+        self.assertEqual(index.near(at(25), timedelta(seconds=5)), [records[0], records[2]])
+        self.assertEqual(index.containing(at(30)), [records[0]])
+        self.assertEqual(index.overlapping(at(31), at(40)), [])
+
+    def test_spans_match_a_scan(self):
+        rng = random.Random(0)
+        for count in [0, 1, 2, 7, 100]:
+            records = random_spans(rng, count)
+            index = IntervalIndex(records, end=lambda r: r.end)
+            for _ in range(50):
+                low = at(rng.randint(-100, 1100))
+                high = low + timedelta(seconds=rng.choice([0, 1, 10, 300]))
+                expected = [r for r in records if r.timestamp <= high and r.end >= low]
+                with self.subTest(count=count, low=low, high=high):
+                    self.assertEqual(index.overlapping(low, high), expected)
+
+    def test_open_spans(self):
+        records = [Span(at(0), datetime.max), Span(at(10), at(20))]
+        index = IntervalIndex(records, end=lambda r: r.end)
+        self.assertEqual(index.containing(at(1000)), [records[0]])
+        self.assertEqual(index.containing(at(15)), records)
+
+
+class TestTimeIndexRegistration(unittest.TestCase):
+    def test_built_once_per_context(self):
+        context = BugreportAnalysisContext()
+        builds = []
+
+        def build():
+            builds.append(1)
+            return IntervalIndex(context.get_result("Spans").data)
+
+        context.set_result("Spans", PluginResult([Span(at(0), at(0))]))
+        first = context.time_index("Spans", build)
+        self.assertIs(context.time_index("Spans", build), first)
+        self.assertEqual(len(builds), 1)
+
+        # A new result of the plugin invalidates the index built from it
+        context.set_result("Spans", PluginResult([Span(at(0), at(0))] * 2))
+        self.assertEqual(len(context.time_index("Spans", build)), 2)
+        context.remove_result("Spans")
+        self.assertNotIn("Spans", context.indexes)
+
+
+if __name__ == "__main__":
+    unittest.main()
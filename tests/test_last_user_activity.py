@@ -0,0 +1,147 @@
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from python_bugreport_parser.bugreport.bugreport_all import Bugreport, Log284
+from python_bugreport_parser.bugreport.bugreport_txt import BugreportTxt
+from python_bugreport_parser.bugreport.section import LogcatLine
+from python_bugreport_parser.plugins import BugreportAnalysisContext
+from python_bugreport_parser.plugins.last_user_activity_plugin import (
+    InteractionTable,
+    LastUserActivityPlugin,
+)
+
+START = datetime(2024, 8, 16, 10, 0, 0)
+
+MESSAGES = [
+    "3f1a2b com.foo/com.foo.Main (server), {touchableRegion=[0,0][1080,2400], "
+    "visible=true, trustedOverlay=false, flags=NOT_FOCUSABLE}, 9e NavigationBar0, "
+    "{visible=true}",
+    "9e NavigationBar0",
+    "9e NavigationBar0, ",
+    "StatusBar, {visible=false}",
+    "face",
+    "a1  Two  Words  (server) ,  {visible=true} , b2 Other",
+    "a1 Window, {visible=true}, {visible=false}, b2 Other",
+    "a1 Window, , {visible=true}",
+    "{visible=true}, a1 Window, {visible=false}",
+    ", a1 Window",
+    "a1 Window, {visible=true} tail, b2 Other",
+    "a1 Window, {outer={inner=1}}, b2 Other",
+    "a1 Window, }, {visible=true}",
+    "a1 Win{dow, x}, {visible=true}",
+    "a1 Window, b2 {x, y}, {visible=true}",
+]
+
+
+def interaction_line(message, seconds):
+    return LogcatLine(
+        timestamp=START + timedelta(seconds=seconds),
+        user="1000",
+        pid=1,
+        tid=1,
+        level="I",
+        tag="input_interaction",
+        message=f"Interaction with: {message}",
+    )
+
+
+def random_message(rng):
+    pieces = []
+    for _ in range(rng.randint(1, 4)):
+        pieces.append(
+            rng.choice(
+                [
+                    "3f1a2b com.foo/.Main",
+                    "9e NavigationBar0 (server)",
+                    "StatusBar",
+                    "",
+                    " ",
+                    "{visible=true}",
+                    "{touchableRegion=[0,0][1,2], visible=false}",
+                    "{a={b}}",
+                    "x}",
+                    "{y",
+                ]
+            )
+        )
+    return rng.choice([",", ", "]).join(pieces)
+
+
+class TestInteractionParsing(unittest.TestCase):
+    def assert_same_parse(self, message):
+        try:
+            expected = LastUserActivityPlugin._parse_components(message)
+        except IndexError:
+            # No window at all
+            with self.assertRaises(IndexError):
+                LastUserActivityPlugin._parse_message(message)
+            return
+        self.assertEqual(LastUserActivityPlugin._parse_message(message), expected)
+
+    def test_matches_component_split(self):
+        for message in MESSAGES:
+            with self.subTest(message=message):
+                self.assert_same_parse(message)
+
+    def test_matches_component_split_random(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            message = random_message(rng)
+            with self.subTest(message=message):
+                self.assert_same_parse(message)
+
+    def test_table(self):
+        table = InteractionTable.from_lines(
+            [interaction_line(m, s) for m, s in zip(MESSAGES[:4], [0, 10, 5, 10])]
+        )
+        self.assertEqual(len(table), 4)
+        self.assertEqual(table.window_ids[0], "3f1a2b")
+        self.assertEqual(table.components[3], "StatusBar")
+        self.assertTrue(table.servers[0])
+        self.assertEqual(table.attributes[3], {"visible": "false"})
+        self.assertIsNone(table[1].attributes)
+        self.assertEqual(
+            str(table[0]),
+            "InteractionLog(interaction_id=3f1a2b, component=com.foo/com.foo.Main, "
+            "attributes={'touchableRegion': '[0,0][1080,2400]', 'visible': 'true', "
+            "'trustedOverlay': 'false', 'flags': 'NOT_FOCUSABLE'}, ",
+        )
+
+    def test_last_before(self):
+        table = InteractionTable.from_lines(
+            [interaction_line(m, s) for m, s in zip(MESSAGES[:4], [0, 10, 5, 10])]
+        )
+        self.assertIsNone(table.last_before(START))
+        self.assertEqual(table.last_before(START + timedelta(seconds=1)), 0)
+        self.assertEqual(table.last_before(START + timedelta(seconds=10)), 2)
+        # The later line of the log among interactions at the same time
+        self.assertEqual(table.last_before(START + timedelta(seconds=11)), 3)
+        self.assertIsNone(InteractionTable.from_lines([]).last_before(START))
+
+    def test_without_event_log(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "bugreport.txt"
+            path.write_text("== dumpstate: 2024-08-16 10:00:10\n")
+            bugreport_txt = BugreportTxt(path)
+        bugreport_txt.error_timestamp = START
+        log284 = Log284()
+        log284.bugreport = Bugreport()
+        log284.bugreport.bugreport_txt = bugreport_txt
+        context = BugreportAnalysisContext()
+        context.bugreport = log284
+
+        result = LastUserActivityPlugin().analyze(context)
+        # The same shape as with interactions
+        self.assertIsInstance(result.data, InteractionTable)
+        self.assertEqual(len(result.data), 0)
+        self.assertEqual(
+            result.metadata,
+            {"description": "Interaction Log", "last_before_error": None},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
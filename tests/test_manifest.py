@@ -0,0 +1,67 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+from python_bugreport_parser.plugins import PluginRepo
+from python_bugreport_parser.plugins.manifest import PLUGIN_MANIFEST, PluginSpec
+
+PLUGIN_DIR = Path(__file__).parent.parent / "python_bugreport_parser" / "plugins"
+
+# Print the plugin modules and heavy libraries imported by a run of one plugin
+ONE_PLUGIN_RUN = """
+import sys
+from python_bugreport_parser.plugins import PluginRepo
+PluginRepo().select(["FocusRecentsPlugin"])
+print(sorted(m for m in sys.modules if m.endswith("_plugin") or m in ("pandas", "matplotlib")))
+"""
+
+# Print the bugreport modules and asyncio imported by importing the plugins
+PACKAGE_IMPORT = """
+import sys
+import python_bugreport_parser.plugins
+print(sorted(m for m in sys.modules if ".bugreport" in m or m == "asyncio"))
+"""
+
+
+class TestPluginManifest(unittest.TestCase):
+    def test_every_plugin_module_is_listed(self):
+        modules = {spec.module.rsplit(".", 1)[1] for spec in PLUGIN_MANIFEST}
+        self.assertEqual(modules, {path.stem for path in PLUGIN_DIR.glob("*_plugin.py")})
+
+    def test_manifest_matches_the_plugins(self):
+        for spec in PLUGIN_MANIFEST:
+            plugin = spec.instantiate()
+            self.assertEqual(PluginSpec.of(plugin), spec)
+
+    def run_python(self, code: str) -> str:
+        """The last line printed by `code` in a fresh interpreter"""
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=PLUGIN_DIR.parent.parent,
+        ).stdout
+        return output.splitlines()[-1]
+
+    def test_package_import_is_light(self):
+        self.assertEqual(self.run_python(PACKAGE_IMPORT), "[]")
+
+    def test_only_selected_plugins_are_imported(self):
+        self.assertEqual(
+            self.run_python(ONE_PLUGIN_RUN),
+            "['python_bugreport_parser.plugins.focus_recents_plugin', "
+            "'python_bugreport_parser.plugins.input_focus_plugin']",
+        )
+
+    def test_repo_names(self):
+        repo = PluginRepo()
+        names = repo.names()
+        self.assertLess(names.index("InputFocusPlugin"), names.index("FocusRecentsPlugin"))
+        self.assertLess(names.index("TimestampPlugin"), names.index("InvalidBugreportPlugin"))
+        self.assertEqual(len(names), len(PLUGIN_MANIFEST))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import io
+import json
+import unittest
+from dataclasses import dataclass
+from datetime import datetime
+
+from python_bugreport_parser.plugins import (
+    BasePlugin,
+    BugreportAnalysisContext,
+    PluginRepo,
+    PluginResult,
+)
+from python_bugreport_parser.plugins.budget import PluginBudgets
+from python_bugreport_parser.plugins.output import (
+    BinaryResultWriter,
+    JsonLinesResultWriter,
+    ResultWriter,
+    TextResultWriter,
+    read_binary_results,
+    to_jsonable,
+)
+
+
+@dataclass
+class Record:
+    timestamp: datetime
+    name: str
+
+
+class RecordsPlugin(BasePlugin):
+    def __init__(self):
+        super().__init__("Records")
+
+    def analyze(self, analysis_context):
+        return PluginResult(
+            [Record(datetime(2024, 8, 16, 10, i), f"r{i}") for i in range(3)],
+            metadata={"description": "Records"},
+        )
+
+    def report(self, result):
+        return "\n".join(self.iter_report(result))
+
+    def iter_report(self, result):
+        for record in result.data:
+            yield f"{record.timestamp} {record.name}"
+
+
+class CountPlugin(BasePlugin):
+    def __init__(self):
+        super().__init__("Count", ["Records"])
+
+    def analyze(self, analysis_context):
+        return PluginResult(len(analysis_context.get_result("Records").data))
+
+    def report(self, result):
+        return f"Count: {result.data}"
+
+
+class SlowPlugin(BasePlugin):
+    def __init__(self):
+        super().__init__("Slow")
+
+    def analyze(self, analysis_context):
+        return PluginResult(sum(range(100000)))
+
+    def report(self, result):
+        return f"Slow: {result.data}"
+
+
+class RecordingWriter(ResultWriter):
+    """Remembers what was written, and what was in the context at that time"""
+
+    def __init__(self):
+        self.events = []
+
+    def write_plugin(self, plugin, analysis_context):
+        self.events.append((plugin.name, sorted(analysis_context.results)))
+        super().write_plugin(plugin, analysis_context)
+
+    def write_result(self, plugin, result):
+        pass
+
+    def write_status(self, plugin, status, message):
+        self.events.append((plugin.name, status))
+
+
+class KeptOpenBytesIO(io.BytesIO):
+    def close(self):
+        pass
+
+
+def run(writer, mode="serial", budgets=None):
+    repo = PluginRepo([RecordsPlugin(), CountPlugin(), SlowPlugin()])
+    context = BugreportAnalysisContext()
+    repo.run_all(context, mode=mode, writer=writer, budgets=budgets)
+    return repo, context
+
+
+class TestResultWriters(unittest.TestCase):
+    def test_text_matches_report_all(self):
+        stream = io.StringIO()
+        repo, context = run(TextResultWriter(stream))
+        self.assertEqual(stream.getvalue(), repo.report_all(context) + "\n")
+        self.assertIn("2024-08-16 10:02:00 r2\nCount: 3\n", stream.getvalue())
+
+    def test_results_are_written_as_plugins_finish(self):
+        writer = RecordingWriter()
+        run(writer, mode="thread")
+        names = [name for name, _ in writer.events]
+        self.assertEqual(sorted(names), ["Count", "Records", "Slow"])
+        self.assertLess(names.index("Records"), names.index("Count"))
+        # Each result is written right after the plugin is done, before
+        # the plugins depending on it run
+        self.assertNotIn("Count", dict(writer.events)["Records"])
+
+    def test_jsonl(self):
+        stream = io.StringIO()
+        run(JsonLinesResultWriter(stream))
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(
+            records[0],
+            {
+                "plugin": "Records",
+                "version": "1.0.0",
+                "status": "ok",
+                "metadata": {"description": "Records"},
+                "count": 3,
+            },
+        )
+        self.assertEqual(
+            records[1],
+            {
+                "plugin": "Records",
+                "item": {"timestamp": "2024-08-16T10:00:00", "name": "r0"},
+            },
+        )
+        self.assertEqual(records[4]["plugin"], "Count")
+        self.assertEqual(records[4]["data"], 3)
+
+    def test_binary_roundtrip(self):
+        text = io.StringIO()
+        run(JsonLinesResultWriter(text))
+        expected = [json.loads(line) for line in text.getvalue().splitlines()]
+
+        stream = KeptOpenBytesIO()
+        writer = BinaryResultWriter(stream)
+        run(writer)
+        # Everything is readable before the writer is closed
+        partial = io.BytesIO(stream.getvalue())
+        self.assertEqual(list(read_binary_results(partial, chunk_size=7)), expected)
+
+        writer.close()
+        complete = io.BytesIO(stream.getvalue())
+        self.assertEqual(list(read_binary_results(complete)), expected)
+
+        with self.assertRaises(ValueError):
+            list(read_binary_results(io.BytesIO(b"not a result stream")))
+
+    def test_timed_out_plugins(self):
+        stream = io.StringIO()
+        budgets = PluginBudgets(per_plugin={"Records": 0.0})
+        run(JsonLinesResultWriter(stream), budgets=budgets)
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        statuses = {r["plugin"]: r["status"] for r in records}
+        self.assertEqual(
+            statuses, {"Records": "timed_out", "Count": "skipped", "Slow": "ok"}
+        )
+
+    def test_to_jsonable(self):
+        self.assertEqual(
+            to_jsonable({"a": (1, datetime(2024, 1, 1)), 2: {"b"}}),
+            {"a": [1, "2024-01-01T00:00:00"], "2": ["b"]},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,10 +20,10 @@ from .context import TEST_BUGREPORT_ANALYSIS_CONTEXT
 class TestTimestampPlugin(unittest.TestCase):
     def test_timestamp_plugin(self):
         plugin = TimestampPlugin()
-        plugin.analyze(TEST_BUGREPORT_ANALYSIS_CONTEXT)
+        result = plugin.analyze(TEST_BUGREPORT_ANALYSIS_CONTEXT)
 
         expected = "2024-08-16T10:02:11"
-        actual = plugin.report()
+        actual = plugin.report(result)
 
         # Check if the expected string is contained in the report
         self.assertIn(expected, actual)
@@ -51,10 +51,9 @@ class TestInputFocusPlugin(unittest.TestCase):
             ),
             None,
         )
-        plugin.analyze(TEST_BUGREPORT_ANALYSIS_CONTEXT)
-        results = plugin.report()
+        results = plugin.analyze(TEST_BUGREPORT_ANALYSIS_CONTEXT)
 
-        for result in plugin.records:
+        for result in results.data:
             print(result)
             events = []
             if result.request is not None:
@@ -85,12 +84,13 @@ class TestInputFocusPlugin(unittest.TestCase):
 class TestInvalidBugreportPlugin(unittest.TestCase):
     def test_invalid_bugreport_plugin(self):
         plugin = InvalidBugreportPlugin()
-        plugin.analyze(TEST_BUGREPORT_ANALYSIS_CONTEXT)
-        self.assertFalse(plugin.is_invalid)
+        result = plugin.analyze(TEST_BUGREPORT_ANALYSIS_CONTEXT)
+        # The bugreport is valid if a reboot is recorded around the error
+        self.assertTrue(result.data)
 
 
 class TestLastUserActivityPlugin(unittest.TestCase):
     def test_last_user_activity_plugin(self):
         plugin = LastUserActivityPlugin()
-        plugin.analyze(TEST_BUGREPORT_ANALYSIS_CONTEXT)
-        print(plugin.report())
+        result = plugin.analyze(TEST_BUGREPORT_ANALYSIS_CONTEXT)
+        print(plugin.report(result))
@@ -0,0 +1,92 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from python_bugreport_parser.bugreport.bugreport_all import BugreportDirs, Log284
+from python_bugreport_parser.report_cache import ReportCache, estimate_size
+
+from .test_bugreport_all import MINIMAL_BUGREPORT
+
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = Path(self.tmp.name)
+        self.keys = []
+        for name in ["a", "b", "c"]:
+            bugreport_dir = self.tmp_dir / name / "bugreport"
+            bugreport_dir.mkdir(parents=True)
+            (bugreport_dir / "bugreport-houji.txt").write_text(
+                MINIMAL_BUGREPORT, encoding="utf-8"
+            )
+            self.keys.append(self.tmp_dir / name)
+        self.loads = []
+
+        def loader(path: Path) -> Log284:
+            self.loads.append(path)
+            return Log284.from_dir(path)
+
+        self.cache = ReportCache(self.tmp_dir / "snapshots", loader=loader)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hits_and_misses(self):
+        first = self.cache.get(self.keys[0])
+        self.assertIs(self.cache.get(self.keys[0]), first)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertGreater(stats["retained_bytes"], 0)
+
+    def test_eviction_and_snapshot_reload(self):
+        size = estimate_size(self.cache.get(self.keys[0]))
+        self.cache.max_bytes = int(size * 2.5)
+        self.cache.get(self.keys[1])
+        self.cache.get(self.keys[2])
+        self.assertNotIn(self.keys[0], self.cache)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+        report = self.cache.get(self.keys[0])
+        # Reloaded from the snapshot, the loader only found the files again
+        self.assertEqual(self.loads, self.keys + self.keys[:1])
+        self.assertEqual(self.cache.stats()["snapshot_loads"], 1)
+        self.assertEqual(report.bugreport.loaded_components()[0], "bugreport_txt")
+        self.assertTrue(report.bugreport_txt.loaded)
+
+    def test_stale_snapshot_is_ignored(self):
+        self.cache.get(self.keys[0])
+        self.cache.evict(self.keys[0])
+        bugreport_txt = self.keys[0] / "bugreport" / "bugreport-houji.txt"
+        with open(bugreport_txt, "a", encoding="utf-8") as f:
+            f.write("changed\n")
+        self.cache.get(self.keys[0])
+        self.assertEqual(self.cache.stats()["snapshot_loads"], 0)
+
+        # Nor is one written by another version of the code
+        self.cache.evict(self.keys[0])
+        with mock.patch("python_bugreport_parser.report_cache.SNAPSHOT_VERSION", 1):
+            self.cache.get(self.keys[0])
+        self.assertEqual(self.cache.stats()["snapshot_loads"], 0)
+        self.cache.evict(self.keys[0])
+        self.cache.get(self.keys[0])
+        self.assertEqual(self.cache.stats()["snapshot_loads"], 1)
+
+    def test_snapshot_is_validated_without_hashing(self):
+        self.cache.get(self.keys[0])
+        self.cache.evict(self.keys[0])
+        with mock.patch.object(
+            BugreportDirs, "fingerprint", side_effect=AssertionError
+        ) as fingerprint:
+            report = self.cache.get(self.keys[0])
+        self.assertEqual(self.cache.stats()["snapshot_loads"], 1)
+        fingerprint.assert_not_called()
+        # The fingerprint by content came along with the snapshot
+        self.assertEqual(report.fingerprint, Log284.from_dir(self.keys[0]).fingerprint)
+
+    def test_budget_keeps_most_recent(self):
+        self.cache.max_bytes = 0
+        self.cache.get(self.keys[0])
+        self.cache.get(self.keys[1])
+        self.assertEqual(len(self.cache), 1)
+        self.assertIn(self.keys[1], self.cache)
@@ -0,0 +1,211 @@
+import tempfile
+import unittest
+from datetime import timedelta
+from pathlib import Path
+
+from python_bugreport_parser.bugreport.bugreport_all import Log284
+from python_bugreport_parser.bugreport.bugreport_txt import BugreportTxt
+from python_bugreport_parser.bugreport.requirements import DataRequirements
+from python_bugreport_parser.bugreport.section import (
+    DumpsysSection,
+    LogcatSection,
+    OtherSection,
+)
+from python_bugreport_parser.plugins import PluginRepo
+
+DELIMITER = "-" * 79
+
+BUGREPORT = "\n".join(
+    [
+        "== dumpstate: 2024-08-16 10:02:11",
+        "Uptime: up 0 weeks, 0 days, 1 hour, 59 minutes",
+        "------ EVENT LOG (logcat -b events -v threadtime -v printable -v uid -d *:v) ------",
+        "--------- beginning of events",
+        "08-16 10:00:00.000  1000  1234  1234 I input_focus: [Focus request 1,w]",
+        "------ 0.100s was the duration of 'EVENT LOG' ------",
+        "------ DUMPSYS (/system/bin/dumpsys -T 30000) ------",
+        DELIMITER,
+        "DUMP OF SERVICE wifi:",
+        "wifi stuff",
+        "--------- 0.050s was the duration of dumpsys wifi, ending at: 2024-08-16 10:02:21",
+        DELIMITER,
+        "DUMP OF SERVICE window:",
+        "window stuff",
+        "--------- 0.020s was the duration of dumpsys window, ending at: 2024-08-16 10:02:22",
+        DELIMITER,
+        "------ 1.000s was the duration of 'DUMPSYS' ------",
+        "------ VM TRACES AT LAST ANR (/data/anr/anr_1: 2024-08-16 10:00:00) ------",
+        "----- pid 4321 at 2024-08-16 09:30:00.000000000+0700 -----",
+        "Cmd line: com.foo",
+        "----- end 4321 -----",
+        "------ 0.010s was the duration of 'VM TRACES AT LAST ANR' ------",
+        "",
+    ]
+)
+
+
+class TestDataRequirements(unittest.TestCase):
+    def test_union_and_covers(self):
+        events = DataRequirements.of(sections=["EVENT LOG"])
+        wifi = DataRequirements.of(dumpsys_services=["wifi"], dumpstate_board=True)
+        union = events.union(wifi)
+        self.assertTrue(union.covers(events))
+        self.assertTrue(union.covers(wifi))
+        self.assertFalse(events.covers(union))
+        self.assertTrue(DataRequirements.everything().covers(union))
+        self.assertFalse(union.covers(DataRequirements.everything()))
+        self.assertEqual(union.union(DataRequirements.everything()).sections, None)
+
+    def test_logcat_window(self):
+        minutes = DataRequirements.of(
+            sections=["SYSTEM LOG"], logcat_window=timedelta(minutes=5)
+        )
+        hour = DataRequirements.of(
+            sections=["EVENT LOG"], logcat_window=timedelta(hours=1)
+        )
+        wifi = DataRequirements.of(dumpsys_services=["wifi"])
+        # Requirements without logcat sections keep the window
+        self.assertEqual(minutes.union(wifi).logcat_window, timedelta(minutes=5))
+        self.assertEqual(wifi.union(minutes).logcat_window, timedelta(minutes=5))
+        self.assertEqual(minutes.union(hour).logcat_window, timedelta(hours=1))
+        all_lines = DataRequirements.of(sections=["SYSTEM LOG"])
+        self.assertIsNone(minutes.union(all_lines).logcat_window)
+
+        self.assertTrue(minutes.union(hour).covers(minutes))
+        self.assertFalse(minutes.covers(minutes.union(hour)))
+
+        # A window set for every plugin only narrows theirs
+        self.assertEqual(
+            all_lines.with_logcat_window(timedelta(hours=1)).logcat_window,
+            timedelta(hours=1),
+        )
+        self.assertEqual(
+            minutes.with_logcat_window(timedelta(hours=1)).logcat_window,
+            timedelta(minutes=5),
+        )
+        self.assertIs(minutes.with_logcat_window(None), minutes)
+        self.assertFalse(minutes.covers(all_lines))
+        self.assertTrue(all_lines.covers(minutes))
+        self.assertTrue(minutes.covers(DataRequirements()))
+
+    def test_wants(self):
+        requirements = DataRequirements.of(
+            sections=["EVENT LOG"], dumpsys_services=["wifi"], anr_traces=True
+        )
+        self.assertTrue(requirements.wants_section("EVENT LOG"))
+        self.assertFalse(requirements.wants_section("SYSTEM LOG"))
+        self.assertTrue(requirements.wants_section("DUMPSYS"))
+        self.assertTrue(requirements.wants_section("VM TRACES AT LAST ANR"))
+        self.assertTrue(requirements.wants_dumpsys_service("wifi"))
+        self.assertFalse(requirements.wants_dumpsys_service("window"))
+
+        everything = DataRequirements.everything()
+        self.assertTrue(everything.wants_section("KERNEL LOG"))
+        self.assertTrue(everything.wants_dumpsys_service("window"))
+        self.assertFalse(DataRequirements().wants_section("DUMPSYS"))
+
+
+class TestSelectiveLoading(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.feedback_dir = Path(self.tmp.name)
+        bugreport_dir = self.feedback_dir / "bugreport"
+        bugreport_dir.mkdir()
+        self.path = bugreport_dir / "bugreport-houji.txt"
+        self.path.write_text(BUGREPORT, encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def load(self, requirements=None) -> BugreportTxt:
+        bugreport_txt = BugreportTxt(self.path)
+        bugreport_txt.load(requirements)
+        return bugreport_txt
+
+    def test_only_required_sections_are_parsed(self):
+        full = self.load()
+        partial = self.load(DataRequirements.of(dumpsys_services=["wifi"]))
+
+        # Every section is still listed, with the same line numbers
+        self.assertEqual(
+            [(s.name, s.start_line, s.end_line) for s in full.sections],
+            [(s.name, s.start_line, s.end_line) for s in partial.sections],
+        )
+        contents = {s.name: s.content for s in partial.sections}
+        self.assertIsInstance(contents["EVENT LOG"], OtherSection)
+        self.assertIsInstance(contents["VM TRACES AT LAST ANR"], OtherSection)
+        self.assertIsInstance(contents["DUMPSYS"], DumpsysSection)
+        self.assertEqual([e.name for e in contents["DUMPSYS"].entries], ["wifi"])
+        self.assertEqual(contents["DUMPSYS"].entries[0].data, "wifi stuff")
+
+        full_contents = {s.name: s.content for s in full.sections}
+        self.assertIsInstance(full_contents["EVENT LOG"], LogcatSection)
+        self.assertEqual(
+            [e.name for e in full_contents["DUMPSYS"].entries], ["wifi", "window"]
+        )
+
+    def test_wider_requirements_reload(self):
+        log284 = Log284.from_dir(self.feedback_dir)
+        log284.require(DataRequirements.of(sections=["EVENT LOG"]))
+        sections = {s.name: s.content for s in log284.bugreport_txt.sections}
+        self.assertIsInstance(sections["DUMPSYS"], OtherSection)
+
+        # Already covered, nothing is reloaded
+        bugreport_txt = log284.bugreport_txt
+        log284.require(DataRequirements())
+        self.assertIs(log284.bugreport_txt, bugreport_txt)
+
+        log284.require(DataRequirements.of(dumpsys_services=["window"]))
+        sections = {s.name: s.content for s in log284.bugreport_txt.sections}
+        self.assertIsInstance(sections["EVENT LOG"], LogcatSection)
+        self.assertEqual([e.name for e in sections["DUMPSYS"].entries], ["window"])
+
+    def test_logcat_window(self):
+        full = self.load()
+        windowed = self.load(
+            DataRequirements.of(sections=["EVENT LOG"], logcat_window=timedelta(0))
+        )
+        self.assertEqual(len(full.sections[0].content.entries), 1)
+        # The line is two minutes before the error timestamp
+        self.assertEqual(windowed.sections[0].content.entries, [])
+        self.assertEqual(
+            [(s.name, s.start_line, s.end_line) for s in full.sections],
+            [(s.name, s.start_line, s.end_line) for s in windowed.sections],
+        )
+        windowed = self.load(
+            DataRequirements.of(
+                sections=["EVENT LOG"], logcat_window=timedelta(minutes=5)
+            )
+        )
+        self.assertEqual(
+            windowed.sections[0].content.entries, full.sections[0].content.entries
+        )
+
+        # The window is centered on an error timestamp set before loading
+        bugreport_txt = BugreportTxt(self.path)
+        error_timestamp = full.sections[0].content.entries[0].timestamp
+        bugreport_txt.set_error_timestamp(error_timestamp)
+        bugreport_txt.load(
+            DataRequirements.of(sections=["EVENT LOG"], logcat_window=timedelta(0))
+        )
+        self.assertEqual(bugreport_txt.error_timestamp, error_timestamp)
+        self.assertEqual(
+            bugreport_txt.sections[0].content.entries, full.sections[0].content.entries
+        )
+
+    def test_plugin_selection(self):
+        repo = PluginRepo()
+        plugins = repo.select(["FocusRecentsPlugin"])
+        self.assertEqual(
+            [p.name for p in plugins], ["InputFocusPlugin", "FocusRecentsPlugin"]
+        )
+        self.assertEqual(
+            PluginRepo.requirements_for(plugins),
+            DataRequirements.of(sections=["EVENT LOG"]),
+        )
+        with self.assertRaises(Exception):
+            repo.select(["NoSuchPlugin"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+import tempfile
+import unittest
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from python_bugreport_parser.bugreport.requirements import DataRequirements
+from python_bugreport_parser.plugins import (
+    BasePlugin,
+    BugreportAnalysisContext,
+    PluginRepo,
+    PluginResult,
+)
+from python_bugreport_parser.plugins.result_cache import (
+    PluginResultCache,
+    resolve_cache_keys,
+)
+from python_bugreport_parser.plugins.scheduler import DagScheduler
+
+
+# Names of the plugins whose analyze() ran
+CALLS = []
+
+
+class FakeReport:
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.requirements = DataRequirements()
+
+    def require(self, requirements):
+        self.requirements = requirements
+
+
+class StatReport(FakeReport):
+    """Records whether the content of the report had to be hashed"""
+
+    def __init__(self, fingerprint):
+        super().__init__(fingerprint)
+        self.by_content = []
+
+    def cache_fingerprint(self, by_content):
+        self.by_content.append(by_content)
+        return self.fingerprint if by_content else "stat"
+
+
+class CountingPlugin(BasePlugin):
+    def __init__(self, name, dependencies=None, version="1.0.0"):
+        super().__init__(name, dependencies)
+        self._version = version
+
+    def analyze(self, analysis_context):
+        CALLS.append(self.name)
+        inputs = [analysis_context.get_result(dep).data for dep in self.dependencies]
+        return PluginResult(f"{self.name}{inputs}")
+
+    def report(self, result):
+        return result.data
+
+    def version(self):
+        return self._version
+
+
+class LogcatPlugin(CountingPlugin):
+    def __init__(self):
+        super().__init__("Logcat")
+
+    def requirements(self):
+        return DataRequirements.of(sections=["EVENT LOG"])
+
+
+def make_plugins(b_version="1.0.0"):
+    return [
+        CountingPlugin("A"),
+        CountingPlugin("B", version=b_version),
+        CountingPlugin("C", ["A", "B"]),
+        CountingPlugin("D", ["A"]),
+    ]
+
+
+def run(plugins, cache, fingerprint="report-1", mode="serial"):
+    context = BugreportAnalysisContext()
+    context.bugreport = FakeReport(fingerprint)
+    plugins = PluginRepo.resolve_execution_order(plugins)
+    schedule = DagScheduler(mode, result_cache=cache).run(plugins, context)
+    return context, schedule
+
+
+class TestPluginResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = PluginResultCache(Path(self.tmp.name))
+        CALLS.clear()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_keys_depend_on_dependencies(self):
+        keys = resolve_cache_keys("report-1", make_plugins())
+        bumped = resolve_cache_keys("report-1", make_plugins(b_version="2.0.0"))
+        self.assertEqual(keys["A"], bumped["A"])
+        self.assertEqual(keys["D"], bumped["D"])
+        self.assertNotEqual(keys["B"], bumped["B"])
+        self.assertNotEqual(keys["C"], bumped["C"])
+        other = resolve_cache_keys("report-2", make_plugins())
+        self.assertNotEqual(keys["A"], other["A"])
+
+    def test_keys_depend_on_parser_version(self):
+        keys = resolve_cache_keys("report-1", make_plugins())
+        with mock.patch(
+            "python_bugreport_parser.bugreport.bugreport_txt.PARSER_VERSION", 0
+        ):
+            old = resolve_cache_keys("report-1", make_plugins())
+        self.assertTrue(all(keys[name] != old[name] for name in keys))
+
+    def test_rerun_is_served_from_cache(self):
+        first, schedule = run(make_plugins(), self.cache)
+        self.assertEqual(schedule.cached, [])
+
+        for mode in ["serial", "thread"]:
+            CALLS.clear()
+            plugins = make_plugins()
+            context, schedule = run(plugins, self.cache, mode=mode)
+            self.assertEqual(sorted(schedule.cached), ["A", "B", "C", "D"])
+            self.assertEqual(CALLS, [])
+            self.assertEqual(context.get_result("C").data, first.get_result("C").data)
+            self.assertEqual(
+                plugins[2].report(context.get_result("C")), "C['A[]', 'B[]']"
+            )
+            self.assertTrue(context.plugin_stats["C"].cached)
+
+    def test_version_bump_reruns_dependents_only(self):
+        run(make_plugins(), self.cache)
+        CALLS.clear()
+        _, schedule = run(make_plugins(b_version="2.0.0"), self.cache, mode="thread")
+        self.assertEqual(sorted(schedule.cached), ["A", "D"])
+        self.assertEqual(CALLS, ["B", "C"])
+
+    def test_keys_depend_on_logcat_window(self):
+        context = BugreportAnalysisContext()
+        context.bugreport = FakeReport("report-1")
+        repo = PluginRepo([LogcatPlugin()])
+        repo.run_all(context, mode="serial", result_cache=self.cache)
+        repo.run_all(
+            context,
+            mode="serial",
+            result_cache=self.cache,
+            logcat_window=timedelta(minutes=5),
+        )
+        # Computed again from fewer lines, then cached separately
+        self.assertEqual(CALLS, ["Logcat", "Logcat"])
+        context.result_fingerprints.clear()
+        schedule = repo.run_all(context, mode="serial", result_cache=self.cache)
+        self.assertEqual(schedule.cached, ["Logcat"])
+
+    def test_without_fingerprint_nothing_is_cached(self):
+        run(make_plugins(), self.cache, fingerprint="")
+        _, schedule = run(make_plugins(), self.cache, fingerprint="")
+        self.assertEqual(schedule.cached, [])
+        self.assertEqual(len(CALLS), 8)
+
+
+class TestIncrementalRun(unittest.TestCase):
+    def setUp(self):
+        CALLS.clear()
+        self.context = BugreportAnalysisContext()
+        self.context.bugreport = FakeReport("report-1")
+
+    def test_rerun_reuses_context_results(self):
+        repo = PluginRepo(make_plugins())
+        repo.run_all(self.context, mode="serial")
+        first = self.context.get_result("C")
+        CALLS.clear()
+
+        schedule = repo.run_all(self.context, mode="thread")
+        self.assertEqual(CALLS, [])
+        self.assertEqual(schedule.recomputed, [])
+        self.assertEqual(sorted(schedule.reused), ["A", "B", "C", "D"])
+        self.assertIs(self.context.get_result("C"), first)
+
+    def test_changed_plugin_recomputes_dependents(self):
+        PluginRepo(make_plugins()).run_all(self.context, mode="serial")
+        CALLS.clear()
+        repo = PluginRepo(make_plugins(b_version="2.0.0"))
+        schedule = repo.run_all(self.context, mode="serial")
+        self.assertEqual(schedule.recomputed, ["B", "C"])
+        self.assertEqual(sorted(schedule.reused), ["A", "D"])
+
+    def test_content_is_only_hashed_for_the_result_cache(self):
+        self.context.bugreport = StatReport("report-1")
+        repo = PluginRepo(make_plugins())
+        repo.run_all(self.context, mode="serial")
+        schedule = repo.run_all(self.context, mode="serial")
+        self.assertEqual(sorted(schedule.reused), ["A", "B", "C", "D"])
+        self.assertEqual(self.context.bugreport.by_content, [False, False])
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PluginResultCache(Path(tmp))
+            repo.run_all(self.context, mode="serial", result_cache=cache)
+        self.assertEqual(self.context.bugreport.by_content, [False, False, True])
+
+    def test_invalidate(self):
+        repo = PluginRepo(make_plugins())
+        repo.run_all(self.context, mode="serial")
+        CALLS.clear()
+
+        invalidated = repo.invalidate(self.context, "A")
+        self.assertEqual(sorted(invalidated), ["A", "C", "D"])
+        self.assertIsNone(self.context.get_result("C"))
+        self.assertIsNotNone(self.context.get_result("B"))
+
+        schedule = repo.run_all(self.context, mode="thread")
+        self.assertEqual(sorted(schedule.recomputed), ["A", "C", "D"])
+        self.assertEqual(schedule.reused, ["B"])
+        self.assertEqual(sorted(CALLS), ["A", "C", "D"])
+        with self.assertRaises(Exception):
+            repo.invalidate(self.context, "NoSuchPlugin")
+
+    def test_invalidate_drops_cached_results(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PluginResultCache(Path(tmp))
+            repo = PluginRepo(make_plugins())
+            repo.run_all(self.context, mode="serial", result_cache=cache)
+            repo.invalidate(self.context, "C", result_cache=cache)
+            CALLS.clear()
+
+            schedule = repo.run_all(self.context, mode="serial", result_cache=cache)
+            self.assertEqual(schedule.recomputed, ["C"])
+            self.assertEqual(schedule.cached, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+import io
+import json
+import time
+import tracemalloc
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+from python_bugreport_parser.bugreport.bugreport_all import LazyComponent
+from python_bugreport_parser.plugins import (
+    BasePlugin,
+    BugreportAnalysisContext,
+    PluginRepo,
+    PluginResult,
+)
+from python_bugreport_parser.plugins.budget import (
+    PluginBudgets,
+    PluginTimeout,
+    checkpoint,
+    deadline,
+)
+from python_bugreport_parser.plugins.scheduler import DagScheduler, critical_path
+
+
+class SleepPlugin(BasePlugin):
+    def __init__(self, name, dependencies=None, seconds=0.0):
+        super().__init__(name, dependencies)
+        self.seconds = seconds
+
+    def analyze(self, analysis_context):
+        # Record which dependencies had finished when this plugin started
+        seen = sorted(analysis_context.results)
+        time.sleep(self.seconds)
+        return PluginResult(seen)
+
+    def report(self, result):
+        return f"{self.name}: {result.data}"
+
+
+class AllocatingPlugin(BasePlugin):
+    def __init__(self):
+        super().__init__("Allocating")
+
+    def analyze(self, analysis_context):
+        data = [bytes(1024) for _ in range(1024)]
+        return PluginResult(len(data))
+
+    def report(self, result):
+        return ""
+
+    def version(self):
+        return "2.0.0"
+
+
+class FailingPlugin(BasePlugin):
+    def __init__(self):
+        super().__init__("Failing")
+
+    def analyze(self, analysis_context):
+        raise ValueError("broken plugin")
+
+    def report(self, result):
+        return ""
+
+
+class LoopingPlugin(BasePlugin):
+    """Runs for 10 seconds unless cancelled at a checkpoint"""
+
+    def __init__(self, name="Looping"):
+        super().__init__(name)
+
+    def analyze(self, analysis_context):
+        for _ in range(1000):
+            checkpoint()
+            time.sleep(0.01)
+        return PluginResult(None)
+
+    def report(self, result):
+        return ""
+
+
+class SlowReport:
+    """A report whose only component takes a while to load"""
+
+    bugreport_txt = LazyComponent()
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self._component_locks = {}
+
+    def _load_bugreport_txt(self):
+        time.sleep(self.seconds)
+        return "bugreport.txt"
+
+    def preload(self):
+        getattr(self, "bugreport_txt")
+
+
+class ReadingPlugin(BasePlugin):
+    def __init__(self):
+        super().__init__("Reading")
+
+    def analyze(self, analysis_context):
+        return PluginResult(analysis_context.bugreport.bugreport_txt)
+
+    def report(self, result):
+        return result.data
+
+
+def make_plugins():
+    plugins = [
+        SleepPlugin("A", seconds=0.2),
+        SleepPlugin("B", seconds=0.2),
+        SleepPlugin("C", ["A"], seconds=0.1),
+        SleepPlugin("D", ["B", "C"], seconds=0.0),
+    ]
+    return PluginRepo.resolve_execution_order(plugins)
+
+
+class TestDagScheduler(unittest.TestCase):
+    def check_results(self, plugins, context):
+        self.assertEqual(sorted(context.results), ["A", "B", "C", "D"])
+        self.assertIn("A", context.get_result("C").data)
+        self.assertIn("B", context.get_result("D").data)
+        self.assertIn("C", context.get_result("D").data)
+
+    def test_serial(self):
+        plugins = make_plugins()
+        context = BugreportAnalysisContext()
+        schedule = DagScheduler("serial").run(plugins, context)
+        self.check_results(plugins, context)
+        self.assertEqual([p.name for p in plugins], ["A", "B", "C", "D"])
+        self.assertGreaterEqual(schedule.wall_time, 0.5)
+
+    def test_thread(self):
+        plugins = make_plugins()
+        context = BugreportAnalysisContext()
+        schedule = DagScheduler("thread", max_workers=4).run(plugins, context)
+        self.check_results(plugins, context)
+        # A and B run together, so the run takes about A + C
+        self.assertLess(schedule.wall_time, 0.45)
+        self.assertEqual(schedule.critical_path, ["A", "C", "D"])
+
+    def test_process(self):
+        plugins = make_plugins()
+        context = BugreportAnalysisContext()
+        DagScheduler("process", max_workers=2).run(plugins, context)
+        self.check_results(plugins, context)
+
+    def test_failure_propagates(self):
+        plugins = [SleepPlugin("A"), FailingPlugin()]
+        for mode in ["serial", "thread"]:
+            with self.assertRaises(ValueError):
+                DagScheduler(mode).run(plugins, BugreportAnalysisContext())
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            DagScheduler("fibers")
+
+    def test_concurrent_contexts(self):
+        # One repo analyzes several reports at the same time
+        repo = PluginRepo(make_plugins())
+        contexts = [BugreportAnalysisContext() for _ in range(4)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda c: repo.run_all(c, mode="thread"), contexts))
+        for context in contexts:
+            self.check_results(repo.get_all(), context)
+            self.assertIn("D: ['A', 'B', 'C']", repo.report_all(context))
+
+    def test_run_all_defaults(self):
+        repo = PluginRepo(make_plugins())
+        context = BugreportAnalysisContext()
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            schedule = repo.run_all(context)
+        self.check_results(repo.get_all(), context)
+        self.assertEqual(schedule.mode, "serial")
+        # The schedule is returned, printing it is up to the caller
+        self.assertEqual(stdout.getvalue(), "")
+
+    def test_critical_path(self):
+        plugins = make_plugins()
+        durations = {"A": 1.0, "B": 3.0, "C": 1.0, "D": 0.5}
+        self.assertEqual(critical_path(plugins, durations), ["B", "D"])
+
+
+class TestTimeBudgets(unittest.TestCase):
+    def test_checkpoint(self):
+        checkpoint()  # No deadline outside of plugin runs
+        with deadline("Plugin", 0.0):
+            time.sleep(0.01)
+            with self.assertRaises(PluginTimeout):
+                checkpoint()
+        checkpoint()
+
+    def test_timeout_skips_dependents(self):
+        for mode in ["serial", "thread", "process"]:
+            plugins = PluginRepo.resolve_execution_order(
+                [
+                    LoopingPlugin("A"),
+                    SleepPlugin("B"),
+                    SleepPlugin("C", ["A", "B"]),
+                    SleepPlugin("D", ["C"]),
+                ]
+            )
+            context = BugreportAnalysisContext()
+            budgets = PluginBudgets(default=0.1)
+            start = time.perf_counter()
+            schedule = DagScheduler(mode, budgets=budgets).run(plugins, context)
+            self.assertLess(time.perf_counter() - start, 5.0)
+
+            self.assertEqual(schedule.timed_out, ["A"])
+            self.assertEqual(schedule.skipped, {"C": "A", "D": "A"})
+            self.assertEqual(sorted(context.results), ["B"])
+            self.assertEqual(context.timed_out, {"A": 0.1})
+            self.assertEqual(context.skipped, {"C": "A", "D": "A"})
+            self.assertTrue(context.plugin_stats["A"].timed_out)
+            self.assertEqual(context.stats_summary()["timed_out"], ["A"])
+
+    def test_overrun_without_checkpoint(self):
+        plugins = [SleepPlugin("A", seconds=0.2), SleepPlugin("B", seconds=0.2)]
+        budgets = PluginBudgets(per_plugin={"A": 0.05})
+        context = BugreportAnalysisContext()
+        repo = PluginRepo(plugins)
+        schedule = repo.run_all(context, mode="thread", budgets=budgets)
+        self.assertEqual(schedule.timed_out, ["A"])
+        self.assertEqual(sorted(context.results), ["B"])
+        self.assertIn("A: timed out after 0.05s", repo.report_all(context))
+
+        # Timeouts are cleared when the plugin runs again in budget
+        schedule = repo.run_all(context, mode="thread")
+        self.assertEqual(schedule.recomputed, ["A"])
+        self.assertEqual(context.timed_out, {})
+
+
+    def test_loading_is_not_budgeted(self):
+        for mode in ["serial", "thread"]:
+            context = BugreportAnalysisContext()
+            context.bugreport = SlowReport(0.3)
+            budgets = PluginBudgets(default=0.1)
+            schedule = DagScheduler(mode, budgets=budgets).run(
+                [ReadingPlugin()], context
+            )
+            self.assertEqual(schedule.timed_out, [])
+            self.assertEqual(context.get_result("Reading").data, "bugreport.txt")
+            self.assertGreaterEqual(schedule.load_time, 0.3)
+
+            # Nothing is loaded when no plugin has to run
+            context.bugreport = SlowReport(0.3)
+            schedule = DagScheduler(mode, budgets=budgets).run(
+                [ReadingPlugin()], context
+            )
+            self.assertEqual(schedule.reused, ["Reading"])
+            self.assertEqual(schedule.load_time, 0.0)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_stats_are_recorded(self):
+        plugins = make_plugins()
+        context = BugreportAnalysisContext()
+        DagScheduler("thread").run(plugins, context)
+
+        stats = context.plugin_stats["A"]
+        self.assertEqual(stats.version, "1.0.0")
+        self.assertGreaterEqual(stats.wall_time, 0.2)
+        # Sleeping takes no CPU
+        self.assertLess(stats.cpu_time, 0.1)
+        self.assertIsNone(stats.peak_memory)
+
+        summary = json.loads(json.dumps(context.stats_summary()))
+        self.assertEqual(len(summary["plugins"]), 4)
+        self.assertIn(summary["slowest"], ["A", "B"])
+
+    def test_trace_memory(self):
+        scheduler = DagScheduler("thread", trace_memory=True)
+        self.assertEqual(scheduler.mode, "serial")
+
+        context = BugreportAnalysisContext()
+        scheduler.run([AllocatingPlugin()], context)
+        stats = context.plugin_stats["Allocating"]
+        self.assertEqual(stats.version, "2.0.0")
+        self.assertGreater(stats.peak_memory, 1024 * 1024)
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+if __name__ == "__main__":
+    unittest.main()
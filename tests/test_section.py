@@ -1,5 +1,6 @@
+import random
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
 from python_bugreport_parser.bugreport import (
     LogcatSection,
     LogcatLine,
@@ -66,3 +67,54 @@ class TestLogcatSection(unittest.TestCase):
         # Verify all results have correct level
         for entry in results:
             self.assertEqual(entry.level, "D")
+
+
+def logcat_lines(count, seed, disorder=0):
+    """One line a second from 10:00, with markers and lines a bit out of order"""
+    rng = random.Random(seed)
+    start = datetime(2024, 8, 16, 10, 0, 0)
+    lines = ["--------- beginning of main"]
+    for i in range(count):
+        offset = i - rng.randint(0, disorder) if disorder else i
+        timestamp = (start + timedelta(seconds=offset)).strftime("%m-%d %H:%M:%S.%f")
+        lines.append(f"{timestamp[:-3]}  1000  1500  1600 I Tag: line {i}")
+        if rng.random() < 0.05:
+            lines.append("--------- beginning of system")
+    return lines
+
+
+class TestLogcatWindow(unittest.TestCase):
+    def assert_same_as_filtering(self, lines, window):
+        full = LogcatSection()
+        full.parse(lines, 2024)
+        expected = [e for e in full.entries if window[0] <= e.timestamp <= window[1]]
+        windowed = LogcatSection(window)
+        windowed.parse(lines, 2024)
+        self.assertEqual(windowed.entries, expected)
+
+        # The same lines as spans of a file, cut by lines of other sections
+        raw, spans = b"", []
+        for i in range(0, max(len(lines), 1), 700):
+            raw += b"------ OTHER ------\n"
+            chunk = "\n".join(lines[i : i + 700]).encode()
+            spans.append((len(raw), len(raw) + len(chunk)))
+            raw += chunk + b"\n"
+        from_spans = LogcatSection(window)
+        from_spans.parse_spans(raw, spans, 2024)
+        self.assertEqual(from_spans.entries, expected)
+
+    def test_same_lines_as_filtering(self):
+        at = datetime(2024, 8, 16, 10, 0, 0)
+        for seed, disorder in [(0, 0), (1, 5), (2, 30)]:
+            lines = logcat_lines(2000, seed, disorder)
+            windows = [(100, 400), (0, 0), (-50, 10), (1990, 3000), (5000, 6000)]
+            for start, end in windows:
+                window = (at + timedelta(seconds=start), at + timedelta(seconds=end))
+                with self.subTest(seed=seed, window=window):
+                    self.assert_same_as_filtering(lines, window)
+
+    def test_no_logcat_lines(self):
+        at = datetime(2024, 8, 16, 10, 0, 0)
+        self.assert_same_as_filtering([], (at, at))
+        self.assert_same_as_filtering(["--------- beginning of main"], (at, at))
+
@@ -0,0 +1,150 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from python_bugreport_parser.bugreport.anr_record import AnrProcess, AnrRecord
+from python_bugreport_parser.bugreport.bugreport_all import Bugreport
+from python_bugreport_parser.bugreport.bugreport_txt import BugreportTxt
+from python_bugreport_parser.bugreport.dumpstate_board import (
+    DumpstateBoard,
+    ThermalRecord,
+)
+from python_bugreport_parser.bugreport.section import LogcatSection, Section
+from python_bugreport_parser.bugreport.timeline import (
+    ANR_DUMPS,
+    EVENT_LOG,
+    SYSTEM_LOG,
+    THERMAL,
+    Timeline,
+)
+
+SYSTEM = """\
+08-16 10:00:00.000  1000  1500  1600 I ActivityManager: first
+08-16 10:00:02.000  1000  1500  1600 I ActivityManager: second
+08-16 10:00:04.000  1000  1500  1600 I ActivityManager: third
+""".splitlines()
+
+EVENTS = """\
+08-16 10:00:01.000  1000  1500  1600 I am_anr: [0,4321,com.foo,0,timeout]
+08-16 10:00:02.000  1000  1500  1600 I wm_task_moved: [1,2,3]
+""".splitlines()
+
+
+def logcat(lines):
+    section = LogcatSection()
+    section.parse(lines, 2024)
+    return section
+
+
+def at(seconds):
+    return datetime(2024, 8, 16, 10, 0, 0) + timedelta(seconds=seconds)
+
+
+def messages(events):
+    return [getattr(e.record, "message", e.record) for e in events]
+
+
+class TestTimeline(unittest.TestCase):
+    def setUp(self):
+        self.timeline = Timeline()
+        self.timeline.add_source(SYSTEM_LOG, logcat(SYSTEM).entries)
+        self.timeline.add_source(EVENT_LOG, logcat(EVENTS).entries)
+
+    def test_merged_in_time_order(self):
+        events = list(self.timeline.events())
+        self.assertEqual(
+            [e.source for e in events],
+            [SYSTEM_LOG, EVENT_LOG, SYSTEM_LOG, EVENT_LOG, SYSTEM_LOG],
+        )
+        timestamps = [e.timestamp for e in events]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_sources(self):
+        events = list(self.timeline.events(sources=[EVENT_LOG, "unknown"]))
+        self.assertEqual(messages(events), ["[0,4321,com.foo,0,timeout]", "[1,2,3]"])
+
+    def test_window(self):
+        events = list(self.timeline.events(start=at(1), end=at(2)))
+        self.assertEqual(
+            messages(events), ["[0,4321,com.foo,0,timeout]", "second", "[1,2,3]"]
+        )
+        events = list(self.timeline.around(at(3), timedelta(seconds=1)))
+        self.assertEqual(messages(events), ["second", "[1,2,3]", "third"])
+        events = list(self.timeline.around(at(4), timedelta(0), timedelta(hours=1)))
+        self.assertEqual(messages(events), ["third"])
+
+    def test_lines_out_of_order(self):
+        # Logcat buffers are merged, a line may be a little older than the
+        # line above it
+        lines = [
+            "08-16 10:00:00.000  1000  1500  1600 I Tag: first",
+            "08-16 10:00:02.000  1000  1500  1600 I Tag: third",
+            "08-16 10:00:01.500  1000  1500  1600 I Tag: second",
+            "08-16 10:00:03.000  1000  1500  1600 I Tag: fourth",
+        ]
+        timeline = Timeline()
+        timeline.add_source(SYSTEM_LOG, logcat(lines).entries)
+        self.assertEqual(
+            messages(timeline.events()), ["first", "second", "third", "fourth"]
+        )
+        self.assertEqual(
+            messages(timeline.events(start=at(1.5), end=at(1.6))), ["second"]
+        )
+        self.assertEqual(
+            messages(timeline.events(start=at(1), end=at(2))), ["second", "third"]
+        )
+
+    def test_sources_are_loaded_lazily(self):
+        loads = []
+
+        def records():
+            loads.append(1)
+            return [at(3)]
+
+        self.timeline.add_source("times", records, key=lambda t: t)
+        list(self.timeline.events(sources=[SYSTEM_LOG]))
+        self.assertEqual(loads, [])
+        self.assertEqual(messages(self.timeline.around(at(3), timedelta(0))), [at(3)])
+        list(self.timeline.events())
+        self.assertEqual(len(loads), 1)
+
+
+class TestBugreportTimeline(unittest.TestCase):
+    def test_of_bugreport(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "bugreport.txt"
+            path.write_text("== dumpstate: 2024-08-16 10:00:10\n")
+            bugreport_txt = BugreportTxt(path)
+        bugreport_txt.metadata.timestamp = at(10)
+        bugreport_txt.sections = [
+            Section(SYSTEM_LOG, 0, 3, logcat(SYSTEM)),
+            Section(EVENT_LOG, 3, 5, logcat(EVENTS)),
+        ]
+        process = AnrProcess()
+        process.timestamp = at(3).replace(tzinfo=timezone(timedelta(hours=8)))
+        anr_record = AnrRecord()
+        anr_record.traces = [process]
+        board = DumpstateBoard()
+        # Logged without the year
+        board.temperature_log = [
+            ThermalRecord(datetime(1900, 8, 16, 10, 0, 5), "thermal"),
+            ThermalRecord(datetime(1900, 8, 16, 9, 59, 59), "thermal"),
+        ]
+
+        bugreport = Bugreport()
+        bugreport.bugreport_txt = bugreport_txt
+        bugreport.anr_records = [anr_record]
+        bugreport.dumpstate_board = board
+
+        events = list(Timeline.of_bugreport(bugreport).events())
+        self.assertEqual(
+            [e.source for e in events],
+            [THERMAL, SYSTEM_LOG, EVENT_LOG, SYSTEM_LOG, EVENT_LOG, ANR_DUMPS]
+            + [SYSTEM_LOG, THERMAL],
+        )
+        self.assertEqual(events[-1].timestamp, at(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import random
+import tempfile
+import unittest
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from python_bugreport_parser.bugreport import Bugreport, BugreportTxt
+from python_bugreport_parser.bugreport.bugreport_all import Log284
+from python_bugreport_parser.bugreport.dumpstate_board import (
+    DumpstateBoard,
+    MiniDumpRecord,
+)
+from python_bugreport_parser.bugreport.dumpsys_entry import (
+    LocalRebootRecord,
+    MqsServiceDumpsysEntry,
+)
+from python_bugreport_parser.bugreport.section import DumpsysSection, Section
+from python_bugreport_parser.plugins import BugreportAnalysisContext
+from python_bugreport_parser.plugins.reboot_plugin import RebootPlugin
+from python_bugreport_parser.plugins.timeline_join import TimelineIndex, join_nearest
+
+START = datetime(2024, 8, 16, 10, 0, 0)
+
+
+@dataclass
+class Event:
+    name: str
+    timestamp: datetime
+
+
+def at(seconds):
+    return START + timedelta(seconds=seconds)
+
+
+def merge_minidumps_reference(reboot_records, minidump_records):
+    """The matching before the timeline index, scanning every record"""
+    augmented = []
+    for minidump_record in minidump_records:
+        min_index, min_time_diff = -1, 10000000000
+        new_record = LocalRebootRecord()
+        new_record.timestamp = minidump_record.timestamp
+        new_record.miui_version = minidump_record.version
+        new_record.boot_reason = minidump_record.crash_reason.strip()
+        new_record.detail = minidump_record.crash_details.strip()
+        new_record.is_kernel_reboot = True
+        for i, reboot_record in enumerate(reboot_records):
+            diff = abs(minidump_record.timestamp - reboot_record.timestamp)
+            if diff.total_seconds() < min_time_diff:
+                min_time_diff = diff.total_seconds()
+                min_index = i
+        if (
+            min_index != -1
+            and min_index not in augmented
+            and reboot_records[min_index].is_kernel_reboot
+        ):
+            reboot_records[min_index].merge_records(new_record)
+            augmented.append(min_index)
+        else:
+            reboot_records.append(new_record)
+    return sorted(reboot_records, key=lambda x: x.timestamp)
+
+
+def boot_record(seconds, kernel, process=""):
+    record = LocalRebootRecord()
+    record.timestamp = at(seconds)
+    record.is_kernel_reboot = kernel
+    record.process = process
+    return record
+
+
+class TestTimelineIndex(unittest.TestCase):
+    def test_nearest(self):
+        index = TimelineIndex([Event("a", at(10)), Event("b", at(0)), Event("c", at(20))])
+        self.assertEqual(index.nearest(at(4)), 1)
+        self.assertEqual(index.nearest(at(16)), 2)
+        self.assertEqual(index.nearest(at(-100)), 1)
+        self.assertEqual(index.nearest(at(100)), 2)
+        self.assertIsNone(index.nearest(at(100), timedelta(seconds=10)))
+        self.assertEqual(index.nearest(at(30), timedelta(seconds=10)), 2)
+        self.assertIsNone(TimelineIndex().nearest(at(0)))
+
+    def test_ties_go_to_the_first_added(self):
+        index = TimelineIndex([Event("a", at(10)), Event("b", at(0)), Event("c", at(0))])
+        # Equally far from 0 and 10
+        self.assertEqual(index.nearest(at(5)), 0)
+        self.assertEqual(index.nearest(at(0)), 1)
+        self.assertEqual(index.add(Event("d", at(5))), 3)
+        self.assertEqual(index.nearest(at(5)), 3)
+        self.assertEqual([e.name for e in index.in_order()], ["b", "c", "d", "a"])
+
+    def test_join_nearest(self):
+        left = [Event("x", at(1)), Event("y", at(2)), Event("z", at(50))]
+        right = [Event("a", at(0)), Event("b", at(30))]
+        pairs = join_nearest(left, right, tolerance=timedelta(seconds=25))
+        self.assertEqual(
+            [(l.name, r.name if r else None) for l, r in pairs],
+            [("x", "a"), ("y", None), ("z", "b")],
+        )
+        # Falls back to the nearest record that is not taken
+        right.append(Event("c", at(20)))
+        pairs = join_nearest(left, right, tolerance=timedelta(seconds=25))
+        self.assertEqual(
+            [(l.name, r.name if r else None) for l, r in pairs],
+            [("x", "a"), ("y", "c"), ("z", "b")],
+        )
+
+    def test_nearest_excluding(self):
+        index = TimelineIndex([Event("a", at(0)), Event("b", at(0)), Event("c", at(9))])
+        self.assertEqual(index.nearest(at(4), exclude={0}), 1)
+        self.assertEqual(index.nearest(at(4), exclude={0, 1}), 2)
+        self.assertIsNone(index.nearest(at(4), timedelta(seconds=4), {0, 1}))
+        self.assertEqual(index.nearest(at(10), exclude={2}), 0)
+
+
+class TestRebootMatching(unittest.TestCase):
+    def test_parsed_records_are_untouched(self):
+        boot_records = [boot_record(0, True)]
+        minidumps = [MiniDumpRecord("1", "V1", at(5), "panic", "details")]
+        merged = RebootPlugin._merge_minidumps(boot_records, minidumps)
+        self.assertEqual(merged[0].boot_reason, "panic")
+        self.assertEqual(boot_records[0].boot_reason, "")
+        self.assertEqual(len(boot_records), 1)
+
+    def test_matches_reference(self):
+        for seed in range(50):
+            rng = random.Random(seed)
+            boot_times = [rng.randint(0, 300) for _ in range(rng.randint(0, 30))]
+            kernel = [rng.random() < 0.7 for _ in boot_times]
+            minidumps = [
+                MiniDumpRecord(str(i), "V1", at(rng.randint(0, 300)), f"r{i} ", f"d{i}")
+                for i in range(rng.randint(0, 30))
+            ]
+
+            def boot_records():
+                return [
+                    boot_record(t, k, f"p{i}")
+                    for i, (t, k) in enumerate(zip(boot_times, kernel))
+                ]
+
+            expected = merge_minidumps_reference(boot_records(), minidumps)
+            actual = RebootPlugin._merge_minidumps(boot_records(), minidumps)
+            with self.subTest(seed=seed):
+                self.assertEqual(
+                    [vars(r) for r in actual], [vars(r) for r in expected]
+                )
+
+    def analyze(self, plugin, boot_records, minidumps):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "bugreport.txt"
+            path.write_text("== dumpstate: 2024-08-16 10:00:10\n")
+            bugreport_txt = BugreportTxt(path)
+        dumpsys = DumpsysSection()
+        dumpsys.entries.append(
+            MqsServiceDumpsysEntry("miui.mqsas.MQSService", "", None, boot_records)
+        )
+        bugreport_txt.sections = [Section("DUMPSYS", 0, 0, dumpsys)]
+        dumpstate_board = DumpstateBoard()
+        dumpstate_board.mini_dump_records = minidumps
+        log284 = Log284()
+        log284.bugreport = Bugreport()
+        log284.bugreport.bugreport_txt = bugreport_txt
+        log284.bugreport.dumpstate_board = dumpstate_board
+        context = BugreportAnalysisContext()
+        context.bugreport = log284
+        return plugin.analyze(context).data
+
+    def test_tolerance(self):
+        minidumps = [MiniDumpRecord("1", "V1", at(90), "panic", "details")]
+        merged = self.analyze(RebootPlugin(), [boot_record(0, True)], minidumps)
+        self.assertEqual([r.boot_reason for r in merged], ["panic"])
+
+        # Further than the tolerance, the minidump gets a record of its own
+        plugin = RebootPlugin(tolerance=timedelta(minutes=1))
+        merged = self.analyze(plugin, [boot_record(0, True)], minidumps)
+        self.assertEqual([r.timestamp for r in merged], [at(0), at(90)])
+        self.assertEqual([r.boot_reason for r in merged], ["", "panic"])
+        self.assertNotEqual(plugin.version(), RebootPlugin().version())
+
+
+if __name__ == "__main__":
+    unittest.main()